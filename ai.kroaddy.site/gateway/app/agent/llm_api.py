@@ -3,23 +3,155 @@ LLM API 모듈
 외부 LLM API (OpenAI, Anthropic 등)와 통신
 """
 import os
+import json
+import time
+import random
+import asyncio
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Tuple, List, Callable, Awaitable
 import logging
 from dotenv import load_dotenv
+from .provider_limits import ProviderLimiter, ProviderMetrics
+from .local_llm import LocalLLMBackend, UnknownLocalModelError
+
+try:
+    import h2  # noqa: F401  HTTP/2 지원 여부 확인용
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# 커넥션 풀 설정 (모든 provider 공통)
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+
+# provider별 요청 타임아웃 (초)
+PROVIDER_TIMEOUTS = {
+    "openai": float(os.getenv("OPENAI_TIMEOUT", "30")),
+    "anthropic": float(os.getenv("ANTHROPIC_TIMEOUT", "60")),
+}
+
+# provider별 속도 제한(초당 요청 수) / 버스트 / 최대 동시 호출 수
+# 0이면 제한 없음 - 외부 provider는 기본적으로 제한하지 않고, 필요할 때 환경 변수로 설정
+PROVIDER_RATE_LIMITS = {
+    "openai": float(os.getenv("OPENAI_RATE_LIMIT_RPS", "0")),
+    "anthropic": float(os.getenv("ANTHROPIC_RATE_LIMIT_RPS", "0")),
+    "local": float(os.getenv("LOCAL_RATE_LIMIT_RPS", "0")),
+}
+PROVIDER_RATE_BURSTS = {
+    "openai": int(os.getenv("OPENAI_RATE_LIMIT_BURST", "20")),
+    "anthropic": int(os.getenv("ANTHROPIC_RATE_LIMIT_BURST", "10")),
+    "local": int(os.getenv("LOCAL_RATE_LIMIT_BURST", "1")),
+}
+PROVIDER_MAX_CONCURRENCY = {
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "0")),
+    "anthropic": int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "0")),
+    "local": int(os.getenv("LOCAL_MAX_CONCURRENCY", "1")),  # LOCAL_LLM_INFERENCE_WORKERS와 같게
+}
+
+# fallback 시 사용할 provider별 기본 모델
+PROVIDER_DEFAULT_MODELS = {
+    "openai": os.getenv("OPENAI_DEFAULT_MODEL", "gpt-3.5-turbo"),
+    "anthropic": os.getenv("ANTHROPIC_DEFAULT_MODEL", "claude-3-haiku-20240307"),
+    "local": os.getenv("LOCAL_DEFAULT_MODEL", ""),
+}
+
+# 재시도 / fallback 체인 설정
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_FALLBACK_CHAIN = [p.strip() for p in os.getenv("LLM_FALLBACK_CHAIN", "openai,anthropic").split(",") if p.strip()]
+
 class LLMAPI:
     """LLM API 클라이언트"""
     
-    def __init__(self):
+    def __init__(self, local_backend: Optional[LocalLLMBackend] = None):
+        """
+        Args:
+            local_backend: 전달 시 provider="local"로 등록된 로컬 SLLM 사용
+        """
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY", "")
         self.openai_base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
         self.anthropic_base_url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1")
+        # provider별 장기 유지 AsyncClient (startup에서 생성, shutdown에서 종료)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        
+        # provider별 호출 함수 / 제한 / 지표
+        self._chat_handlers = {
+            "openai": self._openai_chat,
+            "anthropic": self._anthropic_chat
+        }
+        self._stream_handlers = {
+            "openai": self._openai_chat_stream,
+            "anthropic": self._anthropic_chat_stream
+        }
+        self.local_backend = local_backend
+        if local_backend is not None:
+            self._chat_handlers["local"] = local_backend.chat
+            self._stream_handlers["local"] = local_backend.chat_stream
+        self._limiters = {
+            provider: ProviderLimiter(
+                PROVIDER_RATE_LIMITS[provider],
+                PROVIDER_RATE_BURSTS[provider],
+                PROVIDER_MAX_CONCURRENCY[provider]
+            )
+            for provider in self._chat_handlers
+        }
+        self._metrics = {provider: ProviderMetrics() for provider in self._chat_handlers}
+    
+    async def startup(self):
+        """provider별 HTTP 클라이언트 생성 (앱 시작 시 호출)"""
+        for provider in PROVIDER_TIMEOUTS:
+            self._get_client(provider)
+        logger.info(f"LLM HTTP 클라이언트 준비 완료: {list(self._clients.keys())}")
+    
+    async def shutdown(self):
+        """provider별 HTTP 클라이언트 종료 및 로컬 모델 해제 (앱 종료 시 호출)"""
+        for provider, client in list(self._clients.items()):
+            await client.aclose()
+            logger.info(f"LLM HTTP 클라이언트 종료: {provider}")
+        self._clients.clear()
+        if self.local_backend is not None:
+            await self.local_backend.shutdown()
+    
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        """커넥션 풀/keep-alive/타임아웃이 설정된 AsyncClient 생성"""
+        if provider == "openai":
+            base_url = self.openai_base_url
+        elif provider == "anthropic":
+            base_url = self.anthropic_base_url
+        else:
+            raise ValueError(f"지원하지 않는 provider: {provider}")
+        
+        http2 = LLM_HTTP2 and HTTP2_AVAILABLE
+        if LLM_HTTP2 and not HTTP2_AVAILABLE:
+            logger.warning("h2 패키지가 없어 HTTP/1.1로 연결합니다. (pip install httpx[http2])")
+        
+        return httpx.AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(PROVIDER_TIMEOUTS[provider], connect=LLM_CONNECT_TIMEOUT)
+        )
+    
+    def _get_client(self, provider: str) -> httpx.AsyncClient:
+        """provider의 공유 클라이언트 반환 (startup 이전 호출 시 지연 생성)"""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self._clients[provider] = client
+        return client
     
     async def chat_completion(
         self,
@@ -27,44 +159,241 @@ class LLMAPI:
         model: str = "gpt-3.5-turbo",
         provider: str = "openai",
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        fallback: bool = True
     ) -> Dict[str, Any]:
         """
         LLM API를 호출하여 채팅 완성
         
+        provider별 속도/동시 실행 제한 하에서 호출하고, 429/5xx/네트워크 오류는
+        지수 백오프(jitter)로 재시도한 뒤 실패하면 fallback 체인의 다음 provider로 전환
+        
         Args:
             messages: 메시지 리스트 [{"role": "user", "content": "..."}]
             model: 모델 이름
-            provider: "openai" 또는 "anthropic"
+            provider: "openai", "anthropic" 또는 "local"
             temperature: 온도 파라미터
             max_tokens: 최대 토큰 수
+            fallback: 실패 시 fallback 체인 사용 여부
         
         Returns:
-            API 응답 딕셔너리
+            API 응답 딕셔너리 (실제 응답한 provider가 "provider" 키로 추가됨)
         """
-        try:
-            if provider == "openai":
-                return await self._openai_chat(messages, model, temperature, max_tokens)
-            elif provider == "anthropic":
-                return await self._anthropic_chat(messages, model, temperature, max_tokens)
-            else:
-                raise ValueError(f"지원하지 않는 provider: {provider}")
-        except Exception as e:
-            logger.error(f"LLM API 호출 실패: {e}")
-            raise
+        primary_error: Optional[Exception] = None
+        for index, (target, target_model) in enumerate(await self._route(provider, model, fallback)):
+            if index > 0:
+                self._metrics[provider].record_fallback()
+                logger.warning(f"{provider} 호출 실패, {target}({target_model})로 전환")
+            try:
+                result = await self._call_with_retry(
+                    target,
+                    lambda: self._chat_handlers[target](messages, target_model, temperature, max_tokens)
+                )
+                result["provider"] = target
+                return result
+            except Exception as e:
+                logger.error(f"LLM API 호출 실패 ({target}): {e}")
+                primary_error = primary_error or e
+                # 400/401 등 요청 자체의 오류는 다른 provider로 넘기지 않음
+                if not self._is_retryable(e):
+                    break
+        # 요청한 provider의 오류를 그대로 반환 (429는 fallback 후에도 429)
+        raise primary_error
     
-    async def _openai_chat(
+    async def chat_completion_stream(
+        self,
+        messages: list[Dict[str, str]],
+        model: str = "gpt-3.5-turbo",
+        provider: str = "openai",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        fallback: bool = True,
+        route_info: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        LLM API 스트리밍 호출
+        
+        provider별 SSE(OpenAI delta, Anthropic content_block_delta)를
+        텍스트 조각(delta) 단위로 통일하여 반환.
+        첫 조각을 받기 전의 실패만 재시도/fallback 대상
+        
+        Args:
+            route_info: 전달 시 실제 응답한 provider/model과 토큰 사용량(usage)을 기록할 딕셔너리
+        
+        Yields:
+            응답 텍스트 조각
+        """
+        primary_error: Optional[Exception] = None
+        for index, (target, target_model) in enumerate(await self._route(provider, model, fallback)):
+            if index > 0:
+                self._metrics[provider].record_fallback()
+                logger.warning(f"{provider} 스트리밍 실패, {target}({target_model})로 전환")
+            
+            last_error: Optional[Exception] = None
+            metrics = self._metrics[target]
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                started = False
+                start = time.perf_counter()
+                usage: Dict[str, Any] = {}
+                try:
+                    async with self._limiters[target]:
+                        stream = self._stream_handlers[target](messages, target_model, temperature, max_tokens, usage=usage)
+                        async for delta in stream:
+                            if not started and route_info is not None:
+                                route_info.update(provider=target, model=target_model)
+                            started = True
+                            yield delta
+                    metrics.record_success(time.perf_counter() - start)
+                    if route_info is not None:
+                        route_info["usage"] = usage
+                    return
+                except Exception as e:
+                    metrics.record_error(time.perf_counter() - start, self._status_code(e))
+                    logger.error(f"LLM API 스트리밍 실패 ({target}): {e}")
+                    if started:
+                        raise
+                    last_error = e
+                    if not self._is_retryable(e) or attempt == LLM_MAX_RETRIES:
+                        break
+                metrics.record_retry()
+                await asyncio.sleep(self._backoff_delay(attempt, last_error))
+            primary_error = primary_error or last_error
+            if not self._is_retryable(last_error):
+                break
+        raise primary_error
+    
+    async def embeddings(self, texts: List[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+        """
+        OpenAI 임베딩 API 호출 (채팅과 같은 커넥션 풀/속도 제한/재시도 사용)
+        
+        Args:
+            texts: 임베딩할 텍스트 리스트
+            model: 임베딩 모델 이름
+        
+        Returns:
+            입력 순서와 같은 임베딩 벡터 리스트
+        """
+        result = await self._call_with_retry("openai", lambda: self._openai_embeddings(texts, model))
+        return [item["embedding"] for item in sorted(result["data"], key=lambda item: item["index"])]
+    
+    def provider_stats(self) -> Dict[str, Any]:
+        """provider별 지연 시간/오류 지표 및 제한 설정"""
+        stats = {
+            provider: {
+                **self._metrics[provider].snapshot(),
+                "in_flight": self._limiters[provider].in_flight,
+                "max_concurrency": self._limiters[provider].max_concurrency,
+                "rate_limit_rps": self._limiters[provider].bucket.rate
+            }
+            for provider in self._chat_handlers
+        }
+        if self.local_backend is not None:
+            stats["local"]["models"] = self.local_backend.stats()
+        return stats
+    
+    async def check_model(self, provider: str, model: str):
+        """
+        요청한 provider/model 확인 (fallback 전에 실패해야 하는 요청)
+        
+        Raises:
+            ValueError: 지원하지 않는 provider
+            UnknownLocalModelError: provider="local"인데 등록되지 않은 모델
+        """
+        if provider not in self._chat_handlers:
+            raise ValueError(f"지원하지 않는 provider: {provider}")
+        if provider == "local" and not await self.local_backend.is_registered(model):
+            raise UnknownLocalModelError(f"등록되지 않은 로컬 모델: {model}")
+    
+    async def _route(self, provider: str, model: str, fallback: bool) -> List[Tuple[str, str]]:
+        """
+        호출할 (provider, model) 순서 결정
+        
+        요청한 provider가 먼저 오고, fallback 체인에서 그 뒤에 있는 provider가
+        각자의 기본 모델로 이어짐 (체인에 없으면 체인 전체가 뒤따름).
+        API 키가 없는 provider는 fallback 대상에서 제외
+        """
+        await self.check_model(provider, model)
+        
+        route = [(provider, model)]
+        if not fallback:
+            return route
+        
+        chain = [
+            p for p in LLM_FALLBACK_CHAIN
+            if p in self._chat_handlers and PROVIDER_DEFAULT_MODELS.get(p) and self._is_configured(p)
+        ]
+        if provider in chain:
+            chain = chain[chain.index(provider) + 1:]
+        for target in chain:
+            if target != provider:
+                route.append((target, PROVIDER_DEFAULT_MODELS[target]))
+        return route
+    
+    def _is_configured(self, provider: str) -> bool:
+        """호출에 필요한 설정(API 키)이 있는 provider인지 (local은 핸들러가 있으면 사용 가능)"""
+        if provider == "openai":
+            return bool(self.openai_api_key)
+        if provider == "anthropic":
+            return bool(self.anthropic_api_key)
+        return provider in self._chat_handlers
+    
+    async def _call_with_retry(self, provider: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """속도/동시 실행 제한 하에서 호출하고 재시도 가능한 오류는 백오프 후 재시도"""
+        metrics = self._metrics[provider]
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                async with self._limiters[provider]:
+                    result = await call()
+                metrics.record_success(time.perf_counter() - start)
+                return result
+            except Exception as e:
+                metrics.record_error(time.perf_counter() - start, self._status_code(e))
+                if not self._is_retryable(e) or attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                logger.warning(f"{provider} 재시도 {attempt + 1}/{LLM_MAX_RETRIES} ({delay:.2f}초 후): {e}")
+            metrics.record_retry()
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _status_code(error: Exception) -> Optional[int]:
+        """HTTP 오류의 상태 코드 (없으면 None)"""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code
+        return None
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """429/5xx 및 네트워크 오류만 재시도"""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return isinstance(error, httpx.TransportError)
+    
+    @staticmethod
+    def _backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+        """지수 백오프 + full jitter (Retry-After 헤더가 있으면 우선)"""
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), LLM_RETRY_MAX_DELAY)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+    
+    def _openai_request(
         self,
         messages: list[Dict[str, str]],
         model: str,
         temperature: float,
         max_tokens: Optional[int]
-    ) -> Dict[str, Any]:
-        """OpenAI API 호출"""
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """OpenAI 요청 헤더/페이로드 생성"""
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다.")
         
-        url = f"{self.openai_base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.openai_api_key}",
             "Content-Type": "application/json"
@@ -79,23 +408,19 @@ class LLMAPI:
         if max_tokens:
             payload["max_tokens"] = max_tokens
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
+        return headers, payload
     
-    async def _anthropic_chat(
+    def _anthropic_request(
         self,
         messages: list[Dict[str, str]],
         model: str,
         temperature: float,
         max_tokens: Optional[int]
-    ) -> Dict[str, Any]:
-        """Anthropic API 호출"""
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Anthropic 요청 헤더/페이로드 생성"""
         if not self.anthropic_api_key:
             raise ValueError("ANTHROPIC_API_KEY가 설정되지 않았습니다.")
         
-        url = f"{self.anthropic_base_url}/messages"
         headers = {
             "x-api-key": self.anthropic_api_key,
             "anthropic-version": "2023-06-01",
@@ -125,8 +450,113 @@ class LLMAPI:
         if system_message:
             payload["system"] = system_message
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30.0)
+        return headers, payload
+    
+    async def _openai_chat(
+        self,
+        messages: list[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """OpenAI API 호출"""
+        headers, payload = self._openai_request(messages, model, temperature, max_tokens)
+        
+        client = self._get_client("openai")
+        response = await client.post("/chat/completions", json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    
+    async def _openai_embeddings(self, texts: List[str], model: str) -> Dict[str, Any]:
+        """OpenAI 임베딩 API 호출"""
+        if not self.openai_api_key:
+            raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다.")
+        
+        headers = {
+            "Authorization": f"Bearer {self.openai_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        client = self._get_client("openai")
+        response = await client.post("/embeddings", json={"model": model, "input": texts}, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    
+    async def _anthropic_chat(
+        self,
+        messages: list[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """Anthropic API 호출"""
+        headers, payload = self._anthropic_request(messages, model, temperature, max_tokens)
+        
+        client = self._get_client("anthropic")
+        response = await client.post("/messages", json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    
+    async def _openai_chat_stream(
+        self,
+        messages: list[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """OpenAI 스트리밍 호출 (choices[0].delta.content 추출, 마지막 청크의 usage 기록)"""
+        headers, payload = self._openai_request(messages, model, temperature, max_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        
+        client = self._get_client("openai")
+        async with client.stream("POST", "/chat/completions", json=payload, headers=headers) as response:
             response.raise_for_status()
-            return response.json()
-
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage") and usage is not None:
+                    usage.update(chunk["usage"])
+                if not chunk.get("choices"):
+                    continue
+                content = chunk["choices"][0].get("delta", {}).get("content")
+                if content:
+                    yield content
+    
+    async def _anthropic_chat_stream(
+        self,
+        messages: list[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Anthropic 스트리밍 호출 (content_block_delta 이벤트의 text 추출, message_start/delta의 usage 기록)"""
+        headers, payload = self._anthropic_request(messages, model, temperature, max_tokens)
+        payload["stream"] = True
+        
+        client = self._get_client("anthropic")
+        async with client.stream("POST", "/messages", json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:].strip())
+                event_type = event.get("type")
+                if event_type == "content_block_delta":
+                    text = event.get("delta", {}).get("text")
+                    if text:
+                        yield text
+                elif event_type == "message_start" and usage is not None:
+                    usage.update(event.get("message", {}).get("usage") or {})
+                elif event_type == "message_delta" and usage is not None:
+                    usage.update(event.get("usage") or {})
+                elif event_type == "message_stop":
+                    break
+                elif event_type == "error":
+                    raise RuntimeError(f"Anthropic 스트리밍 오류: {event.get('error')}")
@@ -0,0 +1,434 @@
+"""
+로컬 SLLM 추론 모듈
+SLLMDB에 등록된 경량 모델을 필요할 때 로드하여 CPU에서 실행
+
+지원 백엔드 (선택 설치):
+    - transformers: pip install transformers torch
+    - llama.cpp (.gguf): pip install llama-cpp-python
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, Callable
+
+from .sllm_db import SLLMDB
+
+logger = logging.getLogger(__name__)
+
+# 로컬 추론 설정
+LOCAL_LLM_MAX_RESIDENT_MODELS = int(os.getenv("LOCAL_LLM_MAX_RESIDENT_MODELS", "1"))
+LOCAL_LLM_NUM_THREADS = int(os.getenv("LOCAL_LLM_NUM_THREADS", str(os.cpu_count() or 1)))
+LOCAL_LLM_INFERENCE_WORKERS = int(os.getenv("LOCAL_LLM_INFERENCE_WORKERS", "1"))
+LOCAL_LLM_MAX_NEW_TOKENS = int(os.getenv("LOCAL_LLM_MAX_NEW_TOKENS", "256"))
+
+_STREAM_END = object()
+
+class UnknownLocalModelError(ValueError):
+    """등록되지 않은 로컬 모델 요청"""
+
+class LocalModel:
+    """로드된 로컬 모델 (transformers 또는 llama.cpp)"""
+    
+    def __init__(self, name: str, model_type: str, model_path: str, config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            name: 등록된 모델 이름
+            model_type: 모델 타입 (예: "llama", "mistral", "phi")
+            model_path: 모델 디렉토리 또는 .gguf 파일 경로
+            config: 모델 설정 (backend, max_new_tokens, n_ctx, torch_dtype 등)
+        """
+        self.name = name
+        self.model_type = model_type
+        self.model_path = model_path
+        self.config = config or {}
+        self.backend = self.config.get("backend") or ("llama_cpp" if model_path.endswith(".gguf") else "transformers")
+        self._model = None
+        self._tokenizer = None
+        # 생성(스트리밍 포함) 전체 동안 잡는 잠금 - 같은 모델 컨텍스트를 동시에 사용하지 않도록
+        self.lock = threading.Lock()
+        # 상주 목록에서 빠진 모델 (생성 중이면 끝난 뒤 해제)
+        self.retired = False
+    
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+    
+    def load(self):
+        """모델을 메모리에 로드"""
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"모델 경로를 찾을 수 없습니다: {self.model_path}")
+        
+        start = time.perf_counter()
+        if self.backend == "llama_cpp":
+            try:
+                from llama_cpp import Llama
+            except ImportError as e:
+                raise RuntimeError("llama-cpp-python이 설치되지 않았습니다. (pip install llama-cpp-python)") from e
+            self._model = Llama(
+                model_path=self.model_path,
+                n_ctx=int(self.config.get("n_ctx", 2048)),
+                n_threads=LOCAL_LLM_NUM_THREADS,
+                verbose=False
+            )
+        elif self.backend == "transformers":
+            try:
+                import torch
+                from transformers import AutoModelForCausalLM, AutoTokenizer
+            except ImportError as e:
+                raise RuntimeError("transformers/torch가 설치되지 않았습니다. (pip install transformers torch)") from e
+            torch.set_num_threads(LOCAL_LLM_NUM_THREADS)
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+            self._model = AutoModelForCausalLM.from_pretrained(
+                self.model_path,
+                torch_dtype=getattr(torch, self.config.get("torch_dtype", "float32")),
+                low_cpu_mem_usage=True
+            )
+            self._model.eval()
+        else:
+            raise ValueError(f"지원하지 않는 로컬 백엔드: {self.backend}")
+        
+        logger.info(f"로컬 모델 로드 완료: {self.name} ({self.backend}, {time.perf_counter() - start:.1f}초)")
+    
+    def unload(self):
+        """모델을 메모리에서 해제"""
+        self._model = None
+        self._tokenizer = None
+        logger.info(f"로컬 모델 언로드: {self.name}")
+    
+    def _max_new_tokens(self, max_tokens: Optional[int]) -> int:
+        """요청값 > 모델 설정 > 기본값 순으로 생성 길이 결정"""
+        return max_tokens or int(self.config.get("max_new_tokens", LOCAL_LLM_MAX_NEW_TOKENS))
+    
+    def _prompt_ids(self, messages: List[Dict[str, str]]):
+        """transformers용 입력 토큰 생성 (chat template이 없으면 단순 역할 형식)"""
+        if getattr(self._tokenizer, "chat_template", None):
+            return self._tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt")
+        prompt = "\n".join(f"{m['role']}: {m['content']}" for m in messages) + "\nassistant:"
+        return self._tokenizer(prompt, return_tensors="pt").input_ids
+    
+    def _generation_kwargs(self, temperature: float, max_tokens: Optional[int]) -> Dict[str, Any]:
+        """transformers generate 인자 (temperature 0이면 greedy)"""
+        kwargs = {
+            "max_new_tokens": self._max_new_tokens(max_tokens),
+            "pad_token_id": self._tokenizer.pad_token_id or self._tokenizer.eos_token_id
+        }
+        if temperature and temperature > 0:
+            kwargs.update(do_sample=True, temperature=temperature)
+        else:
+            kwargs.update(do_sample=False)
+        return kwargs
+    
+    def generate(self, messages: List[Dict[str, str]], temperature: float, max_tokens: Optional[int]) -> Dict[str, Any]:
+        """
+        전체 응답 생성
+        
+        Returns:
+            OpenAI chat completion 형식의 응답 딕셔너리
+        """
+        if self.backend == "llama_cpp":
+            result = self._model.create_chat_completion(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=self._max_new_tokens(max_tokens)
+            )
+            result["model"] = self.name
+            return result
+        
+        import torch
+        input_ids = self._prompt_ids(messages)
+        with torch.inference_mode():
+            output = self._model.generate(input_ids, **self._generation_kwargs(temperature, max_tokens))
+        completion_ids = output[0][input_ids.shape[-1]:]
+        text = self._tokenizer.decode(completion_ids, skip_special_tokens=True).strip()
+        return {
+            "object": "chat.completion",
+            "model": self.name,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": int(input_ids.shape[-1]),
+                "completion_tokens": int(completion_ids.shape[-1]),
+                "total_tokens": int(output[0].shape[-1])
+            }
+        }
+    
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        stop: Optional[threading.Event] = None
+    ) -> Iterator[str]:
+        """
+        응답을 텍스트 조각 단위로 생성하는 동기 이터레이터
+        
+        이터레이터가 끝나거나 닫힐 때까지 모델 생성이 모두 끝나므로, 호출자는 그동안 lock을 잡고 있으면 됨
+        
+        Args:
+            stop: 설정되면 생성 중단 (클라이언트 연결 종료 등)
+        """
+        stop = stop or threading.Event()
+        if self.backend == "llama_cpp":
+            chunks = self._model.create_chat_completion(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=self._max_new_tokens(max_tokens),
+                stream=True
+            )
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        break
+                    content = chunk["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+            finally:
+                chunks.close()
+            return
+        
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+        
+        class _StopOnEvent(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return stop.is_set()
+        
+        input_ids = self._prompt_ids(messages)
+        streamer = TextIteratorStreamer(self._tokenizer, skip_prompt=True, skip_special_tokens=True)
+        
+        def run():
+            with torch.inference_mode():
+                self._model.generate(
+                    input_ids,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_StopOnEvent()]),
+                    **self._generation_kwargs(temperature, max_tokens)
+                )
+        
+        # generate는 streamer에 쓰는 별도 스레드에서 실행 - 중간에 닫혀도 생성이 끝날 때까지 기다린 뒤 반환
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            stop.set()
+            thread.join()
+
+class LocalLLMBackend:
+    """등록된 로컬 모델의 지연 로드 및 LRU 상주 관리"""
+    
+    def __init__(self, db: SLLMDB, max_resident: int = LOCAL_LLM_MAX_RESIDENT_MODELS):
+        """
+        Args:
+            db: 모델 등록 정보를 조회할 SLLMDB
+            max_resident: 동시에 메모리에 올려둘 최대 모델 수
+        """
+        self.db = db
+        self.max_resident = max(1, max_resident)
+        self._resident: "OrderedDict[str, LocalModel]" = OrderedDict()
+        # 상주 목록 잠금 (짧게만 잡음 - 모델 로드는 이름별 로드 잠금 안에서 수행)
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=LOCAL_LLM_INFERENCE_WORKERS,
+            thread_name_prefix="local-llm"
+        )
+        self._stats = {
+            "loads": 0,
+            "evictions": 0
+        }
+    
+    def _retire(self, model: LocalModel):
+        """상주 목록에서 뺀 모델 해제 (생성 중이면 생성이 끝난 뒤 _release에서 해제)"""
+        model.retired = True
+        if model.lock.acquire(blocking=False):
+            try:
+                model.unload()
+            finally:
+                model.lock.release()
+        else:
+            logger.info(f"로컬 모델 생성 중 - 끝난 뒤 언로드: {model.name}")
+    
+    async def is_registered(self, name: str) -> bool:
+        """상주 중이거나 SLLMDB에 등록된 모델인지 확인 (DB 조회는 SLLMDB 스레드 풀에서 실행)"""
+        if self._resident_model(name) is not None:
+            return True
+        return await self.db.run(self.db.get_model, name) is not None
+    
+    def _resident_model(self, name: str) -> Optional[LocalModel]:
+        """상주 중인 모델 (최근 사용으로 표시)"""
+        with self._lock:
+            model = self._resident.get(name)
+            if model is not None:
+                self._resident.move_to_end(name)
+            return model
+    
+    def _get_model(self, name: str) -> LocalModel:
+        """
+        모델 반환 (상주하지 않으면 등록 정보로 로드, 초과 시 가장 오래 안 쓴 모델 해제)
+        
+        로드는 이름별 로드 잠금 안에서 하므로 같은 모델을 두 번 로드하지 않고,
+        다른 모델 조회/해제는 로드가 끝나기를 기다리지 않음
+        """
+        model = self._resident_model(name)
+        if model is not None:
+            return model
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        
+        with load_lock:
+            # 기다리는 사이 다른 요청이 로드했으면 그대로 사용
+            model = self._resident_model(name)
+            if model is not None:
+                return model
+            
+            info = self.db.get_model(name)
+            if not info:
+                raise UnknownLocalModelError(f"등록되지 않은 로컬 모델: {name}")
+            
+            # 메모리를 먼저 비운 뒤 로드
+            evicted = []
+            with self._lock:
+                while len(self._resident) >= self.max_resident:
+                    evicted.append(self._resident.popitem(last=False)[1])
+                    self._stats["evictions"] += 1
+            for old in evicted:
+                self._retire(old)
+            
+            model = LocalModel(info["name"], info["model_type"], info["model_path"], info["config"])
+            model.load()
+            with self._lock:
+                self._resident[name] = model
+                self._stats["loads"] += 1
+            return model
+    
+    def _acquire(self, name: str) -> LocalModel:
+        """모델을 가져와 생성 잠금 획득 (잠금을 기다리는 사이 해제된 모델이면 다시 로드)"""
+        while True:
+            model = self._get_model(name)
+            model.lock.acquire()
+            if model.loaded and not model.retired:
+                return model
+            self._release(model)
+    
+    def _release(self, model: LocalModel):
+        """생성 잠금 해제 (그 사이 상주 목록에서 빠졌으면 여기서 언로드)"""
+        try:
+            if model.retired and model.loaded:
+                model.unload()
+        finally:
+            model.lock.release()
+    
+    def _generate(self, name: str, messages: List[Dict[str, str]], temperature: float, max_tokens: Optional[int]) -> Dict[str, Any]:
+        """모델 로드 후 생성 (스레드 풀에서 실행)"""
+        model = self._acquire(name)
+        try:
+            return model.generate(messages, temperature, max_tokens)
+        finally:
+            self._release(model)
+    
+    def _stream(
+        self,
+        name: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        emit: Callable[[Any], None],
+        stop: threading.Event
+    ):
+        """스트리밍 생성 전체를 잠금 안에서 실행하고 조각을 emit으로 전달 (스레드 풀에서 실행)"""
+        try:
+            model = self._acquire(name)
+            try:
+                for delta in model.stream(messages, temperature, max_tokens, stop):
+                    emit(delta)
+            finally:
+                self._release(model)
+        except Exception as e:
+            emit(e)
+        finally:
+            emit(_STREAM_END)
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """로컬 모델로 채팅 완성 (추론 전용 스레드 풀에서 실행)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._generate, model, messages, temperature, max_tokens)
+    
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        로컬 모델 스트리밍
+        
+        생성 전체를 추론 스레드 풀의 작업 하나로 실행하고(모델 잠금 유지), 조각은 큐로 받아 전달.
+        클라이언트가 중간에 끊으면 생성을 중단시킴.
+        usage는 다른 provider와 시그니처를 맞추기 위한 인자로, 로컬 스트리밍은 토큰 수를 집계하지 않음
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def emit(item: Any):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        
+        loop.run_in_executor(self._executor, self._stream, model, messages, temperature, max_tokens, emit, stop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+    
+    def _unload(self, name: str) -> bool:
+        """상주 중인 모델 해제 (생성 중이면 새 요청에는 쓰지 않고, 생성이 끝난 뒤 해제)"""
+        with self._lock:
+            model = self._resident.pop(name, None)
+        if model is None:
+            return False
+        self._retire(model)
+        return True
+    
+    async def unload(self, name: str) -> bool:
+        """상주 중인 모델 해제 (메모리 해제가 이벤트 루프를 막지 않도록 스레드 풀에서 실행)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._unload, name)
+    
+    def resident_models(self) -> List[str]:
+        """메모리에 상주 중인 모델 이름 (오래된 순)"""
+        return list(self._resident.keys())
+    
+    def stats(self) -> Dict[str, Any]:
+        """로드/해제 통계"""
+        return {
+            **self._stats,
+            "resident": self.resident_models(),
+            "busy": [name for name, model in list(self._resident.items()) if model.lock.locked()],
+            "max_resident": self.max_resident,
+            "num_threads": LOCAL_LLM_NUM_THREADS
+        }
+    
+    async def shutdown(self):
+        """모든 모델 해제 및 스레드 풀 종료"""
+        for name in self.resident_models():
+            await self.unload(name)
+        self._executor.shutdown(wait=False)
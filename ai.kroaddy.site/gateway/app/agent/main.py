@@ -1,22 +1,43 @@
 """
 Agent 서비스 - LLM API 및 SLLM 관리
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from .llm_api import LLMAPI
-from .sllm_db import SLLMDB
+from .sllm_db import SLLMDB, CONVERSATION_RETENTION_DAYS
+from .local_llm import LocalLLMBackend, UnknownLocalModelError
+from .response_cache import ResponseCache, make_cache_key
+from .single_flight import SingleFlight
+from .usage import UsageTracker, extract_usage
+from .semantic_cache import SemanticCache, SEMANTIC_CACHE_ENABLED, make_scope
+import os
+import asyncio
 import logging
 import hashlib
+import json
+import time
+import httpx
 
 logger = logging.getLogger(__name__)
 
 # Agent 라우터
 agent_router = APIRouter(prefix="/agent", tags=["agent"])
 
-# LLM API 및 SLLM DB 초기화
-llm_api = LLMAPI()
+# 배치 채팅 설정 (provider별 속도/동시 실행 제한은 LLMAPI에서 추가로 적용)
+AGENT_BATCH_MAX_ITEMS = int(os.getenv("AGENT_BATCH_MAX_ITEMS", "500"))
+AGENT_BATCH_MAX_CONCURRENCY = int(os.getenv("AGENT_BATCH_MAX_CONCURRENCY", "32"))
+
+# LLM API 및 SLLM DB 초기화 (등록된 SLLM은 provider="local"로 사용)
 sllm_db = SLLMDB()
+local_backend = LocalLLMBackend(sllm_db)
+llm_api = LLMAPI(local_backend=local_backend)
+response_cache = ResponseCache(sllm_db)
+single_flight = SingleFlight()
+usage_tracker = UsageTracker(sllm_db)
+semantic_cache = SemanticCache(llm_api, os.path.join(os.path.dirname(sllm_db.db_path), "semantic_cache.npz"))
 
 # ============================================================================
 # 요청/응답 모델
@@ -28,13 +49,24 @@ class ChatRequest(BaseModel):
     provider: Optional[str] = "openai"
     temperature: Optional[float] = 0.7
     max_tokens: Optional[int] = None
-    use_cache: Optional[bool] = True
+    # None이면 결정적 설정(temperature=0)에서만 캐시 사용, True/False로 강제 지정
+    use_cache: Optional[bool] = None
+    stream: Optional[bool] = False
+    # 실패 시 fallback 체인(LLM_FALLBACK_CHAIN)의 다음 provider 사용 여부
+    fallback: Optional[bool] = True
+    # 사용량 집계/대화 기록용 호출자 세션 ID (없으면 메시지 해시 사용)
+    session_id: Optional[str] = None
+    # None이면 SEMANTIC_CACHE_ENABLED를 따름 (캐시 대상 요청에만 적용)
+    semantic_cache: Optional[bool] = None
 
 class ChatResponse(BaseModel):
     response: str
     model: str
     provider: str
     cached: bool = False
+    coalesced: bool = False
+    # 시맨틱 캐시 적중 시 질문 간 코사인 유사도
+    similarity: Optional[float] = None
 
 class ModelRegisterRequest(BaseModel):
     name: str
@@ -42,10 +74,273 @@ class ModelRegisterRequest(BaseModel):
     model_path: str
     config: Optional[Dict[str, Any]] = None
 
+class BatchChatRequest(BaseModel):
+    # 항목별 메시지 리스트 (나머지 생성 파라미터는 모든 항목에 공통 적용)
+    items: List[List[Dict[str, str]]]
+    model: Optional[str] = "gpt-3.5-turbo"
+    provider: Optional[str] = "openai"
+    temperature: Optional[float] = 0.7
+    max_tokens: Optional[int] = None
+    use_cache: Optional[bool] = None
+    fallback: Optional[bool] = True
+    session_id: Optional[str] = None
+    semantic_cache: Optional[bool] = None
+
+class BatchChatItem(BaseModel):
+    index: int
+    success: bool
+    result: Optional[ChatResponse] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItem]
+    total: int
+    succeeded: int
+    failed: int
+    # 같은 배치 안의 동일 항목으로 provider 호출을 공유한 수
+    deduplicated: int
+    elapsed_ms: float
+
+@dataclass
+class CachedAnswer:
+    """응답/시맨틱 캐시 조회 결과"""
+    response: str
+    similarity: Optional[float] = None
+
+class SemanticFeedbackRequest(BaseModel):
+    false_hit: bool
+
 class ConversationRequest(BaseModel):
     session_id: str
     limit: Optional[int] = 100
 
+# ============================================================================
+# 채팅 처리 헬퍼
+# ============================================================================
+
+def _cache_key(request: ChatRequest) -> str:
+    """모든 생성 파라미터를 포함한 정규화 캐시 키"""
+    return make_cache_key(
+        messages=request.messages,
+        model=request.model,
+        provider=request.provider,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens
+    )
+
+def _should_cache(request: ChatRequest) -> bool:
+    """캐시 사용 여부 (명시하지 않으면 temperature=0인 결정적 요청만)"""
+    if request.use_cache is not None:
+        return request.use_cache
+    return request.temperature == 0
+
+def _use_semantic_cache(request: ChatRequest) -> bool:
+    """시맨틱 캐시 사용 여부 (캐시 대상이고 마지막 메시지가 사용자 메시지인 요청만)"""
+    enabled = request.semantic_cache if request.semantic_cache is not None else SEMANTIC_CACHE_ENABLED
+    return (
+        enabled
+        and _should_cache(request)
+        and bool(request.messages)
+        and request.messages[-1].get("role") == "user"
+    )
+
+def _semantic_scope(request: ChatRequest) -> str:
+    """시맨틱 캐시 범위 (provider/model/이전 대화)"""
+    return make_scope(request.messages, request.model, request.provider, request.max_tokens)
+
+def _session_id(request: ChatRequest) -> str:
+    """대화 기록/사용량 집계용 세션 ID"""
+    if request.session_id:
+        return request.session_id
+    return hashlib.md5(str(request.messages).encode()).hexdigest()[:16]
+
+def _extract_response_text(provider: str, result: Dict[str, Any]) -> str:
+    """provider별 응답에서 텍스트 추출 (local은 OpenAI 형식)"""
+    if provider in ("openai", "local"):
+        return result["choices"][0]["message"]["content"]
+    elif provider == "anthropic":
+        return result["content"][0]["text"]
+    return str(result)
+
+async def _store_result(
+    request: ChatRequest,
+    response_text: str,
+    provider: Optional[str] = None,
+    model: Optional[str] = None
+):
+    """응답 캐시 및 대화 기록 저장 (SQLite 쓰기는 백그라운드 writer에서 배치 처리)"""
+    provider = provider or request.provider
+    model = model or request.model
+    
+    # 캐시 저장 (fallback으로 다른 provider가 응답한 경우 요청 키로 캐시하지 않음)
+    if _should_cache(request) and provider == request.provider:
+        await response_cache.set(_cache_key(request), response_text, request.model)
+        if _use_semantic_cache(request):
+            await semantic_cache.add(_semantic_scope(request), request.messages[-1]["content"], response_text)
+    
+    # 대화 기록 저장
+    if request.messages:
+        last_message = request.messages[-1]
+        if last_message.get("role") == "user":
+            session_id = _session_id(request)
+            sllm_db.save_conversation(
+                session_id=session_id,
+                user_message=last_message["content"],
+                model_response=response_text,
+                model_name=model,
+                metadata={"provider": provider}
+            )
+
+async def _generate(request: ChatRequest) -> Dict[str, str]:
+    """provider 호출 후 응답 텍스트 추출, 사용량 기록 및 저장"""
+    start = time.perf_counter()
+    result = await llm_api.chat_completion(
+        messages=request.messages,
+        model=request.model,
+        provider=request.provider,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        fallback=request.fallback
+    )
+    
+    # 응답 추출 (fallback 시 실제 응답한 provider/model 기준)
+    provider = result.get("provider", request.provider)
+    model = result.get("model") or request.model
+    response_text = _extract_response_text(provider, result)
+    
+    # 토큰 사용량 기록
+    usage_tracker.record(
+        provider,
+        model,
+        _session_id(request),
+        extract_usage(provider, result),
+        latency_ms=(time.perf_counter() - start) * 1000
+    )
+    
+    # 캐시 및 대화 기록 저장
+    await _store_result(request, response_text, provider, model)
+    return {"response": response_text, "provider": provider, "model": model}
+
+async def _lookup_cache(request: ChatRequest) -> Optional[CachedAnswer]:
+    """응답 캐시 -> 시맨틱 캐시 순으로 조회 (캐시 대상 요청만)"""
+    if not _should_cache(request):
+        return None
+    
+    cached_response = await response_cache.get(_cache_key(request))
+    if cached_response:
+        logger.info("캐시된 응답 사용")
+        return CachedAnswer(cached_response)
+    
+    # 표현만 다른 질문은 임베딩 유사도로 조회
+    if _use_semantic_cache(request):
+        match = await semantic_cache.lookup(_semantic_scope(request), request.messages[-1]["content"])
+        if match is not None:
+            logger.info(f"시맨틱 캐시 응답 사용 (유사도 {match.similarity})")
+            return CachedAnswer(match.response, match.similarity)
+    return None
+
+async def _complete(request: ChatRequest) -> ChatResponse:
+    """비스트리밍 채팅 처리 (캐시 조회 후 provider 호출, 오류는 호출자에게 전파)"""
+    cached = await _lookup_cache(request)
+    if cached is not None:
+        usage_tracker.record(request.provider, request.model, _session_id(request), cached=True)
+        return ChatResponse(
+            response=cached.response,
+            model=request.model,
+            provider=request.provider,
+            cached=True,
+            similarity=cached.similarity
+        )
+    
+    # LLM API 호출 (캐시 대상 요청은 동일 키로 진행 중인 호출과 병합)
+    if _should_cache(request):
+        generated, coalesced = await single_flight.do(
+            _cache_key(request),
+            lambda: _generate(request)
+        )
+    else:
+        generated, coalesced = await _generate(request), False
+    
+    return ChatResponse(
+        response=generated["response"],
+        model=generated["model"],
+        provider=generated["provider"],
+        cached=False,
+        coalesced=coalesced
+    )
+
+def _error_status(error: Exception) -> Tuple[int, str]:
+    """처리 오류를 HTTP 상태 코드/메시지로 변환 (재시도/fallback 후에도 429면 500 대신 429)"""
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429:
+        return 429, "LLM provider 요청 한도를 초과했습니다. 잠시 후 다시 시도하세요."
+    if isinstance(error, UnknownLocalModelError):
+        return 404, str(error)
+    return 500, str(error)
+
+def _sse_event(data: Dict[str, Any]) -> str:
+    """SSE 이벤트 문자열 생성"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_chat(request: ChatRequest, cached_response: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    통합 SSE 이벤트 스트림
+    
+    이벤트 형식:
+        {"type": "delta", "content": "..."}
+        {"type": "done", "model": ..., "provider": ..., "cached": bool}
+        {"type": "error", "detail": "..."}
+    """
+    if cached_response is not None:
+        usage_tracker.record(request.provider, request.model, _session_id(request), cached=True)
+        yield _sse_event({"type": "delta", "content": cached_response})
+        yield _sse_event({"type": "done", "model": request.model, "provider": request.provider, "cached": True})
+        return
+    
+    # 클라이언트로 전달하면서 토큰을 누적하여 스트림 종료 후 캐시/대화 기록 저장
+    chunks: List[str] = []
+    route_info = {"provider": request.provider, "model": request.model}
+    start = time.perf_counter()
+    try:
+        async for delta in llm_api.chat_completion_stream(
+            messages=request.messages,
+            model=request.model,
+            provider=request.provider,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            fallback=request.fallback,
+            route_info=route_info
+        ):
+            chunks.append(delta)
+            yield _sse_event({"type": "delta", "content": delta})
+    except Exception as e:
+        logger.error(f"스트리밍 채팅 처리 실패: {e}")
+        yield _sse_event({"type": "error", "detail": str(e)})
+        return
+    
+    usage_tracker.record(
+        route_info["provider"],
+        route_info["model"],
+        _session_id(request),
+        extract_usage(route_info["provider"], route_info),
+        latency_ms=(time.perf_counter() - start) * 1000
+    )
+    
+    try:
+        await _store_result(request, "".join(chunks), route_info["provider"], route_info["model"])
+    except Exception as e:
+        logger.error(f"스트리밍 응답 저장 실패: {e}")
+    
+    yield _sse_event({"type": "done", "model": route_info["model"], "provider": route_info["provider"], "cached": False})
+
+def _streaming_response(request: ChatRequest, cached_response: Optional[str] = None) -> StreamingResponse:
+    """SSE StreamingResponse 생성 (프록시 버퍼링 비활성화)"""
+    return StreamingResponse(
+        _stream_chat(request, cached_response),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============================================================================
 # API 엔드포인트
 # ============================================================================
@@ -62,79 +357,152 @@ async def agent_root():
 
 @agent_router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
-    """LLM API를 통한 채팅"""
+    """LLM API를 통한 채팅 (stream=true 이면 SSE로 토큰 단위 전달)"""
     try:
-        # 캐시 확인
-        if request.use_cache:
-            prompt_text = str(request.messages)
-            prompt_hash = hashlib.md5(prompt_text.encode()).hexdigest()
-            cached_response = sllm_db.get_cached_response(prompt_hash)
-            
-            if cached_response:
-                logger.info("캐시된 응답 사용")
-                return ChatResponse(
-                    response=cached_response,
-                    model=request.model,
-                    provider=request.provider,
-                    cached=True
-                )
-        
-        # LLM API 호출
-        result = await llm_api.chat_completion(
-            messages=request.messages,
-            model=request.model,
-            provider=request.provider,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens
-        )
-        
-        # 응답 추출
-        if request.provider == "openai":
-            response_text = result["choices"][0]["message"]["content"]
-        elif request.provider == "anthropic":
-            response_text = result["content"][0]["text"]
+        if request.stream:
+            # 스트림 시작 전에 확인해야 SSE 오류 이벤트 대신 404로 응답
+            await llm_api.check_model(request.provider, request.model)
+            cached = await _lookup_cache(request)
+            return _streaming_response(request, cached.response if cached else None)
+        return await _complete(request)
+    except Exception as e:
+        status_code, detail = _error_status(e)
+        logger.error(f"채팅 처리 실패: {e}")
+        raise HTTPException(status_code=status_code, detail=detail)
+
+@agent_router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest):
+    """
+    여러 메시지 리스트를 한 번에 처리
+    
+    provider 속도/동시 실행 제한 하에서 동시에 실행하고, 캐시 대상인 동일 항목은 한 번만 호출하며,
+    결과는 입력 순서대로 항목별 성공/실패와 함께 반환
+    """
+    if len(request.items) > AGENT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"배치 항목은 최대 {AGENT_BATCH_MAX_ITEMS}개까지 가능합니다.")
+    
+    start = time.perf_counter()
+    shared = request.model_dump(exclude={"items"})
+    item_requests = [ChatRequest(messages=messages, stream=False, **shared) for messages in request.items]
+    semaphore = asyncio.Semaphore(AGENT_BATCH_MAX_CONCURRENCY)
+    
+    async def run(item_request: ChatRequest) -> ChatResponse:
+        async with semaphore:
+            return await _complete(item_request)
+    
+    # 캐시 대상인 동일 항목은 하나의 작업을 공유 (캐시 비대상 항목은 각각 생성)
+    tasks: Dict[str, asyncio.Task] = {}
+    item_tasks: List[asyncio.Task] = []
+    deduplicated = 0
+    for index, item_request in enumerate(item_requests):
+        key = _cache_key(item_request) if _should_cache(item_request) else f"item:{index}"
+        if key in tasks:
+            deduplicated += 1
         else:
-            response_text = str(result)
-        
-        # 캐시 저장
-        if request.use_cache:
-            prompt_hash = hashlib.md5(str(request.messages).encode()).hexdigest()
-            sllm_db.cache_response(prompt_hash, response_text, request.model)
-        
-        # 대화 기록 저장
-        if request.messages:
-            last_message = request.messages[-1]
-            if last_message.get("role") == "user":
-                session_id = hashlib.md5(str(request.messages).encode()).hexdigest()[:16]
-                sllm_db.save_conversation(
-                    session_id=session_id,
-                    user_message=last_message["content"],
-                    model_response=response_text,
-                    model_name=request.model,
-                    metadata={"provider": request.provider}
-                )
-        
-        return ChatResponse(
-            response=response_text,
-            model=request.model,
-            provider=request.provider,
-            cached=False
-        )
+            tasks[key] = asyncio.create_task(run(item_request))
+        item_tasks.append(tasks[key])
+    
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    
+    results: List[BatchChatItem] = []
+    for index, task in enumerate(item_tasks):
+        error = task.exception()
+        if error is None:
+            results.append(BatchChatItem(index=index, success=True, result=task.result()))
+        else:
+            status_code, detail = _error_status(error)
+            logger.error(f"배치 항목 {index} 처리 실패: {error}")
+            results.append(BatchChatItem(index=index, success=False, status_code=status_code, error=detail))
     
+    succeeded = sum(1 for item in results if item.success)
+    return BatchChatResponse(
+        results=results,
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        deduplicated=deduplicated,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2)
+    )
+
+@agent_router.get("/cache/stats")
+async def cache_stats():
+    """응답 캐시 적중/미스/정리 및 요청 병합 통계"""
+    return {
+        "success": True,
+        "stats": response_cache.stats(),
+        "coalescing": single_flight.stats(),
+        "semantic": semantic_cache.stats()
+    }
+
+@agent_router.get("/cache/semantic/samples")
+async def semantic_cache_samples(pending_only: bool = False):
+    """오적중 검토용 시맨틱 캐시 적중 샘플 (최신순)"""
+    return {
+        "success": True,
+        "samples": semantic_cache.samples(pending_only=pending_only),
+        "stats": semantic_cache.stats()
+    }
+
+@agent_router.post("/cache/semantic/samples/{sample_id}/feedback")
+async def semantic_cache_feedback(sample_id: int, request: SemanticFeedbackRequest):
+    """샘플 검토 결과 기록 (오적중이면 해당 캐시 항목 삭제)"""
+    sample = semantic_cache.review_sample(sample_id, request.false_hit)
+    if sample is None:
+        raise HTTPException(status_code=404, detail="샘플을 찾을 수 없습니다.")
+    return {
+        "success": True,
+        "sample": sample,
+        "stats": semantic_cache.stats()
+    }
+
+@agent_router.get("/providers/stats")
+async def provider_stats():
+    """provider별 지연 시간/오류/재시도/fallback 지표"""
+    return {
+        "success": True,
+        "providers": llm_api.provider_stats()
+    }
+
+@agent_router.get("/usage")
+async def usage_live(top: int = Query(20, ge=1, le=200)):
+    """프로세스 시작 이후 토큰 사용량/비용 (모델별, 비용 상위 세션, 최근 분별)"""
+    return {
+        "success": True,
+        "usage": usage_tracker.live_stats(top=top)
+    }
+
+@agent_router.get("/usage/history")
+async def usage_history(
+    group_by: str = Query("model", pattern="^(model|session|minute)$"),
+    minutes: int = Query(1440, ge=1),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """SQLite에 반영된 기간별 토큰 사용량/비용 집계"""
+    try:
+        rows = await sllm_db.run(sllm_db.get_token_usage, group_by=group_by, minutes=minutes, limit=limit)
+        return {
+            "success": True,
+            "group_by": group_by,
+            "minutes": minutes,
+            "usage": rows
+        }
     except Exception as e:
-        logger.error(f"채팅 처리 실패: {e}")
+        logger.error(f"사용량 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @agent_router.post("/models/register")
 async def register_model(request: ModelRegisterRequest):
     """SLLM 모델 등록"""
     try:
-        model_id = sllm_db.register_model(
+        model_id = await sllm_db.run(
+            sllm_db.register_model,
             name=request.name,
             model_type=request.model_type,
             model_path=request.model_path,
             config=request.config
         )
+        # 경로/설정이 바뀌었을 수 있으므로 상주 중인 모델은 해제 (다음 요청 시 다시 로드)
+        await local_backend.unload(request.name)
         return {
             "success": True,
             "model_id": model_id,
@@ -148,7 +516,10 @@ async def register_model(request: ModelRegisterRequest):
 async def list_models():
     """등록된 모델 목록 조회"""
     try:
-        models = sllm_db.list_models()
+        models = await sllm_db.run(sllm_db.list_models)
+        resident = set(local_backend.resident_models())
+        for model in models:
+            model["loaded"] = model["name"] in resident
         return {
             "success": True,
             "models": models,
@@ -162,7 +533,7 @@ async def list_models():
 async def get_model(model_name: str):
     """특정 모델 정보 조회"""
     try:
-        model = sllm_db.get_model(model_name)
+        model = await sllm_db.run(sllm_db.get_model, model_name)
         if not model:
             raise HTTPException(status_code=404, detail=f"모델 '{model_name}'을 찾을 수 없습니다.")
         return {
@@ -175,17 +546,54 @@ async def get_model(model_name: str):
         logger.error(f"모델 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@agent_router.post("/models/{model_name}/unload")
+async def unload_model(model_name: str):
+    """메모리에 상주 중인 로컬 모델 해제"""
+    unloaded = await local_backend.unload(model_name)
+    return {
+        "success": True,
+        "unloaded": unloaded,
+        "message": f"모델 '{model_name}'이 해제되었습니다." if unloaded else f"모델 '{model_name}'은 로드되어 있지 않습니다."
+    }
+
 @agent_router.get("/conversations")
-async def get_conversations(session_id: Optional[str] = None, limit: int = 100):
-    """대화 기록 조회"""
+async def get_conversations(
+    session_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[int] = None
+):
+    """
+    대화 기록 조회 (최신순, 커서 기반 페이지네이션)
+    
+    다음 페이지는 응답의 next_cursor를 cursor로 전달하여 조회
+    """
     try:
-        conversations = sllm_db.get_conversations(session_id=session_id, limit=limit)
+        conversations = await sllm_db.run(
+            sllm_db.get_conversations,
+            session_id=session_id,
+            limit=limit,
+            before_id=cursor
+        )
         return {
             "success": True,
             "conversations": conversations,
-            "count": len(conversations)
+            "count": len(conversations),
+            "next_cursor": conversations[-1]["id"] if len(conversations) == limit else None
         }
     except Exception as e:
         logger.error(f"대화 기록 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@agent_router.post("/conversations/archive")
+async def archive_conversations(older_than_days: int = Query(CONVERSATION_RETENTION_DAYS or 90, ge=1)):
+    """보관 기간이 지난 대화 기록을 월별 압축 파일로 즉시 아카이브"""
+    try:
+        archived = await sllm_db.run(sllm_db.archive_conversations, older_than_days=older_than_days)
+        return {
+            "success": True,
+            "archived": archived,
+            "count": sum(archived.values())
+        }
+    except Exception as e:
+        logger.error(f"대화 기록 아카이브 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
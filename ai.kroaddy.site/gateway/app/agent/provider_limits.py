@@ -0,0 +1,128 @@
+"""
+Provider 호출 제어 모듈
+provider별 토큰 버킷 속도 제한, 동시 실행 제한, 지연 시간/오류 지표 관리
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+class TokenBucket:
+    """비동기 토큰 버킷 (토큰이 없으면 실패 대신 대기)"""
+    
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: 초당 보충되는 토큰 수 (0 이하이면 제한 없음)
+            burst: 버킷 최대 크기
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """토큰 1개 획득 (부족하면 보충될 때까지 대기)"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class ProviderLimiter:
+    """토큰 버킷 + 동시 실행 세마포어 (async with로 사용)"""
+    
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        """
+        Args:
+            rate: 초당 요청 수 (0 이하이면 제한 없음)
+            burst: 버킷 최대 크기
+            max_concurrency: 최대 동시 호출 수 (0 이하이면 제한 없음)
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+    
+    async def __aenter__(self):
+        await self.bucket.acquire()
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+        return False
+
+class ProviderMetrics:
+    """provider별 지연 시간 및 오류 지표"""
+    
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: 백분위 계산에 사용할 최근 지연 시간 샘플 수
+        """
+        self._latencies = deque(maxlen=window)
+        self._counters = {
+            "requests": 0,
+            "successes": 0,
+            "errors": 0,
+            "retries": 0,
+            "fallbacks": 0
+        }
+        self._status_codes: Dict[str, int] = {}
+    
+    def record_success(self, latency: float):
+        """성공한 호출 기록"""
+        self._counters["requests"] += 1
+        self._counters["successes"] += 1
+        self._latencies.append(latency)
+    
+    def record_error(self, latency: float, status_code: Optional[int] = None):
+        """실패한 호출 기록"""
+        self._counters["requests"] += 1
+        self._counters["errors"] += 1
+        self._latencies.append(latency)
+        key = str(status_code) if status_code is not None else "transport"
+        self._status_codes[key] = self._status_codes.get(key, 0) + 1
+    
+    def record_retry(self):
+        """재시도 기록"""
+        self._counters["retries"] += 1
+    
+    def record_fallback(self):
+        """다른 provider로 전환된 요청 기록"""
+        self._counters["fallbacks"] += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 지표 요약"""
+        latencies = sorted(self._latencies)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(len(latencies) * p))
+            return round(latencies[index] * 1000, 2)
+        
+        requests = self._counters["requests"]
+        return {
+            **self._counters,
+            "error_rate": round(self._counters["errors"] / requests, 4) if requests else 0.0,
+            "errors_by_status": dict(self._status_codes),
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99)
+            }
+        }
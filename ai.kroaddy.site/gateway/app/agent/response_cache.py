@@ -0,0 +1,145 @@
+"""
+응답 캐시 모듈
+프로세스 내 LRU 캐시를 SQLite(model_cache) 앞단에 두고 TTL/최대 크기 기반으로 정리
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from .sllm_db import SLLMDB
+
+logger = logging.getLogger(__name__)
+
+# 캐시 설정
+CACHE_TTL_SECONDS = int(os.getenv("AGENT_CACHE_TTL_SECONDS", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("AGENT_CACHE_MAX_ENTRIES", "10000"))
+CACHE_LRU_SIZE = int(os.getenv("AGENT_CACHE_LRU_SIZE", "1024"))
+CACHE_EVICT_EVERY = int(os.getenv("AGENT_CACHE_EVICT_EVERY", "100"))
+
+def make_cache_key(
+    messages: List[Dict[str, str]],
+    model: Optional[str],
+    provider: Optional[str],
+    temperature: Optional[float],
+    max_tokens: Optional[int]
+) -> str:
+    """
+    생성 파라미터 전체를 정렬된 JSON으로 직렬화한 정규화 캐시 키
+    
+    모델/provider/temperature/max_tokens가 다르면 서로 다른 키가 생성됨
+    """
+    canonical = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """LRU(메모리) + SQLite 2단계 응답 캐시"""
+    
+    def __init__(
+        self,
+        db: SLLMDB,
+        ttl_seconds: int = CACHE_TTL_SECONDS,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        lru_size: int = CACHE_LRU_SIZE,
+        evict_every: int = CACHE_EVICT_EVERY
+    ):
+        """
+        Args:
+            db: 영구 저장소로 사용할 SLLMDB
+            ttl_seconds: 캐시 유효 시간 (초)
+            max_entries: SQLite에 유지할 최대 캐시 수
+            lru_size: 메모리 LRU 최대 크기
+            evict_every: 몇 번의 저장마다 SQLite 정리를 수행할지
+        """
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.evict_every = evict_every
+        # key -> (response, 저장 시각)
+        self._lru: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._writes_since_evict = 0
+        self._stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "lru_evictions": 0,
+            "db_evictions": 0
+        }
+    
+    async def get(self, key: str) -> Optional[str]:
+        """캐시 조회 (LRU -> SQLite 순, SQLite 조회는 스레드 풀에서 실행)"""
+        entry = self._lru.get(key)
+        if entry is not None:
+            response, stored_at = entry
+            if time.time() - stored_at < self.ttl_seconds:
+                self._lru.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return response
+            del self._lru[key]
+        
+        db_entry = await self.db.run(self.db.get_cached_entry, key, ttl_seconds=self.ttl_seconds)
+        if db_entry is not None:
+            response, stored_at = db_entry
+            self._stats["db_hits"] += 1
+            self._remember(key, response, stored_at)
+            return response
+        
+        self._stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, response: str, model_name: Optional[str] = None):
+        """캐시 저장 (LRU 기록 후 SQLite는 배치 writer에 적재, 주기적으로 SQLite 정리)"""
+        self._remember(key, response)
+        self.db.cache_response(key, response, model_name)
+        self._stats["writes"] += 1
+        
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= self.evict_every:
+            await self.evict()
+    
+    async def evict(self) -> int:
+        """만료/초과된 SQLite 캐시 삭제"""
+        self._writes_since_evict = 0
+        removed = await self.db.run(self.db.evict_cache, self.ttl_seconds, self.max_entries)
+        self._stats["db_evictions"] += removed
+        if removed:
+            logger.info(f"캐시 정리: {removed}건 삭제")
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스/정리 통계"""
+        hits = self._stats["memory_hits"] + self._stats["db_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "lru_size": len(self._lru),
+            "lru_max_size": self.lru_size,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries
+        }
+    
+    def _remember(self, key: str, response: str, stored_at: Optional[float] = None):
+        """LRU에 기록하고 크기를 초과하면 가장 오래된 항목 제거"""
+        self._lru[key] = (response, stored_at if stored_at is not None else time.time())
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+            self._stats["lru_evictions"] += 1
@@ -0,0 +1,461 @@
+"""
+시맨틱 캐시 모듈
+마지막 사용자 메시지의 임베딩 유사도로 표현만 다른 질문에도 캐시된 응답을 반환
+
+- 인덱스: 범위(provider/model/이전 대화)별 NumPy 정규화 벡터 행렬 (내적 = 코사인 유사도, 전수 탐색)
+- 저장: sllm.db와 같은 디렉토리의 semantic_cache.npz (주기적/종료 시 원자적 저장)
+- 정리: TTL 만료 + 최대 개수 초과 시 가장 오래 사용하지 않은 항목 제거
+- 검증: 적중 일부를 샘플로 남기고, 오적중 피드백 시 해당 항목 삭제
+
+임베딩 백엔드:
+    - openai (기본): LLMAPI의 공유 커넥션 풀 사용
+    - sentence-transformers (선택 설치): pip install sentence-transformers
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from .llm_api import LLMAPI
+
+logger = logging.getLogger(__name__)
+
+# 시맨틱 캐시 설정 (기본 비활성화, 요청별 semantic_cache로 켜고 끌 수 있음)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+SEMANTIC_CACHE_EMBEDDER = os.getenv("SEMANTIC_CACHE_EMBEDDER", "openai")
+SEMANTIC_CACHE_EMBEDDING_MODEL = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+SEMANTIC_CACHE_SAMPLE_RATE = float(os.getenv("SEMANTIC_CACHE_SAMPLE_RATE", "0.1"))
+SEMANTIC_CACHE_MAX_SAMPLES = int(os.getenv("SEMANTIC_CACHE_MAX_SAMPLES", "200"))
+SEMANTIC_CACHE_SAVE_INTERVAL = float(os.getenv("SEMANTIC_CACHE_SAVE_INTERVAL", "60"))
+
+# 임계값 바로 아래(미적중) 유사도 구간 - 임계값 조정 참고용
+_NEAR_MISS_MARGIN = 0.05
+# 조회 시 계산한 임베딩을 저장 시 재사용하기 위한 LRU 크기
+_EMBEDDING_LRU_SIZE = 256
+
+def make_scope(
+    messages: List[Dict[str, str]],
+    model: Optional[str],
+    provider: Optional[str],
+    max_tokens: Optional[int]
+) -> str:
+    """
+    시맨틱 캐시 범위 키
+    
+    provider/model이 같고 마지막 사용자 메시지 이전의 대화(system 프롬프트 포함)가 같은 요청끼리만 비교
+    """
+    context = json.dumps(
+        {"messages": messages[:-1], "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return f"{provider}:{model}:{hashlib.sha256(context.encode('utf-8')).hexdigest()[:16]}"
+
+@dataclass
+class SemanticMatch:
+    """시맨틱 캐시 적중 결과"""
+    entry_id: int
+    response: str
+    similarity: float
+    matched_query: str
+
+class _ScopeIndex:
+    """범위 하나의 벡터 행렬과 항목 메타데이터 (용량을 두 배씩 늘리는 버퍼)"""
+    
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((16, dim), dtype=np.float32)
+        self.ids: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def add(self, entry_id: int, vector: np.ndarray):
+        if len(self.ids) == self.vectors.shape[0]:
+            grown = np.zeros((self.vectors.shape[0] * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:len(self.ids)] = self.vectors[:len(self.ids)]
+            self.vectors = grown
+        self.vectors[len(self.ids)] = vector
+        self.ids.append(entry_id)
+    
+    def remove(self, entry_id: int):
+        """마지막 행을 삭제 위치로 옮겨 O(dim)으로 제거"""
+        row = self.ids.index(entry_id)
+        last = len(self.ids) - 1
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.ids[row] = self.ids[last]
+        self.ids.pop()
+    
+    def search(self, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        """가장 유사한 항목 ID와 코사인 유사도"""
+        if not self.ids:
+            return None, 0.0
+        scores = self.vectors[:len(self.ids)] @ vector
+        row = int(np.argmax(scores))
+        return self.ids[row], float(scores[row])
+
+class SemanticCache:
+    """임베딩 유사도 기반 응답 캐시"""
+    
+    def __init__(
+        self,
+        llm_api: LLMAPI,
+        path: str,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS,
+        embedder: str = SEMANTIC_CACHE_EMBEDDER,
+        embedding_model: str = SEMANTIC_CACHE_EMBEDDING_MODEL,
+        sample_rate: float = SEMANTIC_CACHE_SAMPLE_RATE,
+        max_samples: int = SEMANTIC_CACHE_MAX_SAMPLES
+    ):
+        """
+        Args:
+            llm_api: openai 임베딩 호출에 사용할 LLMAPI
+            path: 인덱스 저장 파일 경로 (.npz)
+            threshold: 적중으로 판단할 최소 코사인 유사도
+            max_entries: 전체 범위에 걸쳐 유지할 최대 항목 수
+            ttl_seconds: 항목 유효 시간 (초)
+            embedder: "openai" 또는 "sentence-transformers"
+            embedding_model: 임베딩 모델 이름
+            sample_rate: 적중 중 오적중 검토용으로 남길 비율 (0~1)
+            max_samples: 보관할 최대 샘플 수
+        """
+        self.llm_api = llm_api
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder
+        self.embedding_model = embedding_model
+        self.sample_rate = sample_rate
+        
+        self._scopes: Dict[str, _ScopeIndex] = {}
+        # entry_id -> {"scope", "query", "response", "created_at"} (가장 오래 사용하지 않은 순)
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 1
+        self._dim: Optional[int] = None
+        self._embedding_lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._local_model = None
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        
+        self._samples: deque = deque(maxlen=max_samples)
+        self._next_sample_id = 1
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "near_misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expired": 0,
+            "embedding_errors": 0,
+            "reviewed_samples": 0,
+            "false_hits": 0
+        }
+    
+    # ------------------------------------------------------------------
+    # 수명 주기
+    # ------------------------------------------------------------------
+    
+    async def start(self):
+        """저장된 인덱스 로드 및 주기 저장 태스크 시작 (앱 시작 시 호출)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.load)
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._save_loop())
+    
+    async def stop(self):
+        """주기 저장 태스크 종료 후 변경분 저장 (앱 종료 시 호출)"""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            try:
+                await self._save_task
+            except asyncio.CancelledError:
+                pass
+            self._save_task = None
+        if self._dirty:
+            await self._save_async()
+    
+    async def _save_loop(self):
+        """변경분이 있을 때만 SEMANTIC_CACHE_SAVE_INTERVAL초마다 저장"""
+        while True:
+            await asyncio.sleep(SEMANTIC_CACHE_SAVE_INTERVAL)
+            if self._dirty:
+                try:
+                    await self._save_async()
+                except Exception as e:
+                    logger.error(f"시맨틱 캐시 저장 실패: {e}")
+    
+    async def _save_async(self):
+        """이벤트 루프에서 스냅샷을 만든 뒤 파일 쓰기만 스레드 풀에서 실행"""
+        vectors, meta = self._snapshot()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, vectors, meta)
+    
+    def save(self):
+        """인덱스를 .npz로 저장"""
+        self._write(*self._snapshot())
+    
+    def _snapshot(self) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """현재 항목의 벡터 행렬과 메타데이터 복사본"""
+        self._dirty = False
+        positions = {
+            entry_id: (scope_index, row)
+            for scope_index in self._scopes.values()
+            for row, entry_id in enumerate(scope_index.ids)
+        }
+        # LRU 순서대로 저장하여 로드 후에도 정리 순서 유지
+        entry_ids = list(self._entries.keys())
+        vectors = np.zeros((len(entry_ids), self._dim or 0), dtype=np.float32)
+        for row, entry_id in enumerate(entry_ids):
+            scope_index, scope_row = positions[entry_id]
+            vectors[row] = scope_index.vectors[scope_row]
+        meta = {
+            "embedder": self.embedder,
+            "embedding_model": self.embedding_model,
+            "entries": [dict(self._entries[entry_id]) for entry_id in entry_ids]
+        }
+        return vectors, meta
+    
+    def _write(self, vectors: np.ndarray, meta: Dict[str, Any]):
+        """임시 파일에 쓴 뒤 교체하여 저장 중 중단되어도 기존 파일 유지"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, vectors=vectors, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+        os.replace(tmp_path, self.path)
+        logger.info(f"시맨틱 캐시 저장: {len(meta['entries'])}건 ({self.path})")
+    
+    def load(self):
+        """저장된 인덱스 로드 (임베딩 설정이 바뀌었으면 무시)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                meta = json.loads(str(data["meta"]))
+        except Exception as e:
+            logger.error(f"시맨틱 캐시 로드 실패: {e}")
+            return
+        
+        if meta.get("embedder") != self.embedder or meta.get("embedding_model") != self.embedding_model:
+            logger.info("임베딩 설정이 변경되어 저장된 시맨틱 캐시를 사용하지 않습니다.")
+            return
+        
+        now = time.time()
+        for vector, entry in zip(vectors, meta["entries"]):
+            if now - entry["created_at"] < self.ttl_seconds:
+                self._insert(entry["scope"], entry["query"], entry["response"], vector, entry["created_at"])
+        self._dirty = False
+        logger.info(f"시맨틱 캐시 로드: {len(self._entries)}건")
+    
+    # ------------------------------------------------------------------
+    # 임베딩
+    # ------------------------------------------------------------------
+    
+    async def _embed(self, text: str) -> np.ndarray:
+        """정규화된 임베딩 (최근 조회한 텍스트는 재사용)"""
+        cached = self._embedding_lru.get(text)
+        if cached is not None:
+            self._embedding_lru.move_to_end(text)
+            return cached
+        
+        if self.embedder == "openai":
+            vector = np.asarray((await self.llm_api.embeddings([text], self.embedding_model))[0], dtype=np.float32)
+        elif self.embedder == "sentence-transformers":
+            loop = asyncio.get_running_loop()
+            vector = await loop.run_in_executor(None, self._local_embed, text)
+        else:
+            raise ValueError(f"지원하지 않는 임베딩 백엔드: {self.embedder}")
+        
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        
+        self._embedding_lru[text] = vector
+        while len(self._embedding_lru) > _EMBEDDING_LRU_SIZE:
+            self._embedding_lru.popitem(last=False)
+        return vector
+    
+    def _local_embed(self, text: str) -> np.ndarray:
+        """sentence-transformers 임베딩 (스레드 풀에서 실행, 첫 호출 시 모델 로드)"""
+        if self._local_model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError("sentence-transformers가 설치되지 않았습니다. (pip install sentence-transformers)") from e
+            self._local_model = SentenceTransformer(self.embedding_model)
+        return np.asarray(self._local_model.encode(text), dtype=np.float32)
+    
+    # ------------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------------
+    
+    async def lookup(self, scope: str, query: str) -> Optional[SemanticMatch]:
+        """
+        범위 내에서 가장 유사한 질문의 응답 조회
+        
+        Returns:
+            유사도가 임계값 이상이면 SemanticMatch, 아니면 None (임베딩 실패 시에도 None)
+        """
+        self._stats["lookups"] += 1
+        scope_index = self._scopes.get(scope)
+        if scope_index is None:
+            self._stats["misses"] += 1
+            return None
+        
+        try:
+            vector = await self._embed(query)
+        except Exception as e:
+            self._stats["embedding_errors"] += 1
+            logger.warning(f"시맨틱 캐시 임베딩 실패: {e}")
+            return None
+        
+        while True:
+            entry_id, similarity = scope_index.search(vector)
+            if entry_id is None or similarity < self.threshold:
+                self._stats["misses"] += 1
+                if entry_id is not None and similarity >= self.threshold - _NEAR_MISS_MARGIN:
+                    self._stats["near_misses"] += 1
+                return None
+            entry = self._entries[entry_id]
+            if time.time() - entry["created_at"] < self.ttl_seconds:
+                break
+            self._remove(entry_id)
+            self._stats["expired"] += 1
+        
+        self._entries.move_to_end(entry_id)
+        self._stats["hits"] += 1
+        match = SemanticMatch(entry_id, entry["response"], round(similarity, 4), entry["query"])
+        if random.random() < self.sample_rate:
+            self._record_sample(scope, query, match)
+        return match
+    
+    async def add(self, scope: str, query: str, response: str):
+        """응답 저장 (최대 개수를 넘으면 가장 오래 사용하지 않은 항목 제거)"""
+        try:
+            vector = await self._embed(query)
+        except Exception as e:
+            self._stats["embedding_errors"] += 1
+            logger.warning(f"시맨틱 캐시 임베딩 실패: {e}")
+            return
+        
+        self._insert(scope, query, response, vector, time.time())
+        self._stats["writes"] += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+    
+    def _insert(self, scope: str, query: str, response: str, vector: np.ndarray, created_at: float):
+        """인덱스와 메타데이터에 항목 추가"""
+        if self._dim is None:
+            self._dim = int(vector.shape[0])
+        elif vector.shape[0] != self._dim:
+            raise ValueError(f"임베딩 차원 불일치: {vector.shape[0]} != {self._dim}")
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        scope_index = self._scopes.get(scope)
+        if scope_index is None:
+            scope_index = self._scopes[scope] = _ScopeIndex(self._dim)
+        scope_index.add(entry_id, vector)
+        self._entries[entry_id] = {
+            "scope": scope,
+            "query": query,
+            "response": response,
+            "created_at": created_at
+        }
+        self._dirty = True
+    
+    def _remove(self, entry_id: int) -> bool:
+        """항목 삭제 (범위가 비면 범위도 제거)"""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return False
+        scope_index = self._scopes[entry["scope"]]
+        scope_index.remove(entry_id)
+        if not len(scope_index):
+            del self._scopes[entry["scope"]]
+        self._dirty = True
+        return True
+    
+    # ------------------------------------------------------------------
+    # 오적중 샘플링 / 통계
+    # ------------------------------------------------------------------
+    
+    def _record_sample(self, scope: str, query: str, match: SemanticMatch):
+        """검토용 적중 샘플 기록"""
+        self._samples.append({
+            "sample_id": self._next_sample_id,
+            "entry_id": match.entry_id,
+            "scope": scope,
+            "query": query,
+            "matched_query": match.matched_query,
+            "similarity": match.similarity,
+            "response": match.response,
+            "created_at": time.time(),
+            "verdict": None
+        })
+        self._next_sample_id += 1
+    
+    def samples(self, pending_only: bool = False) -> List[Dict[str, Any]]:
+        """보관 중인 적중 샘플 (최신순)"""
+        return [s for s in reversed(self._samples) if not pending_only or s["verdict"] is None]
+    
+    def review_sample(self, sample_id: int, false_hit: bool) -> Optional[Dict[str, Any]]:
+        """
+        샘플 검토 결과 기록
+        
+        오적중이면 해당 캐시 항목을 삭제하여 같은 답이 다시 반환되지 않도록 함
+        
+        Returns:
+            갱신된 샘플 (없는 샘플이면 None)
+        """
+        sample = next((s for s in self._samples if s["sample_id"] == sample_id), None)
+        if sample is None:
+            return None
+        if sample["verdict"] is None:
+            self._stats["reviewed_samples"] += 1
+            if false_hit:
+                self._stats["false_hits"] += 1
+        elif sample["verdict"] == "false_hit" and not false_hit:
+            self._stats["false_hits"] -= 1
+        elif sample["verdict"] == "correct" and false_hit:
+            self._stats["false_hits"] += 1
+        sample["verdict"] = "false_hit" if false_hit else "correct"
+        if false_hit:
+            sample["entry_removed"] = self._remove(sample["entry_id"])
+        return sample
+    
+    def stats(self) -> Dict[str, Any]:
+        """적중률, 검토된 샘플 기준 오적중률 및 인덱스 크기"""
+        lookups = self._stats["lookups"]
+        reviewed = self._stats["reviewed_samples"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "false_hit_rate": round(self._stats["false_hits"] / reviewed, 4) if reviewed else None,
+            "entries": len(self._entries),
+            "scopes": len(self._scopes),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "embedder": self.embedder,
+            "embedding_model": self.embedding_model,
+            "pending_samples": sum(1 for s in self._samples if s["verdict"] is None)
+        }
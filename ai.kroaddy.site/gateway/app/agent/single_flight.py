@@ -0,0 +1,64 @@
+"""
+Single-flight 요청 병합 모듈
+동일한 키로 동시에 들어온 요청은 하나의 provider 호출 결과를 공유
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """진행 중인 호출을 키별로 공유하는 병합기"""
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0
+        }
+    
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        키에 대한 호출 실행 (이미 진행 중이면 그 결과를 기다림)
+        
+        호출은 별도 Task로 실행되므로 최초 요청자가 연결을 끊어도
+        대기 중인 다른 요청은 결과를 받음
+        
+        Args:
+            key: 정규화된 요청 키
+            func: 실제 호출을 수행하는 코루틴 함수
+        
+        Returns:
+            (결과, 병합 여부)
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+            logger.debug(f"진행 중인 요청에 병합: {key[:12]}")
+            return await asyncio.shield(task), True
+        
+        task = asyncio.create_task(func())
+        self._inflight[key] = task
+        self._stats["leaders"] += 1
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return await asyncio.shield(task), False
+    
+    def _on_done(self, key: str, task: asyncio.Task):
+        """완료된 호출 정리"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 모든 대기자가 취소된 경우에도 예외 미확인 경고가 남지 않도록 확인
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> Dict[str, Any]:
+        """병합 통계"""
+        total = self._stats["leaders"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "in_flight": len(self._inflight),
+            "coalesce_rate": round(self._stats["coalesced"] / total, 4) if total else 0.0
+        }
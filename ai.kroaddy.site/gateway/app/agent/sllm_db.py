@@ -5,15 +5,45 @@ SLLM (Small Language Model) 로컬 DB 모듈
 import os
 import sqlite3
 import json
-from typing import Optional, Dict, Any, List
+import gzip
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, Any, List, Tuple, Callable, TypeVar
 import logging
 from datetime import datetime
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# SQLite 튜닝 설정
+SLLM_DB_SYNCHRONOUS = os.getenv("SLLM_DB_SYNCHRONOUS", "NORMAL")
+SLLM_DB_MMAP_SIZE = int(os.getenv("SLLM_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+SLLM_DB_BUSY_TIMEOUT_MS = int(os.getenv("SLLM_DB_BUSY_TIMEOUT_MS", "5000"))
+SLLM_DB_READ_WORKERS = int(os.getenv("SLLM_DB_READ_WORKERS", "4"))
+
+# 백그라운드 배치 쓰기 설정
+SLLM_DB_WRITE_BATCH_SIZE = int(os.getenv("SLLM_DB_WRITE_BATCH_SIZE", "200"))
+SLLM_DB_WRITE_FLUSH_INTERVAL = float(os.getenv("SLLM_DB_WRITE_FLUSH_INTERVAL", "0.05"))
+
+# 대화 기록 보관 설정 (보관 기간이 0이면 아카이브 작업 비활성화)
+CONVERSATION_RETENTION_DAYS = int(os.getenv("CONVERSATION_RETENTION_DAYS", "90"))
+CONVERSATION_ARCHIVE_DIR = os.getenv("CONVERSATION_ARCHIVE_DIR", "./agent/archive")
+CONVERSATION_ARCHIVE_INTERVAL_HOURS = float(os.getenv("CONVERSATION_ARCHIVE_INTERVAL_HOURS", "24"))
+CONVERSATION_ARCHIVE_BATCH_SIZE = int(os.getenv("CONVERSATION_ARCHIVE_BATCH_SIZE", "5000"))
+
 class SLLMDB:
-    """SLLM 로컬 데이터베이스 관리"""
+    """
+    SLLM 로컬 데이터베이스 관리
+    
+    - 쓰기 전용 커넥션 1개 + 읽기 스레드별 커넥션을 재사용 (WAL 모드)
+    - start() 이후 save_conversation/cache_response는 큐에 적재되고
+      백그라운드 writer가 모아서 하나의 트랜잭션으로 기록
+    - 비동기 핸들러에서는 run()으로 동기 메서드를 스레드 풀에서 실행
+    """
     
     def __init__(self, db_path: str = "./agent/sllm.db"):
         """
@@ -24,6 +54,23 @@ class SLLMDB:
         """
         self.db_path = db_path
         self._ensure_db_directory()
+        
+        self._write_lock = threading.Lock()
+        self._write_conn = self._connect()
+        self._local = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=SLLM_DB_READ_WORKERS,
+            thread_name_prefix="sllm-db"
+        )
+        
+        # 백그라운드 writer 상태 (start() 호출 시 활성화)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._archive_task: Optional[asyncio.Task] = None
+        
         self._init_database()
     
     def _ensure_db_directory(self):
@@ -32,52 +79,215 @@ class SLLMDB:
         if db_dir:
             Path(db_dir).mkdir(parents=True, exist_ok=True)
     
+    def _connect(self) -> sqlite3.Connection:
+        """WAL 모드 및 튜닝 PRAGMA가 적용된 커넥션 생성"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=SLLM_DB_BUSY_TIMEOUT_MS / 1000
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={SLLM_DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA mmap_size={SLLM_DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={SLLM_DB_BUSY_TIMEOUT_MS}")
+        return conn
+    
+    def _read_conn(self) -> sqlite3.Connection:
+        """현재 스레드 전용 읽기 커넥션 (스레드별로 한 번만 생성)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+    
     def _init_database(self):
         """데이터베이스 초기화"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 모델 정보 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS models (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                model_type TEXT NOT NULL,
-                model_path TEXT NOT NULL,
-                config TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 대화 기록 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                user_message TEXT NOT NULL,
-                model_response TEXT NOT NULL,
-                model_name TEXT,
-                metadata TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 모델 캐시 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS model_cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                prompt_hash TEXT UNIQUE NOT NULL,
-                response TEXT NOT NULL,
-                model_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            conn = self._write_conn
+            cursor = conn.cursor()
+            
+            # 모델 정보 테이블
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS models (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    model_type TEXT NOT NULL,
+                    model_path TEXT NOT NULL,
+                    config TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 대화 기록 테이블
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    user_message TEXT NOT NULL,
+                    model_response TEXT NOT NULL,
+                    model_name TEXT,
+                    metadata TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 모델 캐시 테이블
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS model_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    prompt_hash TEXT UNIQUE NOT NULL,
+                    response TEXT NOT NULL,
+                    model_name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 캐시 TTL/최대 크기 정리용 인덱스
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_model_cache_created_at
+                ON model_cache (created_at)
+            """)
+            
+            # 대화 기록 세션별 커서 조회 / 보관 기간 정리용 인덱스
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_conversations_session_id
+                ON conversations (session_id, id)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_conversations_created_at
+                ON conversations (created_at)
+            """)
+            
+            # 토큰 사용량 테이블 (분 단위 집계)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS token_usage (
+                    minute TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    cached_responses INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    cached_tokens INTEGER NOT NULL DEFAULT 0,
+                    cost_usd REAL NOT NULL DEFAULT 0,
+                    latency_ms REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (minute, provider, model, session_id)
+                )
+            """)
+            
+            conn.commit()
         logger.info(f"SLLM DB 초기화 완료: {self.db_path}")
     
+    # ========================================================================
+    # 비동기 실행 / 백그라운드 writer
+    # ========================================================================
+    
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """동기 DB 메서드를 전용 스레드 풀에서 실행 (이벤트 루프 블로킹 방지)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def start(self):
+        """백그라운드 배치 writer 시작 (앱 시작 시 호출)"""
+        if self._writer_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info("SLLM DB 백그라운드 writer 시작")
+        
+        if CONVERSATION_RETENTION_DAYS > 0:
+            self._archive_task = asyncio.create_task(self._archive_loop())
+            logger.info(f"대화 기록 아카이브 작업 시작 (보관 기간: {CONVERSATION_RETENTION_DAYS}일)")
+    
+    async def stop(self):
+        """대기 중인 쓰기를 모두 반영하고 writer 및 커넥션 종료 (앱 종료 시 호출)"""
+        if self._archive_task is not None:
+            self._archive_task.cancel()
+            try:
+                await self._archive_task
+            except asyncio.CancelledError:
+                pass
+            self._archive_task = None
+        
+        if self._writer_task is not None:
+            self._write_queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+            self._write_queue = None
+            self._loop = None
+            logger.info("SLLM DB 백그라운드 writer 종료")
+        
+        self._executor.shutdown(wait=True)
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
+        with self._write_lock:
+            self._write_conn.close()
+    
+    def _submit_write(self, sql: str, params: Tuple[Any, ...]):
+        """
+        쓰기 요청 등록
+        
+        writer가 실행 중이면 큐에 넣고 즉시 반환 (어느 스레드에서 호출해도 안전),
+        그렇지 않으면 바로 기록
+        """
+        if self._writer_task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._write_queue.put_nowait, (sql, params))
+            return
+        self._execute_batch([(sql, params)])
+    
+    async def _writer_loop(self):
+        """큐에 쌓인 쓰기를 모아 하나의 트랜잭션으로 기록"""
+        stopping = False
+        while not stopping:
+            item = await self._write_queue.get()
+            if item is None:
+                break
+            
+            # 짧게 대기하여 동시에 들어오는 쓰기를 한 배치로 묶음
+            if SLLM_DB_WRITE_FLUSH_INTERVAL > 0:
+                await asyncio.sleep(SLLM_DB_WRITE_FLUSH_INTERVAL)
+            
+            batch = [item]
+            while len(batch) < SLLM_DB_WRITE_BATCH_SIZE:
+                try:
+                    item = self._write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            try:
+                await self.run(self._execute_batch, batch)
+            except Exception as e:
+                logger.error(f"배치 쓰기 실패 ({len(batch)}건): {e}")
+    
+    def _execute_batch(self, batch: List[Tuple[str, Tuple[Any, ...]]]):
+        """쓰기 배치를 하나의 트랜잭션으로 실행"""
+        with self._write_lock:
+            conn = self._write_conn
+            try:
+                for sql, params in batch:
+                    conn.execute(sql, params)
+                conn.commit()
+                logger.debug(f"배치 쓰기 완료: {len(batch)}건")
+            except Exception:
+                conn.rollback()
+                raise
+    
+    # ========================================================================
+    # 모델 관리
+    # ========================================================================
+    
     def register_model(
         self,
         name: str,
@@ -97,40 +307,37 @@ class SLLMDB:
         Returns:
             모델 ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO models (name, model_type, model_path, config, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                name,
-                model_type,
-                model_path,
-                json.dumps(config) if config else None,
-                datetime.now().isoformat()
-            ))
+        with self._write_lock:
+            conn = self._write_conn
+            cursor = conn.cursor()
             
-            model_id = cursor.lastrowid
-            conn.commit()
-            logger.info(f"모델 등록 완료: {name} (ID: {model_id})")
-            return model_id
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"모델 등록 실패: {e}")
-            raise
-        finally:
-            conn.close()
+            try:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO models (name, model_type, model_path, config, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    name,
+                    model_type,
+                    model_path,
+                    json.dumps(config) if config else None,
+                    datetime.now().isoformat()
+                ))
+                
+                model_id = cursor.lastrowid
+                conn.commit()
+                logger.info(f"모델 등록 완료: {name} (ID: {model_id})")
+                return model_id
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"모델 등록 실패: {e}")
+                raise
     
     def get_model(self, name: str) -> Optional[Dict[str, Any]]:
         """모델 정보 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._read_conn().cursor()
         
         cursor.execute("SELECT * FROM models WHERE name = ?", (name,))
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return {
@@ -146,12 +353,10 @@ class SLLMDB:
     
     def list_models(self) -> List[Dict[str, Any]]:
         """등록된 모든 모델 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._read_conn().cursor()
         
         cursor.execute("SELECT * FROM models ORDER BY created_at DESC")
         rows = cursor.fetchall()
-        conn.close()
         
         return [
             {
@@ -166,6 +371,10 @@ class SLLMDB:
             for row in rows
         ]
     
+    # ========================================================================
+    # 대화 기록
+    # ========================================================================
+    
     def save_conversation(
         self,
         session_id: str,
@@ -174,68 +383,230 @@ class SLLMDB:
         model_name: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None
     ):
-        """대화 기록 저장"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT INTO conversations (session_id, user_message, model_response, model_name, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                session_id,
-                user_message,
-                model_response,
-                model_name,
-                json.dumps(metadata) if metadata else None
-            ))
-            conn.commit()
-            logger.debug(f"대화 기록 저장: session_id={session_id}")
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"대화 기록 저장 실패: {e}")
-            raise
-        finally:
-            conn.close()
+        """대화 기록 저장 (writer 실행 중이면 배치 큐에 적재)"""
+        self._submit_write("""
+            INSERT INTO conversations (session_id, user_message, model_response, model_name, metadata)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            session_id,
+            user_message,
+            model_response,
+            model_name,
+            json.dumps(metadata) if metadata else None
+        ))
+        logger.debug(f"대화 기록 저장: session_id={session_id}")
     
     def get_conversations(
         self,
         session_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        before_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """대화 기록 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """
+        대화 기록 조회 (최신순, 키셋 페이지네이션)
+        
+        id는 삽입 순서대로 증가하므로 id 역순 = 최신순이며,
+        OFFSET 없이 id 기준으로 이어서 조회하므로 기록이 늘어도 조회 비용이 일정함
         
+        Args:
+            session_id: 세션 ID (없으면 전체)
+            limit: 최대 조회 수
+            before_id: 이 id보다 이전 기록부터 조회 (이전 페이지의 next_cursor)
+        """
+        cursor = self._read_conn().cursor()
+        
+        conditions = []
+        params: List[Any] = []
         if session_id:
-            cursor.execute("""
-                SELECT * FROM conversations
-                WHERE session_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (session_id, limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM conversations
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
+            conditions.append("session_id = ?")
+            params.append(session_id)
+        if before_id is not None:
+            conditions.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        cursor.execute(f"""
+            SELECT * FROM conversations
+            {where}
+            ORDER BY id DESC
+            LIMIT ?
+        """, (*params, limit))
         
         rows = cursor.fetchall()
-        conn.close()
         
-        return [
-            {
-                "id": row[0],
-                "session_id": row[1],
-                "user_message": row[2],
-                "model_response": row[3],
-                "model_name": row[4],
-                "metadata": json.loads(row[5]) if row[5] else None,
-                "created_at": row[6]
-            }
-            for row in rows
-        ]
+        return [self._conversation_row(row) for row in rows]
+    
+    @staticmethod
+    def _conversation_row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        """conversations 행을 딕셔너리로 변환"""
+        return {
+            "id": row[0],
+            "session_id": row[1],
+            "user_message": row[2],
+            "model_response": row[3],
+            "model_name": row[4],
+            "metadata": json.loads(row[5]) if row[5] else None,
+            "created_at": row[6]
+        }
+    
+    def archive_conversations(
+        self,
+        older_than_days: int = CONVERSATION_RETENTION_DAYS,
+        archive_dir: str = CONVERSATION_ARCHIVE_DIR
+    ) -> Dict[str, int]:
+        """
+        보관 기간이 지난 대화 기록을 월별 압축 파일로 옮기고 DB에서 삭제
+        
+        archive_dir/conversations-YYYY-MM.jsonl.gz 에 한 줄씩 추가되며
+        (gzip 멤버 단위로 이어 붙임), 파일 기록이 끝난 배치만 삭제됨
+        
+        Args:
+            older_than_days: 이 일수보다 오래된 기록을 아카이브
+            archive_dir: 아카이브 파일 디렉토리
+        
+        Returns:
+            월별 아카이브된 행 수
+        """
+        Path(archive_dir).mkdir(parents=True, exist_ok=True)
+        cutoff = f"-{int(older_than_days)} days"
+        archived: Dict[str, int] = {}
+        
+        while True:
+            with self._write_lock:
+                conn = self._write_conn
+                rows = conn.execute("""
+                    SELECT * FROM conversations
+                    WHERE created_at < datetime('now', ?)
+                    ORDER BY id
+                    LIMIT ?
+                """, (cutoff, CONVERSATION_ARCHIVE_BATCH_SIZE)).fetchall()
+                if not rows:
+                    break
+                
+                by_month: Dict[str, List[Dict[str, Any]]] = {}
+                for row in rows:
+                    record = self._conversation_row(row)
+                    by_month.setdefault(str(record["created_at"])[:7], []).append(record)
+                
+                for month, records in by_month.items():
+                    path = Path(archive_dir) / f"conversations-{month}.jsonl.gz"
+                    with gzip.open(path, "at", encoding="utf-8") as f:
+                        for record in records:
+                            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    archived[month] = archived.get(month, 0) + len(records)
+                
+                try:
+                    conn.executemany(
+                        "DELETE FROM conversations WHERE id = ?",
+                        [(row[0],) for row in rows]
+                    )
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"대화 기록 아카이브 삭제 실패: {e}")
+                    raise
+        
+        if archived:
+            logger.info(f"대화 기록 아카이브 완료: {archived}")
+        return archived
+    
+    async def _archive_loop(self):
+        """주기적으로 오래된 대화 기록 아카이브"""
+        while True:
+            try:
+                await self.run(self.archive_conversations)
+            except Exception as e:
+                logger.error(f"대화 기록 아카이브 실패: {e}")
+            await asyncio.sleep(CONVERSATION_ARCHIVE_INTERVAL_HOURS * 3600)
+    
+    # ========================================================================
+    # 토큰 사용량
+    # ========================================================================
+    
+    def add_token_usage(
+        self,
+        minute: str,
+        provider: str,
+        model: str,
+        session_id: str,
+        counters: Dict[str, float]
+    ):
+        """분 단위 사용량 증분 누적 (writer 실행 중이면 배치 큐에 적재)"""
+        self._submit_write("""
+            INSERT INTO token_usage (
+                minute, provider, model, session_id, requests, cached_responses,
+                prompt_tokens, completion_tokens, cached_tokens, cost_usd, latency_ms
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (minute, provider, model, session_id) DO UPDATE SET
+                requests = requests + excluded.requests,
+                cached_responses = cached_responses + excluded.cached_responses,
+                prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                completion_tokens = completion_tokens + excluded.completion_tokens,
+                cached_tokens = cached_tokens + excluded.cached_tokens,
+                cost_usd = cost_usd + excluded.cost_usd,
+                latency_ms = latency_ms + excluded.latency_ms
+        """, (
+            minute,
+            provider,
+            model,
+            session_id,
+            int(counters["requests"]),
+            int(counters["cached_responses"]),
+            int(counters["prompt_tokens"]),
+            int(counters["completion_tokens"]),
+            int(counters["cached_tokens"]),
+            counters["cost_usd"],
+            counters["latency_ms"]
+        ))
+    
+    def get_token_usage(
+        self,
+        group_by: str = "model",
+        minutes: int = 1440,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        기간별 사용량 집계 조회
+        
+        Args:
+            group_by: "model", "session" 또는 "minute"
+            minutes: 최근 몇 분간의 기록을 집계할지
+            limit: 최대 행 수 (비용 내림차순, minute는 시간 역순)
+        """
+        group_columns = {
+            "model": "provider, model",
+            "session": "session_id",
+            "minute": "minute"
+        }
+        if group_by not in group_columns:
+            raise ValueError(f"지원하지 않는 group_by: {group_by}")
+        columns = group_columns[group_by]
+        order = "minute DESC" if group_by == "minute" else "cost_usd DESC"
+        
+        cursor = self._read_conn().cursor()
+        cursor.execute(f"""
+            SELECT {columns},
+                   SUM(requests) AS requests,
+                   SUM(cached_responses) AS cached_responses,
+                   SUM(prompt_tokens) AS prompt_tokens,
+                   SUM(completion_tokens) AS completion_tokens,
+                   SUM(cached_tokens) AS cached_tokens,
+                   SUM(cost_usd) AS cost_usd,
+                   SUM(latency_ms) / MAX(SUM(requests), 1) AS avg_latency_ms
+            FROM token_usage
+            WHERE minute >= strftime('%Y-%m-%d %H:%M', 'now', ?)
+            GROUP BY {columns}
+            ORDER BY {order}
+            LIMIT ?
+        """, (f"-{int(minutes)} minutes", limit))
+        
+        names = [description[0] for description in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+    
+    # ========================================================================
+    # 응답 캐시
+    # ========================================================================
     
     def cache_response(
         self,
@@ -243,31 +614,70 @@ class SLLMDB:
         response: str,
         model_name: Optional[str] = None
     ):
-        """응답 캐시 저장"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """응답 캐시 저장 (writer 실행 중이면 배치 큐에 적재)"""
+        self._submit_write("""
+            INSERT OR REPLACE INTO model_cache (prompt_hash, response, model_name)
+            VALUES (?, ?, ?)
+        """, (prompt_hash, response, model_name))
+    
+    def get_cached_response(self, prompt_hash: str, ttl_seconds: Optional[int] = None) -> Optional[str]:
+        """캐시된 응답 조회 (ttl_seconds 지정 시 만료된 캐시는 무시)"""
+        entry = self.get_cached_entry(prompt_hash, ttl_seconds)
+        return entry[0] if entry else None
+    
+    def get_cached_entry(self, prompt_hash: str, ttl_seconds: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        """캐시된 응답과 저장 시각(epoch 초) 조회"""
+        cursor = self._read_conn().cursor()
         
-        try:
+        if ttl_seconds is not None:
             cursor.execute("""
-                INSERT OR REPLACE INTO model_cache (prompt_hash, response, model_name)
-                VALUES (?, ?, ?)
-            """, (prompt_hash, response, model_name))
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"캐시 저장 실패: {e}")
-            raise
-        finally:
-            conn.close()
+                SELECT response, strftime('%s', created_at) FROM model_cache
+                WHERE prompt_hash = ? AND created_at >= datetime('now', ?)
+            """, (prompt_hash, f"-{int(ttl_seconds)} seconds"))
+        else:
+            cursor.execute(
+                "SELECT response, strftime('%s', created_at) FROM model_cache WHERE prompt_hash = ?",
+                (prompt_hash,)
+            )
+        row = cursor.fetchone()
+        
+        return (row[0], float(row[1])) if row else None
     
-    def get_cached_response(self, prompt_hash: str) -> Optional[str]:
-        """캐시된 응답 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def evict_cache(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None) -> int:
+        """
+        캐시 정리
         
-        cursor.execute("SELECT response FROM model_cache WHERE prompt_hash = ?", (prompt_hash,))
-        row = cursor.fetchone()
-        conn.close()
+        Args:
+            ttl_seconds: 이보다 오래된 캐시 삭제
+            max_entries: 최신순으로 이 개수만 남기고 삭제
         
-        return row[0] if row else None
-
+        Returns:
+            삭제된 행 수
+        """
+        with self._write_lock:
+            conn = self._write_conn
+            cursor = conn.cursor()
+            removed = 0
+            
+            try:
+                if ttl_seconds is not None:
+                    cursor.execute(
+                        "DELETE FROM model_cache WHERE created_at < datetime('now', ?)",
+                        (f"-{int(ttl_seconds)} seconds",)
+                    )
+                    removed += cursor.rowcount
+                if max_entries is not None:
+                    cursor.execute("""
+                        DELETE FROM model_cache WHERE id IN (
+                            SELECT id FROM model_cache
+                            ORDER BY created_at DESC, id DESC
+                            LIMIT -1 OFFSET ?
+                        )
+                    """, (max_entries,))
+                    removed += cursor.rowcount
+                conn.commit()
+                return removed
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"캐시 정리 실패: {e}")
+                raise
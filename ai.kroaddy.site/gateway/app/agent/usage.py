@@ -0,0 +1,195 @@
+"""
+토큰 사용량 및 비용 집계 모듈
+요청별 usage를 메모리에서 모델/세션/분 단위로 집계하고 주기적으로 SQLite에 반영
+"""
+import os
+import json
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple
+
+from .sllm_db import SLLMDB
+
+logger = logging.getLogger(__name__)
+
+# 집계 설정
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+USAGE_LIVE_MINUTES = int(os.getenv("USAGE_LIVE_MINUTES", "60"))
+USAGE_LIVE_SESSIONS = int(os.getenv("USAGE_LIVE_SESSIONS", "10000"))
+
+# 모델별 가격 (USD / 100만 토큰), LLM_PRICING 환경 변수(JSON)로 덮어쓰기 가능
+DEFAULT_PRICING = {
+    "gpt-3.5-turbo": {"prompt": 0.5, "completion": 1.5},
+    "gpt-4o-mini": {"prompt": 0.15, "completion": 0.6},
+    "gpt-4o": {"prompt": 2.5, "completion": 10.0},
+    "claude-3-haiku-20240307": {"prompt": 0.25, "completion": 1.25},
+    "claude-3-5-sonnet-20241022": {"prompt": 3.0, "completion": 15.0},
+}
+PRICING = {**DEFAULT_PRICING, **json.loads(os.getenv("LLM_PRICING", "{}"))}
+
+_COUNTER_FIELDS = (
+    "requests",
+    "cached_responses",
+    "prompt_tokens",
+    "completion_tokens",
+    "cached_tokens",
+    "cost_usd",
+    "latency_ms"
+)
+
+def extract_usage(provider: str, result: Dict[str, Any]) -> Dict[str, int]:
+    """
+    provider별 usage 블록을 공통 형식으로 변환
+    
+    Returns:
+        {"prompt_tokens", "completion_tokens", "cached_tokens"}
+    """
+    usage = result.get("usage") or {}
+    if provider == "anthropic":
+        return {
+            "prompt_tokens": int(usage.get("input_tokens") or 0),
+            "completion_tokens": int(usage.get("output_tokens") or 0),
+            "cached_tokens": int(usage.get("cache_read_input_tokens") or 0)
+        }
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+        "completion_tokens": int(usage.get("completion_tokens") or 0),
+        "cached_tokens": int(details.get("cached_tokens") or 0)
+    }
+
+def estimate_cost(provider: str, model: str, usage: Dict[str, int]) -> float:
+    """가격표 기준 비용(USD) 추정 (로컬 모델 및 가격 미등록 모델은 0)"""
+    if provider == "local":
+        return 0.0
+    price = PRICING.get(model)
+    if price is None:
+        # 날짜 접미사가 붙은 모델명 (예: gpt-4o-2024-08-06)
+        price = next((p for name, p in PRICING.items() if model.startswith(name)), None)
+    if price is None:
+        return 0.0
+    return (usage["prompt_tokens"] * price["prompt"] + usage["completion_tokens"] * price["completion"]) / 1_000_000
+
+def _empty_counters() -> Dict[str, float]:
+    """0으로 초기화된 집계 카운터"""
+    return {field: 0 for field in _COUNTER_FIELDS}
+
+def _add(counters: Dict[str, float], delta: Dict[str, float]):
+    """카운터에 증분 더하기"""
+    for field in _COUNTER_FIELDS:
+        counters[field] += delta.get(field, 0)
+
+class UsageTracker:
+    """토큰 사용량/비용 메모리 집계 및 주기적 SQLite 반영"""
+    
+    def __init__(self, db: SLLMDB, flush_interval: float = USAGE_FLUSH_INTERVAL):
+        """
+        Args:
+            db: 집계 결과를 저장할 SLLMDB
+            flush_interval: SQLite 반영 주기 (초)
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        # 프로세스 시작 이후 누적 (실시간 조회용)
+        self._by_model: Dict[str, Dict[str, float]] = {}
+        # 세션은 최근 사용한 USAGE_LIVE_SESSIONS개만 유지 (전체 기록은 token_usage 테이블)
+        self._by_session: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._by_minute: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        # 아직 SQLite에 반영되지 않은 (분, provider, model, session) 단위 증분
+        self._pending: Dict[Tuple[str, str, str, str], Dict[str, float]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def record(
+        self,
+        provider: str,
+        model: str,
+        session_id: str,
+        usage: Optional[Dict[str, int]] = None,
+        latency_ms: float = 0.0,
+        cached: bool = False
+    ):
+        """
+        요청 1건 기록
+        
+        Args:
+            provider: 실제 응답한 provider
+            model: 실제 응답한 모델
+            session_id: 호출자 세션 ID
+            usage: extract_usage 결과 (캐시 응답이면 None)
+            latency_ms: 응답 시간
+            cached: 게이트웨이 캐시 응답 여부 (provider 비용 없음)
+        """
+        usage = usage or {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        delta = {
+            "requests": 1,
+            "cached_responses": 1 if cached else 0,
+            **usage,
+            "cost_usd": 0.0 if cached else estimate_cost(provider, model, usage),
+            "latency_ms": latency_ms
+        }
+        minute = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+        model_key = f"{provider}:{model}"
+        
+        _add(self._by_model.setdefault(model_key, _empty_counters()), delta)
+        _add(self._by_session.setdefault(session_id, _empty_counters()), delta)
+        self._by_session.move_to_end(session_id)
+        while len(self._by_session) > USAGE_LIVE_SESSIONS:
+            self._by_session.popitem(last=False)
+        _add(self._by_minute.setdefault(minute, _empty_counters()), delta)
+        while len(self._by_minute) > USAGE_LIVE_MINUTES:
+            self._by_minute.popitem(last=False)
+        _add(self._pending.setdefault((minute, provider, model, session_id), _empty_counters()), delta)
+    
+    def flush(self) -> int:
+        """대기 중인 증분을 SQLite 배치 writer로 전달"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        for (minute, provider, model, session_id), counters in pending.items():
+            self.db.add_token_usage(minute, provider, model, session_id, counters)
+        return len(pending)
+    
+    async def start(self):
+        """주기적 반영 작업 시작 (앱 시작 시 호출)"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def stop(self):
+        """반영 작업 종료 후 남은 증분 반영 (SLLMDB.stop 이전에 호출)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+    
+    async def _flush_loop(self):
+        """flush_interval마다 증분 반영"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"사용량 반영 실패: {e}")
+    
+    def live_stats(self, top: int = 20) -> Dict[str, Any]:
+        """프로세스 시작 이후 모델별/세션별(최근 세션 중 비용 상위)/분별 집계"""
+        top_sessions = sorted(self._by_session.items(), key=lambda item: item[1]["cost_usd"], reverse=True)[:top]
+        return {
+            "by_model": {key: self._summarize(c) for key, c in self._by_model.items()},
+            "top_sessions": {key: self._summarize(c) for key, c in top_sessions},
+            "by_minute": {key: self._summarize(c) for key, c in self._by_minute.items()},
+            "pending_rows": len(self._pending)
+        }
+    
+    @staticmethod
+    def _summarize(counters: Dict[str, float]) -> Dict[str, Any]:
+        """누적 카운터에 평균 응답 시간을 더해 반환"""
+        summary = {field: counters[field] for field in _COUNTER_FIELDS if field != "latency_ms"}
+        summary["cost_usd"] = round(summary["cost_usd"], 6)
+        summary["avg_latency_ms"] = round(counters["latency_ms"] / counters["requests"], 2) if counters["requests"] else None
+        return summary
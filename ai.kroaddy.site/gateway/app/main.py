@@ -6,7 +6,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
-from app.agent.main import agent_router
+from app.agent.main import agent_router, llm_api, sllm_db, response_cache, usage_tracker, semantic_cache
 
 app = FastAPI(title="Agent Service", version="1.0.0")
 
@@ -31,6 +31,23 @@ async def root():
         "description": "LLM API 및 SLLM 관리 서비스"
     }
 
+@app.on_event("startup")
+async def startup_event():
+    """서비스 시작 시 HTTP 커넥션 풀/DB 배치 writer 시작 및 만료 캐시 정리"""
+    await llm_api.startup()
+    await sllm_db.start()
+    await usage_tracker.start()
+    await response_cache.evict()
+    await semantic_cache.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서비스 종료 시 HTTP 커넥션 풀 정리 및 대기 중인 사용량/DB 쓰기 반영"""
+    await llm_api.shutdown()
+    await usage_tracker.stop()
+    await semantic_cache.stop()
+    await sllm_db.stop()
+
 @app.get("/health")
 async def health():
     """헬스 체크 엔드포인트"""
@@ -0,0 +1,110 @@
+"""
+LLMAPI 커넥션 풀 벤치마크
+로컬 mock 서버(OpenAI 형식)를 띄워 요청마다 새 AsyncClient를 만드는 방식과
+공유 커넥션 풀 방식의 지연 시간을 비교
+
+실행 (gateway 디렉토리에서):
+    python -m benchmarks.bench_llm_api --requests 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 18900
+
+mock_app = FastAPI()
+
+@mock_app.post("/v1/chat/completions")
+async def mock_chat_completions(payload: dict):
+    """OpenAI chat completions 형식의 고정 응답"""
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "model": payload.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    }
+
+def start_mock_server() -> uvicorn.Server:
+    """mock 서버를 백그라운드 스레드에서 실행"""
+    config = uvicorn.Config(mock_app, host=MOCK_HOST, port=MOCK_PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def run(label: str, call, total: int, concurrency: int):
+    """total개의 요청을 concurrency 만큼 동시에 실행하고 지연 시간 통계 출력"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<14} mean={statistics.mean(latencies):7.2f}ms "
+        f"p50={statistics.median(latencies):7.2f}ms p95={p95:7.2f}ms "
+        f"throughput={total / elapsed:8.1f} req/s"
+    )
+
+async def main(total: int, concurrency: int):
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY") or "mock-key"
+    os.environ["OPENAI_BASE_URL"] = f"http://{MOCK_HOST}:{MOCK_PORT}/v1"
+    # 커넥션 풀만 비교하도록 provider 속도/동시 실행 제한은 끔
+    os.environ["OPENAI_RATE_LIMIT_RPS"] = "0"
+    os.environ["OPENAI_MAX_CONCURRENCY"] = "0"
+    
+    from app.agent.llm_api import LLMAPI
+    
+    messages = [{"role": "user", "content": "ping"}]
+    url = f"http://{MOCK_HOST}:{MOCK_PORT}/v1/chat/completions"
+    
+    async def per_request_client():
+        # 기존 방식: 요청마다 클라이언트 생성 -> 연결 재수립
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json={"model": "mock", "messages": messages}, timeout=30.0)
+            response.raise_for_status()
+    
+    llm_api = LLMAPI()
+    await llm_api.startup()
+    
+    async def pooled_client():
+        await llm_api.chat_completion(messages=messages, model="mock", provider="openai")
+    
+    # 워밍업
+    await run("warmup", pooled_client, 20, concurrency)
+    await run("per-request", per_request_client, total, concurrency)
+    await run("pooled", pooled_client, total, concurrency)
+    
+    await llm_api.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLMAPI 커넥션 풀 벤치마크")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    
+    server = start_mock_server()
+    try:
+        asyncio.run(main(args.requests, args.concurrency))
+    finally:
+        server.should_exit = True
@@ -0,0 +1,216 @@
+"""
+대화 이력 압축 모듈
+토큰 예산을 넘는 대화 이력은 system 프롬프트와 최근 대화만 남기고, 오래된 대화는 요약으로 대체
+
+- 토큰 수: tiktoken이 있으면 모델 인코딩으로, 없으면 UTF-8 바이트 수 기반 추정치로 계산
+- 요약: 대화 ID별로 (요약된 메시지 수, 해당 구간 해시, 요약)을 캐시하여 새로 밀려난 대화만 이어서 요약
+- 예산을 넘었을 때 목표 비율(HISTORY_TRIM_TARGET)까지 줄여 두므로 요약 갱신은 매 턴이 아니라 몇 턴마다 발생
+"""
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# 대화 이력 토큰 예산 설정
+# 프롬프트 전체(system + 이력 + 사용자 메시지) 예산 = max_tokens * HISTORY_TOKEN_BUDGET_RATIO
+HISTORY_TOKEN_BUDGET_RATIO = float(os.getenv("HISTORY_TOKEN_BUDGET_RATIO", "2.0"))
+# 예산을 넘으면 이 비율까지 줄임 (요약 갱신 빈도 감소)
+HISTORY_TRIM_TARGET = float(os.getenv("HISTORY_TRIM_TARGET", "0.6"))
+# 예산과 관계없이 항상 유지할 최근 메시지 수
+HISTORY_MIN_RECENT_MESSAGES = int(os.getenv("HISTORY_MIN_RECENT_MESSAGES", "2"))
+HISTORY_SUMMARY_MODEL = os.getenv("HISTORY_SUMMARY_MODEL", "gpt-4o-mini")
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+HISTORY_SUMMARY_CACHE_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", "1000"))
+
+# 메시지 하나당 role/구분자 오버헤드 (OpenAI chat 형식 기준)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "다음은 사용자와 여행 챗봇의 이전 대화야. 이후 대화에 필요한 사실(사용자 정보, 선호, 결정된 사항, "
+    "진행 중인 질문)만 한국어로 간결하게 요약해줘."
+)
+
+Summarizer = Callable[[List[Dict[str, str]]], Awaitable[str]]
+
+class TokenCounter:
+    """모델별 토큰 수 계산기"""
+    
+    def __init__(self, model: str):
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # 이전 버전 tiktoken(o200k_base 없음)이거나 인코딩 파일을 받을 수 없는 환경에서는 바이트 수로 추정
+                logger.warning(f"tiktoken 인코딩 로드 실패, 바이트 수로 추정: {e}")
+    
+    def count_text(self, text: str) -> int:
+        """텍스트 토큰 수 (tiktoken이 없으면 한글 1자 ≈ 1토큰 기준 추정)"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(text.encode("utf-8")) // 3 + 1
+    
+    def count_message(self, message: Dict[str, str]) -> int:
+        """메시지 하나의 토큰 수"""
+        return self.count_text(message["content"]) + _MESSAGE_OVERHEAD_TOKENS
+
+def _history_hash(messages: List[Dict[str, str]]) -> str:
+    """요약된 구간이 바뀌지 않았는지 확인하기 위한 해시"""
+    return hashlib.sha256(json.dumps(messages, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class HistoryCompactor:
+    """토큰 예산 기반 대화 이력 정리 및 요약 캐시"""
+    
+    def __init__(self, summarize: Optional[Summarizer] = None, model: str = "gpt-4o-mini", cache_size: int = HISTORY_SUMMARY_CACHE_SIZE):
+        """
+        Args:
+            summarize: 메시지 리스트를 요약하는 비동기 함수 (없으면 오래된 대화를 버리기만 함)
+            model: 토큰 수 계산에 사용할 모델
+            cache_size: 요약을 보관할 최대 대화 수
+        """
+        self.summarize = summarize
+        self.counter = TokenCounter(model)
+        self.cache_size = cache_size
+        # 대화 ID -> (요약된 메시지 수, 요약된 구간 해시, 요약)
+        self._summaries: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+        self._stats = {
+            "compacted": 0,
+            "summaries_created": 0,
+            "summaries_reused": 0,
+            "summary_errors": 0
+        }
+    
+    @staticmethod
+    def budget_for(max_tokens: int) -> int:
+        """max_tokens 기준 프롬프트 토큰 예산"""
+        return int(max_tokens * HISTORY_TOKEN_BUDGET_RATIO)
+    
+    def _split(self, messages: List[Dict[str, str]]) -> Tuple[Dict[str, str], List[Dict[str, str]], Dict[str, str]]:
+        """(system 메시지, 대화 이력, 사용자 메시지)로 분리"""
+        return messages[0], messages[1:-1], messages[-1]
+    
+    def _keep_from(self, history: List[Dict[str, str]], available: int) -> int:
+        """
+        예산 안에 들어가는 최근 대화의 시작 인덱스
+        
+        HISTORY_MIN_RECENT_MESSAGES개는 예산을 넘어도 유지
+        """
+        start = len(history)
+        used = 0
+        while start > 0:
+            cost = self.counter.count_message(history[start - 1])
+            if used + cost > available and len(history) - start >= HISTORY_MIN_RECENT_MESSAGES:
+                break
+            used += cost
+            start -= 1
+        return start
+    
+    def _fits(self, messages: List[Dict[str, str]], available: int) -> bool:
+        return sum(self.counter.count_message(m) for m in messages) <= available
+    
+    @staticmethod
+    def _with_summary(system: Dict[str, str], summary: Optional[str]) -> Dict[str, str]:
+        """요약을 system 메시지 뒤에 추가"""
+        if not summary:
+            return system
+        return {"role": "system", "content": f"{system['content']}\n\n이전 대화 요약:\n{summary}"}
+    
+    def trim(self, messages: List[Dict[str, str]], budget: int) -> List[Dict[str, str]]:
+        """
+        요약 없이 오래된 대화만 제거 (동기 호출용)
+        
+        Args:
+            messages: system 메시지, 대화 이력, 사용자 메시지 순의 리스트
+            budget: 프롬프트 토큰 예산
+        """
+        system, history, user = self._split(messages)
+        available = budget - self.counter.count_message(system) - self.counter.count_message(user)
+        if self._fits(history, available):
+            return messages
+        start = self._keep_from(history, int(available * HISTORY_TRIM_TARGET))
+        self._stats["compacted"] += 1
+        logger.info(f"대화 이력 정리: {start}개 메시지 제외")
+        return [system, *history[start:], user]
+    
+    async def compact(self, messages: List[Dict[str, str]], budget: int, conversation_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        예산을 넘는 오래된 대화를 요약으로 대체
+        
+        Args:
+            messages: system 메시지, 대화 이력, 사용자 메시지 순의 리스트
+            budget: 프롬프트 토큰 예산
+            conversation_id: 요약 캐시 키 (없으면 첫 메시지 기준으로 생성)
+        
+        Returns:
+            system(+요약), 최근 대화, 사용자 메시지 순의 리스트
+        """
+        system, history, user = self._split(messages)
+        if not history or self.summarize is None:
+            return self.trim(messages, budget)
+        
+        key = conversation_id or _history_hash(history[:1])
+        available = budget - self.counter.count_message(system) - self.counter.count_message(user)
+        cached = self._summaries.get(key)
+        
+        # 이전에 요약한 구간이 그대로이고 나머지가 예산 안이면 캐시된 요약 재사용
+        if cached is not None:
+            count, prefix_hash, summary = cached
+            if count <= len(history) and _history_hash(history[:count]) == prefix_hash:
+                available_with_summary = available - self.counter.count_text(summary)
+                if self._fits(history[count:], available_with_summary):
+                    self._summaries.move_to_end(key)
+                    self._stats["summaries_reused"] += 1
+                    return [self._with_summary(system, summary), *history[count:], user]
+            else:
+                cached = None
+        
+        if cached is None and self._fits(history, available):
+            return messages
+        
+        # 예산의 목표 비율까지 줄이고, 새로 밀려난 구간만 이전 요약에 이어서 요약
+        start = self._keep_from(history, int(available * HISTORY_TRIM_TARGET))
+        previous_count, previous_summary = (cached[0], cached[2]) if cached else (0, None)
+        start = max(start, previous_count)
+        new_part = history[previous_count:start]
+        if not new_part:
+            # 최근 메시지만으로 예산을 넘는 경우 (더 줄일 수 있는 대화 없음)
+            return [self._with_summary(system, previous_summary), *history[start:], user]
+        self._stats["compacted"] += 1
+        
+        if previous_summary:
+            new_part = [{"role": "system", "content": f"이전 요약:\n{previous_summary}"}, *new_part]
+        try:
+            summary = await self.summarize(new_part)
+        except Exception as e:
+            self._stats["summary_errors"] += 1
+            logger.warning(f"대화 요약 실패, 오래된 대화를 제외만 합니다: {e}")
+            return [system, *history[start:], user]
+        
+        self._stats["summaries_created"] += 1
+        self._summaries[key] = (start, _history_hash(history[:start]), summary)
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.cache_size:
+            self._summaries.popitem(last=False)
+        logger.info(f"대화 이력 압축: {start}개 메시지를 요약으로 대체 (대화 {key[:16]})")
+        return [self._with_summary(system, summary), *history[start:], user]
+    
+    def stats(self) -> Dict[str, int]:
+        """압축/요약 통계"""
+        return {
+            **self._stats,
+            "cached_summaries": len(self._summaries),
+            "tiktoken": TIKTOKEN_AVAILABLE
+        }
@@ -4,10 +4,14 @@ Chatbot Service - FastAPI 애플리케이션
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
-from app.price_analyzer import chatbot, simple_chat, analyze_price
+from typing import List, Dict, Optional, AsyncIterator
+from app.price_analyzer import chatbot, aanalyze_price_detail, close_clients, history_compactor
+from app.price_index import price_index
+from app.prompts import PERSONAS, get_prompt_template
 import logging
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -61,6 +65,8 @@ class ChatRequest(BaseModel):
     conversation_history: Optional[List[Dict[str, str]]] = None
     user_profile: Optional[Dict[str, str]] = None  # Onboarding 데이터
     context_info: Optional[Dict] = None  # 현재 위치 및 날씨 정보
+    persona: Optional[str] = None  # 페르소나 (없으면 travel_assistant)
+    conversation_id: Optional[str] = None  # 오래된 대화 요약 캐시 키
 
 class ChatResponse(BaseModel):
     """챗봇 대화 응답"""
@@ -71,10 +77,92 @@ class PriceAnalysisRequest(BaseModel):
     product_name: str
     price: Optional[float] = None
     context: Optional[str] = None
+    area: Optional[str] = None  # 지역 (예: "서울 종로구")
+    category: Optional[str] = None  # 업종 (예: "한식")
+    narrate: bool = False  # 기준표 결과를 LLM으로 풀어서 설명
 
 class PriceAnalysisResponse(BaseModel):
     """가격 분석 응답"""
     analysis: str
+    reference: Optional[Dict] = None  # 가격 기준표 조회 결과 (없으면 LLM 분석)
+
+# ============================================================================
+# 헬퍼
+# ============================================================================
+
+def _clean_history(conversation_history: Optional[List[Dict[str, str]]]) -> Optional[List[Dict[str, str]]]:
+    """대화 이력 검증 및 정리 (role/content가 올바른 메시지만 유지)"""
+    if not conversation_history:
+        return None
+    
+    cleaned_history = []
+    for msg in conversation_history:
+        if isinstance(msg, dict) and "role" in msg and "content" in msg:
+            # role이 유효한지 확인
+            if msg["role"] in ["user", "assistant", "system"]:
+                cleaned_history.append({
+                    "role": msg["role"],
+                    "content": str(msg["content"])
+                })
+            else:
+                logger.warning(f"유효하지 않은 role: {msg['role']}")
+        else:
+            logger.warning(f"잘못된 메시지 형식: {msg}")
+    
+    logger.info(f"정리된 대화 이력 길이: {len(cleaned_history)}")
+    return cleaned_history or None
+
+def _validate_persona(persona: Optional[str]):
+    """등록되지 않은 페르소나면 400 오류"""
+    try:
+        get_prompt_template(persona)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _log_chat_request(request: ChatRequest):
+    """대화 요청 정보 로깅"""
+    logger.info(f"챗봇 요청 수신: {request.message}")
+    logger.info(f"대화 이력 길이: {len(request.conversation_history) if request.conversation_history else 0}")
+    
+    # 사용자 프로필 정보 로깅
+    if request.user_profile:
+        logger.info(f"사용자 프로필 정보: {request.user_profile}")
+    
+    # 컨텍스트 정보 로깅
+    if request.context_info:
+        logger.info(f"컨텍스트 정보 (위치/날씨): {request.context_info}")
+
+def _sse_event(data: Dict) -> str:
+    """SSE 이벤트 문자열 생성"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_chat(request: ChatRequest) -> AsyncIterator[str]:
+    """
+    챗봇 응답 SSE 스트림
+    
+    이벤트 형식:
+        {"type": "delta", "content": "..."}
+        {"type": "done"}
+    """
+    async for delta in chatbot.chat_stream(
+        request.message,
+        conversation_history=_clean_history(request.conversation_history),
+        user_profile=request.user_profile,
+        context_info=request.context_info,
+        persona=request.persona,
+        conversation_id=request.conversation_id
+    ):
+        yield _sse_event({"type": "delta", "content": delta})
+    yield _sse_event({"type": "done"})
+
+# ============================================================================
+# 라이프사이클
+# ============================================================================
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서비스 종료 시 공유 OpenAI 커넥션 풀 정리"""
+    await close_clients()
 
 # ============================================================================
 # API 엔드포인트
@@ -94,7 +182,16 @@ async def health_check():
     """헬스 체크"""
     return {
         "status": "healthy",
-        "chatbot_ready": True
+        "chatbot_ready": True,
+        "history": history_compactor.stats(),
+        "price_index": price_index.stats()
+    }
+
+@app.get("/personas")
+async def list_personas():
+    """사용 가능한 페르소나 목록"""
+    return {
+        "personas": {name: template.system_prompt for name, template in PERSONAS.items()}
     }
 
 @app.post("/chat", response_model=ChatResponse)
@@ -108,57 +205,19 @@ async def chat(request: ChatRequest):
     Returns:
         챗봇 응답
     """
+    _validate_persona(request.persona)
     try:
-        logger.info(f"챗봇 요청 수신: {request.message}")
-        logger.info(f"대화 이력 길이: {len(request.conversation_history) if request.conversation_history else 0}")
+        _log_chat_request(request)
         
-        # 대화 이력 검증 및 정리
-        cleaned_history = None
-        if request.conversation_history:
-            cleaned_history = []
-            for msg in request.conversation_history:
-                if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                    # role이 유효한지 확인
-                    if msg["role"] in ["user", "assistant", "system"]:
-                        cleaned_history.append({
-                            "role": msg["role"],
-                            "content": str(msg["content"])
-                        })
-                    else:
-                        logger.warning(f"유효하지 않은 role: {msg['role']}")
-                else:
-                    logger.warning(f"잘못된 메시지 형식: {msg}")
-            
-            logger.info(f"정리된 대화 이력 길이: {len(cleaned_history)}")
-        
-        # 사용자 프로필 정보 로깅
-        if request.user_profile:
-            logger.info(f"사용자 프로필 정보: {request.user_profile}")
-        
-        # 컨텍스트 정보 로깅
-        if request.context_info:
-            logger.info(f"컨텍스트 정보 (위치/날씨): {request.context_info}")
-        
-        if cleaned_history and len(cleaned_history) > 0:
-            # 대화 이력이 있으면 전달
-            response = chatbot.chat(
-                request.message,
-                conversation_history=cleaned_history,
-                user_profile=request.user_profile,
-                context_info=request.context_info
-            )
-        else:
-            # 대화 이력이 없으면 간단한 호출 (사용자 프로필 및 컨텍스트는 전달)
-            if request.user_profile or request.context_info:
-                # simple_chat은 user_profile과 context_info를 받지 않으므로 직접 chatbot.chat 호출
-                response = chatbot.chat(
-                    request.message,
-                    conversation_history=None,
-                    user_profile=request.user_profile,
-                    context_info=request.context_info
-                )
-            else:
-                response = simple_chat(request.message)
+        # 비동기 호출 (응답을 기다리는 동안 다른 요청 처리 가능)
+        response = await chatbot.achat(
+            request.message,
+            conversation_history=_clean_history(request.conversation_history),
+            user_profile=request.user_profile,
+            context_info=request.context_info,
+            persona=request.persona,
+            conversation_id=request.conversation_id
+        )
         
         logger.info(f"챗봇 응답 생성 완료 (길이: {len(response)} 문자)")
         return ChatResponse(response=response)
@@ -179,28 +238,53 @@ async def chat(request: ChatRequest):
         
         raise HTTPException(status_code=500, detail=error_detail)
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    챗봇과 대화 (SSE 스트리밍)
+    
+    Args:
+        request: 대화 요청 (메시지, 대화 이력)
+    
+    Returns:
+        text/event-stream 응답 (delta 이벤트 후 done 이벤트)
+    """
+    _validate_persona(request.persona)
+    _log_chat_request(request)
+    return StreamingResponse(
+        _stream_chat(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/analyze-price", response_model=PriceAnalysisResponse)
 async def analyze_price_endpoint(request: PriceAnalysisRequest):
     """
     가격 분석 요청
     
     Args:
-        request: 가격 분석 요청 (상품명, 가격, 컨텍스트)
+        request: 가격 분석 요청 (상품명, 가격, 컨텍스트, 지역, 업종)
     
     Returns:
-        가격 분석 결과
+        가격 분석 결과 (가격 기준표에 있으면 기준 통계 포함)
     """
     try:
         logger.info(f"가격 분석 요청: {request.product_name}, 가격: {request.price}")
         
-        analysis = analyze_price(
+        analysis, reference = await aanalyze_price_detail(
             request.product_name,
             request.price,
-            request.context
+            request.context,
+            request.area,
+            request.category,
+            request.narrate
         )
         
-        logger.info("가격 분석 완료")
-        return PriceAnalysisResponse(analysis=analysis)
+        logger.info(f"가격 분석 완료 (기준표 {'사용' if reference else '없음'})")
+        return PriceAnalysisResponse(
+            analysis=analysis,
+            reference=reference.to_dict() if reference else None
+        )
         
     except Exception as e:
         logger.error(f"가격 분석 실패: {e}")
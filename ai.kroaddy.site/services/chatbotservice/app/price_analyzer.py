@@ -2,12 +2,17 @@
 가격 분석 챗봇 서비스
 OpenAI API를 사용한 친절한 한국어 챗봇
 """
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
-from typing import List, Dict, Optional
+import asyncio
+import httpx
+from typing import List, Dict, Optional, AsyncIterator, Tuple
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
+from app.prompts import DEFAULT_PERSONA, PromptTemplate, get_prompt_template
+from app.history import HistoryCompactor, HISTORY_SUMMARY_MODEL, HISTORY_SUMMARY_MAX_TOKENS, SUMMARY_PROMPT
+from app.price_index import PriceReference, price_index
 
 # 로깅 설정 (먼저 설정)
 logging.basicConfig(level=logging.INFO)
@@ -35,121 +40,215 @@ if not env_loaded:
     load_dotenv()  # 기본적으로 현재 디렉토리와 상위 디렉토리에서 .env 찾기
     logger.info("기본 경로에서 .env 파일 로드 시도")
 
+# OpenAI 커넥션 풀 / 동시 실행 설정
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+# 한 워커에서 동시에 진행할 최대 OpenAI 호출 수 (초과 요청은 대기)
+CHATBOT_MAX_CONCURRENCY = int(os.getenv("CHATBOT_MAX_CONCURRENCY", "20"))
+
+def _http_limits() -> httpx.Limits:
+    """동기/비동기 클라이언트 공통 커넥션 풀 크기"""
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+    )
+
 # 클라이언트 생성 (환경변수에서 키 자동 인식)
+# 프로세스 전체에서 커넥션 풀을 공유하는 동기/비동기 클라이언트를 하나씩 사용
 # API 키가 없으면 None으로 설정하고, 실제 사용 시에만 에러 발생
 _openai_api_key = os.getenv("OPENAI_API_KEY")
 if _openai_api_key:
-    client = OpenAI(api_key=_openai_api_key)
+    client = OpenAI(
+        api_key=_openai_api_key,
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=httpx.Client(limits=_http_limits(), timeout=OPENAI_TIMEOUT)
+    )
+    async_client = AsyncOpenAI(
+        api_key=_openai_api_key,
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(limits=_http_limits(), timeout=OPENAI_TIMEOUT)
+    )
 else:
     client = None
+    async_client = None
     logger.warning("OPENAI_API_KEY가 설정되지 않았습니다. OpenAI API 기능이 작동하지 않을 수 있습니다.")
 
+# 비동기 호출 동시 실행 제한
+_chat_semaphore = asyncio.Semaphore(CHATBOT_MAX_CONCURRENCY)
+
+_NO_API_KEY_MESSAGE = "죄송합니다. OpenAI API 키가 설정되지 않아 응답을 생성할 수 없습니다."
+
+async def _summarize_history(messages: List[Dict[str, str]]) -> str:
+    """오래된 대화 요약 (대화 이력 압축용)"""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    async with _chat_semaphore:
+        response = await async_client.chat.completions.create(
+            model=HISTORY_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript}
+            ],
+            temperature=0,
+            max_tokens=HISTORY_SUMMARY_MAX_TOKENS
+        )
+    return response.choices[0].message.content.strip()
+
+# 토큰 예산을 넘는 대화 이력 압축 (API 키가 없으면 요약 없이 정리만)
+history_compactor = HistoryCompactor(summarize=_summarize_history if async_client is not None else None)
+
+async def close_clients():
+    """공유 OpenAI 클라이언트의 커넥션 풀 정리 (앱 종료 시 호출)"""
+    if async_client is not None:
+        await async_client.close()
+    if client is not None:
+        client.close()
+
 class PriceAnalyzerChatbot:
     """가격 분석 챗봇 클래스"""
     
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 2000):
+    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 2000, persona: str = DEFAULT_PERSONA):
         """
         챗봇 초기화
         
+        인스턴스 상태는 생성 후 바뀌지 않으며, 페르소나/시스템 프롬프트는 호출마다 인자로 지정
+        
         Args:
             model: 사용할 모델 (기본값: gpt-3.5-turbo)
             temperature: 창의성 조절 (0.0 ~ 2.0, 기본값: 0.7)
             max_tokens: 응답 길이 제한 (기본값: 300)
+            persona: 호출 시 지정하지 않았을 때 사용할 페르소나
         """
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.system_message = "너는 친절한 한국을 여행 온 외국인 맞춤형 한국어 챗봇이야. 사용자의 질문에 정확하고 도움이 되는 답변을 제공해줘."
+        self.persona = persona
+        # 기본 페르소나 템플릿 (등록되지 않은 페르소나면 여기서 오류)
+        self._default_template = get_prompt_template(persona)
+    
+    @property
+    def system_message(self) -> str:
+        """기본 페르소나의 시스템 프롬프트 (읽기 전용)"""
+        return self._default_template.system_prompt
+    
+    def _prompt_template(self, persona: Optional[str], system_prompt: Optional[str]) -> PromptTemplate:
+        """호출 인자로 지정한 템플릿 (없으면 기본 페르소나)"""
+        if persona is None and system_prompt is None:
+            return self._default_template
+        return get_prompt_template(persona, system_prompt)
+    
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_profile: Optional[Dict[str, str]] = None,
+        context_info: Optional[Dict] = None,
+        persona: Optional[str] = None,
+        system_prompt: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        OpenAI에 전송할 메시지 구성
+        
+        Args:
+            user_message: 사용자 메시지
+            conversation_history: 대화 이력 (선택사항)
+            user_profile: 사용자 프로필 정보 (선택사항)
+            context_info: 현재 위치 및 날씨 정보 (선택사항)
+            persona: 페르소나 이름 (선택사항, 기본값: 인스턴스 페르소나)
+            system_prompt: 페르소나 대신 사용할 시스템 프롬프트 (선택사항)
+        
+        Returns:
+            system 메시지, 대화 이력, 사용자 메시지 순의 메시지 리스트
+        """
+        # 시스템 메시지 구성 (사용자 프로필, 위치, 날씨 정보 포함)
+        system_message = self._prompt_template(persona, system_prompt).render(user_profile, context_info)
+        
+        # 메시지 구성
+        messages = [
+            {"role": "system", "content": system_message}
+        ]
+        
+        # 대화 이력이 있으면 추가
+        if conversation_history:
+            # 대화 이력이 리스트인지 확인하고, 각 메시지의 형식 검증
+            if isinstance(conversation_history, list):
+                for msg in conversation_history:
+                    if isinstance(msg, dict) and "role" in msg and "content" in msg:
+                        # role이 'system'이 아닌 경우만 추가 (system 메시지는 이미 있음)
+                        if msg["role"] != "system":
+                            messages.append({
+                                "role": msg["role"],
+                                "content": str(msg["content"])
+                            })
+                    else:
+                        logger.warning(f"잘못된 대화 이력 형식: {msg}")
+            else:
+                logger.warning(f"대화 이력이 리스트가 아닙니다: {type(conversation_history)}")
+        
+        logger.info(f"전송할 메시지 개수: {len(messages)}")
+        
+        # 사용자 메시지 추가
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _extract_response(self, user_message: str, response) -> str:
+        """응답 텍스트 추출 (max_tokens로 잘린 경우 안내 문구 추가)"""
+        bot_response = response.choices[0].message.content
+        
+        # 응답이 잘렸는지 확인
+        if response.choices[0].finish_reason == "length":
+            logger.warning(f"응답이 max_tokens({self.max_tokens})로 인해 잘렸습니다.")
+            bot_response += "\n\n(응답이 길어서 일부가 잘렸을 수 있습니다.)"
+        
+        logger.info(f"사용자: {user_message[:100]}...")
+        logger.info(f"챗봇 응답 길이: {len(bot_response)} 문자")
+        logger.info(f"응답 완료 이유: {response.choices[0].finish_reason}")
+        
+        return bot_response
+    
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        """호출 오류를 사용자에게 보여줄 메시지로 변환"""
+        error_str = str(e)
+        logger.error(f"챗봇 호출 실패: {e}", exc_info=True)
+        
+        # OpenAI API 키 오류 처리
+        if "invalid_api_key" in error_str.lower() or "incorrect api key" in error_str.lower() or "401" in error_str:
+            return "죄송합니다. OpenAI API 키 설정에 문제가 있습니다. 관리자에게 문의해주세요."
         
-    def chat(self, user_message: str, conversation_history: Optional[List[Dict[str, str]]] = None, user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None) -> str:
+        # Rate limit 오류 처리
+        if "rate limit" in error_str.lower() or "429" in error_str:
+            return "죄송합니다. 요청이 너무 많습니다. 잠시 후 다시 시도해주세요."
+        
+        # 기타 오류는 간단한 메시지로
+        return "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+    
+    def chat(self, user_message: str, conversation_history: Optional[List[Dict[str, str]]] = None, user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None, persona: Optional[str] = None, system_prompt: Optional[str] = None, conversation_id: Optional[str] = None) -> str:
         """
-        챗봇과 대화
+        챗봇과 대화 (동기 호출, 스크립트/스레드에서 사용)
         
         Args:
             user_message: 사용자 메시지
             conversation_history: 대화 이력 (선택사항)
             user_profile: 사용자 프로필 정보 (선택사항)
             context_info: 현재 위치 및 날씨 정보 (선택사항)
+            persona: 페르소나 이름 (선택사항)
+            system_prompt: 페르소나 대신 사용할 시스템 프롬프트 (선택사항)
+            conversation_id: 대화 이력 요약 캐시 키 (선택사항)
         
         Returns:
             챗봇의 응답 메시지
         """
         try:
-            # 시스템 메시지 구성 (사용자 프로필, 위치, 날씨 정보 포함)
-            system_message = self.system_message
-            context_parts = []
-            
-            # 사용자 프로필 정보 추가
-            if user_profile:
-                profile_parts = []
-                
-                if user_profile.get('gender'):
-                    profile_parts.append(f"성별: {user_profile['gender']}")
-                
-                if user_profile.get('age'):
-                    profile_parts.append(f"생년월일: {user_profile['age']}")
-                
-                if user_profile.get('nationality'):
-                    profile_parts.append(f"국적/거주지: {user_profile['nationality']}")
-                
-                if user_profile.get('religion'):
-                    profile_parts.append(f"종교: {user_profile['religion']}")
-                
-                if user_profile.get('dietary'):
-                    profile_parts.append(f"식이 제한: {user_profile['dietary']}")
-                
-                if profile_parts:
-                    context_parts.append("사용자 정보:")
-                    context_parts.extend(profile_parts)
-            
-            # 현재 위치 정보 추가
-            if context_info and context_info.get('location'):
-                location = context_info['location']
-                context_parts.append(f"\n현재 위치: 위도 {location.get('lat', 'N/A')}, 경도 {location.get('lng', 'N/A')}")
-            
-            # 날씨 정보 추가
-            if context_info and context_info.get('weather'):
-                weather = context_info['weather']
-                weather_text = f"현재 날씨: {weather.get('city', '알 수 없음')} 지역, {weather.get('temp', 'N/A')}°C, {weather.get('description', '')}"
-                context_parts.append(weather_text)
-            
-            # 컨텍스트 정보가 있으면 시스템 메시지에 추가
-            if context_parts:
-                context_text = "\n".join(context_parts)
-                system_message = f"{self.system_message}\n\n{context_text}\n\n위 정보들을 종합적으로 고려하여 개인화되고 상황에 맞는 답변을 제공해줘."
-            
-            # 메시지 구성
-            messages = [
-                {"role": "system", "content": system_message}
-            ]
-            
-            # 대화 이력이 있으면 추가
-            if conversation_history:
-                # 대화 이력이 리스트인지 확인하고, 각 메시지의 형식 검증
-                if isinstance(conversation_history, list):
-                    for msg in conversation_history:
-                        if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                            # role이 'system'이 아닌 경우만 추가 (system 메시지는 이미 있음)
-                            if msg["role"] != "system":
-                                messages.append({
-                                    "role": msg["role"],
-                                    "content": str(msg["content"])
-                                })
-                        else:
-                            logger.warning(f"잘못된 대화 이력 형식: {msg}")
-                else:
-                    logger.warning(f"대화 이력이 리스트가 아닙니다: {type(conversation_history)}")
-            
-            logger.info(f"전송할 메시지 개수: {len(messages)}")
-            
-            # 사용자 메시지 추가
-            messages.append({"role": "user", "content": user_message})
+            messages = self._build_messages(user_message, conversation_history, user_profile, context_info, persona, system_prompt)
+            # 토큰 예산을 넘는 오래된 대화 제외 (동기 경로는 요약 호출 없이 정리만)
+            messages = history_compactor.trim(messages, history_compactor.budget_for(self.max_tokens))
             
             # 클라이언트 확인
             if client is None:
-                error_msg = "OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요."
-                logger.error(error_msg)
-                return "죄송합니다. OpenAI API 키가 설정되지 않아 응답을 생성할 수 없습니다."
+                logger.error("OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요.")
+                return _NO_API_KEY_MESSAGE
             
             # 챗봇 호출
             response = client.chat.completions.create(
@@ -159,47 +258,104 @@ class PriceAnalyzerChatbot:
                 max_tokens=self.max_tokens
             )
             
-            # 응답 추출
-            bot_response = response.choices[0].message.content
-            
-            # 응답이 잘렸는지 확인
-            if response.choices[0].finish_reason == "length":
-                logger.warning(f"응답이 max_tokens({self.max_tokens})로 인해 잘렸습니다.")
-                bot_response += "\n\n(응답이 길어서 일부가 잘렸을 수 있습니다.)"
-            
-            logger.info(f"사용자: {user_message[:100]}...")
-            logger.info(f"챗봇 응답 길이: {len(bot_response)} 문자")
-            logger.info(f"응답 완료 이유: {response.choices[0].finish_reason}")
-            
-            return bot_response
-            
+            return self._extract_response(user_message, response)
+        
         except Exception as e:
-            error_str = str(e)
-            logger.error(f"챗봇 호출 실패: {e}", exc_info=True)
+            return self._error_message(e)
+    
+    async def achat(self, user_message: str, conversation_history: Optional[List[Dict[str, str]]] = None, user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None, persona: Optional[str] = None, system_prompt: Optional[str] = None, conversation_id: Optional[str] = None) -> str:
+        """
+        챗봇과 대화 (비동기 호출, 이벤트 루프를 막지 않음)
+        
+        공유 AsyncOpenAI 커넥션 풀을 사용하며, 동시 호출 수는 CHATBOT_MAX_CONCURRENCY로 제한
+        
+        Args:
+            user_message: 사용자 메시지
+            conversation_history: 대화 이력 (선택사항)
+            user_profile: 사용자 프로필 정보 (선택사항)
+            context_info: 현재 위치 및 날씨 정보 (선택사항)
+            persona: 페르소나 이름 (선택사항)
+            system_prompt: 페르소나 대신 사용할 시스템 프롬프트 (선택사항)
+            conversation_id: 대화 이력 요약 캐시 키 (선택사항)
+        
+        Returns:
+            챗봇의 응답 메시지
+        """
+        try:
+            messages = self._build_messages(user_message, conversation_history, user_profile, context_info, persona, system_prompt)
+            # 토큰 예산을 넘는 오래된 대화는 요약으로 대체
+            messages = await history_compactor.compact(messages, history_compactor.budget_for(self.max_tokens), conversation_id)
             
-            # OpenAI API 키 오류 처리
-            if "invalid_api_key" in error_str.lower() or "incorrect api key" in error_str.lower() or "401" in error_str:
-                return "죄송합니다. OpenAI API 키 설정에 문제가 있습니다. 관리자에게 문의해주세요."
+            # 클라이언트 확인
+            if async_client is None:
+                logger.error("OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요.")
+                return _NO_API_KEY_MESSAGE
             
-            # Rate limit 오류 처리
-            if "rate limit" in error_str.lower() or "429" in error_str:
-                return "죄송합니다. 요청이 너무 많습니다. 잠시 후 다시 시도해주세요."
+            # 챗봇 호출
+            async with _chat_semaphore:
+                response = await async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                )
             
-            # 기타 오류는 간단한 메시지로
-            return "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+            return self._extract_response(user_message, response)
+        
+        except Exception as e:
+            return self._error_message(e)
     
-    def analyze_price(self, product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+    async def chat_stream(self, user_message: str, conversation_history: Optional[List[Dict[str, str]]] = None, user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None, persona: Optional[str] = None, system_prompt: Optional[str] = None, conversation_id: Optional[str] = None) -> AsyncIterator[str]:
         """
-        가격 분석 요청
+        챗봇 응답을 토큰 조각 단위로 생성 (비동기 스트리밍)
+        
+        오류가 발생하면 사용자용 오류 메시지를 마지막 조각으로 전달
         
         Args:
-            product_name: 상품명
-            price: 가격 (선택사항)
-            context: 추가 컨텍스트 (선택사항)
+            user_message: 사용자 메시지
+            conversation_history: 대화 이력 (선택사항)
+            user_profile: 사용자 프로필 정보 (선택사항)
+            context_info: 현재 위치 및 날씨 정보 (선택사항)
+            persona: 페르소나 이름 (선택사항)
+            system_prompt: 페르소나 대신 사용할 시스템 프롬프트 (선택사항)
+            conversation_id: 대화 이력 요약 캐시 키 (선택사항)
         
-        Returns:
-            가격 분석 결과
+        Yields:
+            응답 텍스트 조각
         """
+        messages = self._build_messages(user_message, conversation_history, user_profile, context_info, persona, system_prompt)
+        messages = await history_compactor.compact(messages, history_compactor.budget_for(self.max_tokens), conversation_id)
+        
+        # 클라이언트 확인
+        if async_client is None:
+            logger.error("OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요.")
+            yield _NO_API_KEY_MESSAGE
+            return
+        
+        try:
+            async with _chat_semaphore:
+                stream = await async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        yield content
+                    if chunk.choices[0].finish_reason == "length":
+                        logger.warning(f"응답이 max_tokens({self.max_tokens})로 인해 잘렸습니다.")
+                        yield "\n\n(응답이 길어서 일부가 잘렸을 수 있습니다.)"
+        except Exception as e:
+            yield self._error_message(e)
+    
+    @staticmethod
+    def _price_message(product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+        """가격 분석 질문 구성"""
         # 가격 정보가 있으면 포함
         if price:
             message = f"{product_name}의 가격이 {price:,}원인데, 이 가격이 적정한지 분석해줘."
@@ -209,17 +365,74 @@ class PriceAnalyzerChatbot:
         # 추가 컨텍스트가 있으면 포함
         if context:
             message += f"\n추가 정보: {context}"
+        return message
+    
+    @staticmethod
+    def _narration_message(reference: PriceReference, context: Optional[str] = None) -> str:
+        """가격 기준표 통계를 근거로 설명을 요청하는 질문 구성"""
+        message = (
+            f"다음은 크롤링한 메뉴 가격 통계야. 수치는 바꾸지 말고 이 통계를 근거로 가격이 적정한지 짧게 설명해줘.\n"
+            f"{reference.describe()}"
+        )
+        if context:
+            message += f"\n추가 정보: {context}"
+        return message
+    
+    def analyze_price(self, product_name: str, price: Optional[float] = None, context: Optional[str] = None, area: Optional[str] = None, category: Optional[str] = None, narrate: bool = False) -> str:
+        """
+        가격 분석 요청 (가격 분석 전문가 페르소나로 호출)
         
-        # 시스템 메시지를 가격 분석 전문가로 변경
-        original_system = self.system_message
-        self.system_message = "너는 가격 분석 전문가야. 상품의 가격을 시장 가격, 경쟁사 가격, 가성비 등을 고려하여 분석해줘."
+        가격 기준표에 있는 메뉴는 기준표 통계로 바로 응답하고, 없으면 LLM으로 분석
         
-        try:
-            response = self.chat(message)
-            return response
-        finally:
-            # 원래 시스템 메시지로 복원
-            self.system_message = original_system
+        Args:
+            product_name: 상품명
+            price: 가격 (선택사항)
+            context: 추가 컨텍스트 (선택사항)
+            area: 지역 (예: "서울 종로구", 선택사항)
+            category: 업종 (예: "한식", 선택사항)
+            narrate: 기준표 결과를 LLM으로 풀어서 설명할지 여부
+        
+        Returns:
+            가격 분석 결과
+        """
+        reference = price_index.lookup(product_name, price, area, category)
+        if reference is None:
+            return self.chat(self._price_message(product_name, price, context), persona="price_analyst")
+        if not narrate:
+            return reference.describe()
+        return self.chat(self._narration_message(reference, context), persona="price_analyst")
+    
+    async def aanalyze_price_detail(self, product_name: str, price: Optional[float] = None, context: Optional[str] = None, area: Optional[str] = None, category: Optional[str] = None, narrate: bool = False) -> Tuple[str, Optional[PriceReference]]:
+        """
+        가격 분석 요청 (비동기, 기준표 조회 결과 포함)
+        
+        Args:
+            analyze_price와 동일
+        
+        Returns:
+            (가격 분석 결과, 기준표 조회 결과 또는 None)
+        """
+        reference = price_index.lookup(product_name, price, area, category)
+        if reference is None:
+            analysis = await self.achat(self._price_message(product_name, price, context), persona="price_analyst")
+        elif not narrate:
+            analysis = reference.describe()
+        else:
+            analysis = await self.achat(self._narration_message(reference, context), persona="price_analyst")
+        return analysis, reference
+    
+    async def aanalyze_price(self, product_name: str, price: Optional[float] = None, context: Optional[str] = None, area: Optional[str] = None, category: Optional[str] = None, narrate: bool = False) -> str:
+        """
+        가격 분석 요청 (비동기, 가격 분석 전문가 페르소나로 호출)
+        
+        Args:
+            analyze_price와 동일
+        
+        Returns:
+            가격 분석 결과
+        """
+        analysis, _ = await self.aanalyze_price_detail(product_name, price, context, area, category, narrate)
+        return analysis
 
 
 # 전역 챗봇 인스턴스
@@ -239,7 +452,7 @@ def simple_chat(user_message: str) -> str:
     return chatbot.chat(user_message)
 
 
-def analyze_price(product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+def analyze_price(product_name: str, price: Optional[float] = None, context: Optional[str] = None, area: Optional[str] = None, category: Optional[str] = None, narrate: bool = False) -> str:
     """
     가격 분석 함수
     
@@ -247,11 +460,37 @@ def analyze_price(product_name: str, price: Optional[float] = None, context: Opt
         product_name: 상품명
         price: 가격 (선택사항)
         context: 추가 컨텍스트 (선택사항)
+        area: 지역 (선택사항)
+        category: 업종 (선택사항)
+        narrate: 기준표 결과를 LLM으로 풀어서 설명할지 여부
     
     Returns:
         가격 분석 결과
     """
-    return chatbot.analyze_price(product_name, price, context)
+    return chatbot.analyze_price(product_name, price, context, area, category, narrate)
+
+
+async def aanalyze_price(product_name: str, price: Optional[float] = None, context: Optional[str] = None, area: Optional[str] = None, category: Optional[str] = None, narrate: bool = False) -> str:
+    """
+    가격 분석 함수 (비동기)
+    
+    Args:
+        analyze_price와 동일
+    
+    Returns:
+        가격 분석 결과
+    """
+    return await chatbot.aanalyze_price(product_name, price, context, area, category, narrate)
+
+
+async def aanalyze_price_detail(product_name: str, price: Optional[float] = None, context: Optional[str] = None, area: Optional[str] = None, category: Optional[str] = None, narrate: bool = False) -> Tuple[str, Optional[PriceReference]]:
+    """
+    가격 분석 함수 (비동기, 기준표 조회 결과 포함)
+    
+    Returns:
+        (가격 분석 결과, 기준표 조회 결과 또는 None)
+    """
+    return await chatbot.aanalyze_price_detail(product_name, price, context, area, category, narrate)
 
 
 # 테스트 코드
@@ -0,0 +1,392 @@
+"""
+메뉴 가격 기준표 모듈
+카카오맵 크롤링 결과(crawlerservice save_crawl_results JSONL)로 메뉴별 가격 분포를 미리 계산해 두고,
+가격 분석 요청은 LLM 호출 없이 이 기준표에서 바로 응답
+
+- 메뉴명 정규화: NFKC, 괄호 안 설명/공백/특수문자 제거, 소문자
+- 집계 단위: (메뉴, 업종, 지역)
+  - 업종: 카테고리의 두 번째 단계 (예: "음식점 > 한식 > 해장국" -> "한식"), 전체는 "*"
+  - 지역: 주소 앞 두 단어(시/도 + 시/군/구), 시/도, 전체("*")
+- 통계: 표본 수, 최소/최대, 10/25/50/75/90 백분위수
+- 저장: SQLite WITHOUT ROWID 테이블 (기본 키로 바로 조회)
+
+기준표 생성:
+    python -m app.price_index build --input menus.jsonl [--input more.jsonl] --output app/data/price_index.db
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+import unicodedata
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 가격 기준표 설정
+PRICE_INDEX_PATH = os.getenv("PRICE_INDEX_PATH", os.path.join(os.path.dirname(__file__), "data", "price_index.db"))
+# 이 표본 수 미만인 (메뉴, 업종, 지역) 조합은 저장하지 않음
+PRICE_INDEX_MIN_SAMPLES = int(os.getenv("PRICE_INDEX_MIN_SAMPLES", "3"))
+# 이 범위를 벗어난 가격은 크롤링 오류로 보고 제외
+PRICE_INDEX_MIN_PRICE = int(os.getenv("PRICE_INDEX_MIN_PRICE", "500"))
+PRICE_INDEX_MAX_PRICE = int(os.getenv("PRICE_INDEX_MAX_PRICE", "1000000"))
+
+ALL = "*"
+_PERCENTILES = (10, 25, 50, 75, 90)
+# 부분 일치로 찾을 메뉴명 최소 길이 ("밥", "국" 같은 한 글자 메뉴가 아무 질문에나 걸리지 않도록)
+_MIN_PARTIAL_LENGTH = 2
+
+_BRACKETS = re.compile(r"[\(\[\{<（［【].*?[\)\]\}>）］】]")
+_NON_WORD = re.compile(r"[\W_]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_stats (
+    item TEXT NOT NULL,
+    category TEXT NOT NULL,
+    area TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    min INTEGER NOT NULL,
+    p10 INTEGER NOT NULL,
+    p25 INTEGER NOT NULL,
+    p50 INTEGER NOT NULL,
+    p75 INTEGER NOT NULL,
+    p90 INTEGER NOT NULL,
+    max INTEGER NOT NULL,
+    PRIMARY KEY (item, category, area)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+def normalize_item(name: str) -> str:
+    """메뉴명 정규화 ("김치찌개 (2인)" -> "김치찌개")"""
+    text = unicodedata.normalize("NFKC", name or "")
+    text = _BRACKETS.sub("", text)
+    return _NON_WORD.sub("", text).lower()
+
+def normalize_area(area: Optional[str]) -> str:
+    """지역명 정규화 (공백 정리)"""
+    return " ".join((area or "").split())
+
+def category_of(category_name: Optional[str]) -> str:
+    """카카오 카테고리에서 업종 추출 ("음식점 > 한식 > 해장국" -> "한식")"""
+    parts = [part.strip() for part in (category_name or "").split(">") if part.strip()]
+    if len(parts) >= 2:
+        return parts[1]
+    return parts[0] if parts else ALL
+
+def areas_of(address: Optional[str]) -> List[str]:
+    """주소에서 집계 지역 목록 추출 ("서울 종로구 관철동 1" -> ["서울 종로구", "서울", "*"])"""
+    tokens = (address or "").split()
+    areas = []
+    if len(tokens) >= 2:
+        areas.append(f"{tokens[0]} {tokens[1]}")
+    if tokens:
+        areas.append(tokens[0])
+    areas.append(ALL)
+    return areas
+
+def _percentile(sorted_prices: List[int], q: float) -> int:
+    """선형 보간 백분위수"""
+    position = (len(sorted_prices) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_prices) - 1)
+    value = sorted_prices[lower] + (sorted_prices[upper] - sorted_prices[lower]) * (position - lower)
+    return int(round(value))
+
+# ============================================================================
+# 기준표 생성
+# ============================================================================
+
+def _read_places(paths: Iterable[str]) -> Iterable[Dict]:
+    """JSONL 파일에서 장소 레코드 읽기 (깨진 줄은 건너뜀)"""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"{path}:{line_no} JSON 파싱 실패, 건너뜀")
+
+def collect_prices(paths: Iterable[str]) -> Dict[Tuple[str, str, str], List[int]]:
+    """
+    크롤링 결과에서 (메뉴, 업종, 지역)별 가격 목록 수집
+    
+    같은 장소가 여러 번 크롤링된 경우 가장 최근 레코드의 메뉴 가격만 사용
+    """
+    # (장소 ID, 메뉴) -> (crawled_at, 업종, 지역 목록, 가격)
+    latest: Dict[Tuple[str, str], Tuple[int, str, List[str], int]] = {}
+    for place in _read_places(paths):
+        place_id = str(place.get("kakao_place_id") or f"{place.get('name')}|{place.get('address')}")
+        crawled_at = int(place.get("crawled_at") or 0)
+        category = category_of(place.get("category"))
+        areas = areas_of(place.get("address"))
+        for menu in place.get("menus") or []:
+            price = menu.get("price")
+            item = normalize_item(menu.get("name", ""))
+            if not item or not isinstance(price, (int, float)):
+                continue
+            if not PRICE_INDEX_MIN_PRICE <= price <= PRICE_INDEX_MAX_PRICE:
+                continue
+            key = (place_id, item)
+            previous = latest.get(key)
+            if previous is None or crawled_at >= previous[0]:
+                latest[key] = (crawled_at, category, areas, int(price))
+    
+    prices: Dict[Tuple[str, str, str], List[int]] = {}
+    for (_, item), (_, category, areas, price) in latest.items():
+        for cat in {category, ALL}:
+            for area in areas:
+                prices.setdefault((item, cat, area), []).append(price)
+    return prices
+
+def build_index(input_paths: List[str], output_path: str = PRICE_INDEX_PATH, min_samples: int = PRICE_INDEX_MIN_SAMPLES) -> Dict[str, int]:
+    """
+    크롤링 JSONL로 가격 기준표 생성
+    
+    임시 파일에 쓴 뒤 교체하므로 서비스가 읽는 중에도 안전하게 재생성 가능
+    
+    Args:
+        input_paths: 크롤링 결과 JSONL 경로 목록
+        output_path: 기준표 SQLite 경로
+        min_samples: 저장할 최소 표본 수
+    
+    Returns:
+        생성 통계 (메뉴 수, 행 수)
+    """
+    prices = collect_prices(input_paths)
+    rows = []
+    for (item, category, area), values in prices.items():
+        if len(values) < min_samples:
+            continue
+        values.sort()
+        rows.append((
+            item, category, area, len(values), values[0],
+            *(_percentile(values, q) for q in _PERCENTILES),
+            values[-1]
+        ))
+    
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(_SCHEMA)
+        conn.executemany("INSERT INTO price_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sorted(rows))
+        items = len({row[0] for row in rows})
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("built_at", str(int(time.time()))),
+            ("items", str(items)),
+            ("rows", str(len(rows)))
+        ])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, output_path)
+    
+    logger.info(f"가격 기준표 생성 완료: 메뉴 {items}개, {len(rows)}행 -> {output_path}")
+    return {"items": items, "rows": len(rows)}
+
+# ============================================================================
+# 조회
+# ============================================================================
+
+@dataclass
+class PriceReference:
+    """기준표 조회 결과"""
+    item: str
+    category: str
+    area: str
+    count: int
+    min: int
+    p10: int
+    p25: int
+    p50: int
+    p75: int
+    p90: int
+    max: int
+    price: Optional[float] = None
+    percentile: Optional[float] = None  # 입력 가격의 추정 백분위
+    verdict: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+    
+    def scope(self) -> str:
+        """기준 범위 설명 ("서울 종로구 한식")"""
+        parts = [part for part in (self.area, self.category) if part != ALL]
+        return " ".join(parts) if parts else "전체"
+    
+    def describe(self) -> str:
+        """LLM 없이 만드는 분석 문장"""
+        text = (
+            f"'{self.item}'의 {self.scope()} 기준 가격은 중앙값 {self.p50:,}원, "
+            f"보통 {self.p25:,}~{self.p75:,}원입니다 (최저 {self.min:,}원, 최고 {self.max:,}원, 표본 {self.count}개)."
+        )
+        if self.price is not None and self.verdict:
+            text += f" 입력하신 {self.price:,.0f}원은 하위 약 {self.percentile:.0f}% 수준으로 '{self.verdict}' 편입니다."
+        return text
+
+def _estimate_percentile(reference: PriceReference, price: float) -> float:
+    """저장된 백분위수 사이를 선형 보간하여 가격의 백분위 추정"""
+    points = [(0, reference.min), *zip(_PERCENTILES, (reference.p10, reference.p25, reference.p50, reference.p75, reference.p90)), (100, reference.max)]
+    if price <= points[0][1]:
+        return 0.0
+    for (q_low, v_low), (q_high, v_high) in zip(points, points[1:]):
+        if price <= v_high:
+            if v_high == v_low:
+                return float(q_high)
+            return q_low + (q_high - q_low) * (price - v_low) / (v_high - v_low)
+    return 100.0
+
+def _verdict(reference: PriceReference, price: float) -> str:
+    """가격 구간별 판정"""
+    if price < reference.p10:
+        return "매우 저렴"
+    if price < reference.p25:
+        return "저렴"
+    if price <= reference.p75:
+        return "적정"
+    if price <= reference.p90:
+        return "다소 비쌈"
+    return "비쌈"
+
+class PriceIndex:
+    """가격 기준표 조회 (읽기 전용, 처음 조회할 때 열고 파일이 바뀌면 다시 엶)"""
+    
+    def __init__(self, path: str = PRICE_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._mtime: Optional[float] = None
+        # 부분 일치용 메뉴명 (긴 이름 우선)
+        self._items: List[str] = []
+        self._item_set: set = set()
+        self._stats = {"hits": 0, "misses": 0}
+    
+    def _ensure_open(self) -> Optional[sqlite3.Connection]:
+        """기준표 열기 (없으면 None)"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if self._conn is not None and mtime == self._mtime:
+            return self._conn
+        with self._lock:
+            if self._conn is not None and mtime == self._mtime:
+                return self._conn
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            items = [row[0] for row in conn.execute("SELECT DISTINCT item FROM price_stats")]
+            if self._conn is not None:
+                self._conn.close()
+            self._items = sorted(items, key=len, reverse=True)
+            self._item_set = set(items)
+            self._conn = conn
+            self._mtime = mtime
+            logger.info(f"가격 기준표 로드: {self.path} (메뉴 {len(items)}개)")
+        return self._conn
+    
+    def match_item(self, product_name: str) -> Optional[str]:
+        """
+        상품명에 해당하는 기준표 메뉴명
+        
+        정규화한 이름이 그대로 있으면 사용하고, 없으면 상품명에 포함된 가장 긴 메뉴명 사용
+        ("종로 김치찌개 1인분" -> "김치찌개")
+        """
+        if self._ensure_open() is None:
+            return None
+        name = normalize_item(product_name)
+        if not name:
+            return None
+        if name in self._item_set:
+            return name
+        for item in self._items:
+            if len(item) < _MIN_PARTIAL_LENGTH:
+                break
+            if item in name:
+                return item
+        return None
+    
+    def lookup(self, product_name: str, price: Optional[float] = None, area: Optional[str] = None, category: Optional[str] = None) -> Optional[PriceReference]:
+        """
+        가격 기준 조회
+        
+        (업종, 지역) 조합을 좁은 범위부터 시도: 지정 업종+지역 -> 업종+시/도 -> 전체 업종+지역 -> ... -> 전체
+        
+        Args:
+            product_name: 상품명 (메뉴명)
+            price: 판정할 가격 (선택사항)
+            area: 지역 (예: "서울 종로구", 선택사항)
+            category: 업종 (예: "한식", 선택사항)
+        
+        Returns:
+            기준 통계와 판정, 기준표에 없으면 None
+        """
+        conn = self._ensure_open()
+        item = self.match_item(product_name) if conn is not None else None
+        if item is None:
+            self._stats["misses"] += 1
+            return None
+        
+        area = normalize_area(area)
+        areas = [a for a in dict.fromkeys([area, area.split(" ")[0], ALL]) if a]
+        categories = [c for c in dict.fromkeys([(category or "").strip(), ALL]) if c]
+        for area_key in areas:
+            for category_key in categories:
+                row = conn.execute(
+                    "SELECT item, category, area, count, min, p10, p25, p50, p75, p90, max "
+                    "FROM price_stats WHERE item = ? AND category = ? AND area = ?",
+                    (item, category_key, area_key)
+                ).fetchone()
+                if row is None:
+                    continue
+                self._stats["hits"] += 1
+                reference = PriceReference(*row)
+                if price:
+                    reference.price = price
+                    reference.percentile = _estimate_percentile(reference, price)
+                    reference.verdict = _verdict(reference, price)
+                return reference
+        self._stats["misses"] += 1
+        return None
+    
+    def stats(self) -> Dict:
+        """조회 통계"""
+        conn = self._ensure_open()
+        info = {**self._stats, "path": self.path, "loaded": conn is not None, "items": len(self._items)}
+        if conn is not None:
+            info.update({key: int(value) for key, value in conn.execute("SELECT key, value FROM meta")})
+        return info
+
+# 전역 가격 기준표
+price_index = PriceIndex()
+
+def main():
+    parser = argparse.ArgumentParser(description="메뉴 가격 기준표 생성")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="크롤링 JSONL로 기준표 생성")
+    build.add_argument("--input", action="append", required=True, help="크롤링 결과 JSONL (여러 번 지정 가능)")
+    build.add_argument("--output", default=PRICE_INDEX_PATH, help="기준표 SQLite 경로")
+    build.add_argument("--min-samples", type=int, default=PRICE_INDEX_MIN_SAMPLES, help="저장할 최소 표본 수")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    result = build_index(args.input, args.output, args.min_samples)
+    print(json.dumps(result, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+챗봇 페르소나별 시스템 프롬프트 템플릿
+템플릿은 모듈 로드 시 한 번 만들어 두고, 요청마다 사용자 프로필/위치/날씨를 렌더링하여 사용
+(공유 상태를 바꾸지 않으므로 여러 스레드/비동기 작업에서 동시에 사용해도 안전)
+"""
+from dataclasses import dataclass
+from string import Template
+from typing import Dict, Optional, Tuple
+
+# 기본 페르소나
+DEFAULT_PERSONA = "travel_assistant"
+
+# 프로필 항목 (요청 키, 표시 이름) - 표시 순서 고정
+_PROFILE_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("gender", "성별"),
+    ("age", "생년월일"),
+    ("nationality", "국적/거주지"),
+    ("religion", "종교"),
+    ("dietary", "식이 제한"),
+)
+
+_CONTEXT_TEMPLATE = Template("$system_prompt\n\n$context\n\n위 정보들을 종합적으로 고려하여 개인화되고 상황에 맞는 답변을 제공해줘.")
+_LOCATION_TEMPLATE = Template("\n현재 위치: 위도 $lat, 경도 $lng")
+_WEATHER_TEMPLATE = Template("현재 날씨: $city 지역, $temp°C, $description")
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """페르소나 하나의 시스템 프롬프트 (불변)"""
+    name: str
+    system_prompt: str
+    
+    def render(self, user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None) -> str:
+        """
+        시스템 메시지 렌더링
+        
+        Args:
+            user_profile: 사용자 프로필 정보 (선택사항)
+            context_info: 현재 위치 및 날씨 정보 (선택사항)
+        
+        Returns:
+            프로필/컨텍스트가 있으면 이를 덧붙인 시스템 메시지, 없으면 기본 프롬프트
+        """
+        context = render_context(user_profile, context_info)
+        if not context:
+            return self.system_prompt
+        return _CONTEXT_TEMPLATE.substitute(system_prompt=self.system_prompt, context=context)
+
+def render_context(user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None) -> str:
+    """사용자 프로필, 현재 위치, 날씨 정보를 시스템 메시지용 텍스트로 변환"""
+    context_parts = []
+    
+    # 사용자 프로필 정보
+    if user_profile:
+        profile_parts = [f"{label}: {user_profile[key]}" for key, label in _PROFILE_FIELDS if user_profile.get(key)]
+        if profile_parts:
+            context_parts.append("사용자 정보:")
+            context_parts.extend(profile_parts)
+    
+    # 현재 위치 정보
+    if context_info and context_info.get('location'):
+        location = context_info['location']
+        context_parts.append(_LOCATION_TEMPLATE.substitute(
+            lat=location.get('lat', 'N/A'),
+            lng=location.get('lng', 'N/A')
+        ))
+    
+    # 날씨 정보
+    if context_info and context_info.get('weather'):
+        weather = context_info['weather']
+        context_parts.append(_WEATHER_TEMPLATE.substitute(
+            city=weather.get('city', '알 수 없음'),
+            temp=weather.get('temp', 'N/A'),
+            description=weather.get('description', '')
+        ))
+    
+    return "\n".join(context_parts)
+
+# 페르소나별 템플릿
+PERSONAS: Dict[str, PromptTemplate] = {
+    template.name: template
+    for template in (
+        PromptTemplate(
+            "travel_assistant",
+            "너는 친절한 한국을 여행 온 외국인 맞춤형 한국어 챗봇이야. 사용자의 질문에 정확하고 도움이 되는 답변을 제공해줘."
+        ),
+        PromptTemplate(
+            "price_analyst",
+            "너는 가격 분석 전문가야. 상품의 가격을 시장 가격, 경쟁사 가격, 가성비 등을 고려하여 분석해줘."
+        ),
+    )
+}
+
+def get_prompt_template(persona: Optional[str] = None, system_prompt: Optional[str] = None) -> PromptTemplate:
+    """
+    호출에 사용할 프롬프트 템플릿 선택
+    
+    Args:
+        persona: 페르소나 이름 (없으면 기본 페르소나)
+        system_prompt: 지정 시 페르소나 대신 이 시스템 프롬프트 사용
+    
+    Raises:
+        ValueError: 등록되지 않은 페르소나
+    """
+    if system_prompt:
+        return PromptTemplate("custom", system_prompt)
+    name = persona or DEFAULT_PERSONA
+    template = PERSONAS.get(name)
+    if template is None:
+        raise ValueError(f"지원하지 않는 페르소나: {name} (사용 가능: {', '.join(PERSONAS)})")
+    return template
@@ -14,18 +14,76 @@ HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
 
+# 로컬 CPU LLM (OPENAI_API_KEY가 없을 때 사용)
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "google/flan-t5-base")
+LOCAL_LLM_TASK = os.getenv("LOCAL_LLM_TASK", "text2text-generation")  # text2text-generation(T5 등), text-generation(GPT 계열)
+LOCAL_LLM_BACKEND = os.getenv("LOCAL_LLM_BACKEND", "int8")  # int8(PyTorch 동적 양자화), onnx(ONNX Runtime), fp32
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", str(os.cpu_count() or 1)))  # 생성 연산 스레드 수
+LOCAL_LLM_MAX_NEW_TOKENS = int(os.getenv("LOCAL_LLM_MAX_NEW_TOKENS", "128"))  # 답변 최대 토큰 수
+LOCAL_LLM_MAX_INPUT_TOKENS = int(os.getenv("LOCAL_LLM_MAX_INPUT_TOKENS", "512"))  # 프롬프트 최대 토큰 수 (넘으면 앞쪽 컨텍스트부터 자름)
+LOCAL_LLM_WARMUP = os.getenv("LOCAL_LLM_WARMUP", "true").lower() == "true"  # 시작 시 한 번 생성하여 첫 요청 지연 제거
+LOCAL_LLM_ONNX_DIR = os.getenv("LOCAL_LLM_ONNX_DIR", "./models/onnx")  # ONNX 변환 모델 저장 위치
+
 # 벡터 저장소 설정
 VECTOR_DB_TYPE = os.getenv("VECTOR_DB_TYPE", "chroma")  # chroma 또는 faiss
 VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "./vector_db")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "documents")
+# FAISS 인덱스 설정 (VECTOR_DB_TYPE=faiss)
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "hnsw")  # hnsw 또는 flat
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+# WAL에 이 건수만큼 쌓이면 백그라운드에서 스냅샷 생성
+FAISS_COMPACT_EVERY = int(os.getenv("FAISS_COMPACT_EVERY", "1000"))
+# 스냅샷 인덱스를 mmap으로 열기 (워커 간 페이지 캐시 공유, 빠른 시작)
+FAISS_MMAP = os.getenv("FAISS_MMAP", "true").lower() == "true"
+# 메타데이터 필터에 맞는 문서가 이 수 이하면 인덱스 대신 정확히 거리 계산
+FAISS_FILTER_BRUTE_FORCE_MAX = int(os.getenv("FAISS_FILTER_BRUTE_FORCE_MAX", "5000"))
+
+# 임베딩 캐시 / 배치 설정
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(VECTOR_DB_PATH, "embedding_cache.db"))
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")  # float32, float16, int8
+# OpenAI 임베딩 요청당 최대 입력 수 / 최대 토큰 수
+OPENAI_EMBEDDING_BATCH_SIZE = int(os.getenv("OPENAI_EMBEDDING_BATCH_SIZE", "512"))
+OPENAI_EMBEDDING_BATCH_TOKENS = int(os.getenv("OPENAI_EMBEDDING_BATCH_TOKENS", "200000"))
+# sentence-transformers 배치 크기 / 정규화 여부
+HF_EMBEDDING_MODEL = os.getenv("HF_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+HF_EMBEDDING_BATCH_SIZE = int(os.getenv("HF_EMBEDDING_BATCH_SIZE", "64"))
+HF_EMBEDDING_NORMALIZE = os.getenv("HF_EMBEDDING_NORMALIZE", "true").lower() == "true"
 
 # 검색 설정
 TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "5"))
+MAX_TOP_K = int(os.getenv("MAX_TOP_K", "50"))  # 요청별 top_k 상한
+# /search 결과의 최소 유사도 (0~1, 코사인 유사도 기준 - 거리에서 변환한 점수와 비교)
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+# MMR(Maximal Marginal Relevance) - /query 컨텍스트에서 서로 겹치는 청크를 줄임
+RAG_USE_MMR = os.getenv("RAG_USE_MMR", "false").lower() == "true"  # 요청에 mmr 값이 없을 때 기본 사용 여부
+RAG_MMR_FETCH_K = int(os.getenv("RAG_MMR_FETCH_K", "20"))  # MMR 후보 수 (top_k보다 작으면 top_k)
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.5"))  # 1이면 유사도만, 0이면 다양성만 고려
+
+# 질의 캐시 (워커당 메모리, 문서가 추가되면 비움) - 항목 수가 0이면 해당 캐시 사용 안 함
+RAG_RETRIEVAL_CACHE_SIZE = int(os.getenv("RAG_RETRIEVAL_CACHE_SIZE", "1024"))  # 검색 결과 캐시 항목 수
+RAG_ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "1024"))  # 답변 캐시 항목 수
+RAG_CACHE_TTL_SECONDS = float(os.getenv("RAG_CACHE_TTL_SECONDS", "600"))  # 캐시 유효 시간 (0이면 만료 없음)
+
+# 동시 실행 설정 (워커당)
+RAG_MAX_CONCURRENT_QUERIES = int(os.getenv("RAG_MAX_CONCURRENT_QUERIES", "16"))  # 동시에 진행할 최대 LLM 답변 생성 수 (초과 요청은 대기)
+RAG_MAX_CONCURRENT_SEARCHES = int(os.getenv("RAG_MAX_CONCURRENT_SEARCHES", "32"))  # 동시에 진행할 최대 검색 수
+RAG_THREAD_POOL_SIZE = int(os.getenv("RAG_THREAD_POOL_SIZE", "8"))  # 동기 작업(질의 임베딩, 벡터 검색, 문서 추가)용 스레드 수
 
 # 데이터 디렉토리
 DATA_DIR = os.getenv("DATA_DIR", "./data")
 
+# 파일 적재 설정 (/documents/upload, python -m app.ingest)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))  # 파싱 프로세스 수
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))  # 청크 최대 글자 수
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))  # 이웃 청크와 겹치는 글자 수
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))  # 벡터 저장소에 한 번에 쓰는 청크 수
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))  # 저장 대기 배치 수 (초과하면 파싱을 멈추고 대기)
+INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH", os.path.join(VECTOR_DB_PATH, "ingest_state.db"))
+INGEST_WATCH_INTERVAL = float(os.getenv("INGEST_WATCH_INTERVAL", "10"))  # 디렉토리 감시 주기 (초)
+
 # 서버 설정
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "9002"))
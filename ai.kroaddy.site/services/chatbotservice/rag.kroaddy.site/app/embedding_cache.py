@@ -0,0 +1,168 @@
+"""
+임베딩 캐시 모듈
+텍스트 내용 해시를 키로 임베딩을 메모리(LRU)와 디스크(SQLite)에 저장하여 같은 텍스트를 다시 임베딩하지 않음
+
+- 키: sha256(임베딩 모델 ID + 텍스트) - 모델이 바뀌면 자동으로 다른 키
+- 저장 형식: float32, float16(기본), int8(벡터별 스케일과 함께 저장)
+- 캐시에서 읽은 값과 새로 계산한 값이 같도록, 새 임베딩도 저장 형식으로 변환한 값을 반환
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    dtype TEXT NOT NULL,
+    scale REAL NOT NULL,
+    vector BLOB NOT NULL
+) WITHOUT ROWID
+"""
+
+def content_key(model_id: str, text: str) -> bytes:
+    """임베딩 캐시 키 (모델 ID + 텍스트 해시)"""
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).digest()
+
+def encode_vector(vector: List[float], dtype: str) -> tuple:
+    """벡터를 저장 형식으로 변환 -> (scale, bytes)"""
+    array = np.asarray(vector, dtype=np.float32)
+    if dtype == "int8":
+        max_abs = float(np.abs(array).max()) if array.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        return scale, np.round(array / scale).astype(np.int8).tobytes()
+    return 1.0, array.astype(dtype).tobytes()
+
+def decode_vector(data: bytes, dtype: str, scale: float) -> np.ndarray:
+    """저장 형식을 float32 벡터로 복원"""
+    array = np.frombuffer(data, dtype=dtype).astype(np.float32)
+    if dtype == "int8":
+        array *= scale
+    return array
+
+class EmbeddingCache:
+    """내용 해시 기반 임베딩 캐시 (메모리 LRU + SQLite)"""
+    
+    def __init__(self, path: Optional[str], max_memory_entries: int = 10000, dtype: str = "float16"):
+        """
+        Args:
+            path: SQLite 파일 경로 (없으면 메모리 캐시만 사용)
+            max_memory_entries: 메모리에 보관할 최대 임베딩 수
+            dtype: 저장 형식 (float32, float16, int8)
+        """
+        if dtype not in _SUPPORTED_DTYPES:
+            raise ValueError(f"지원하지 않는 임베딩 캐시 형식: {dtype} (사용 가능: {', '.join(_SUPPORTED_DTYPES)})")
+        self.path = path
+        self.dtype = dtype
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stored": 0}
+        # SQLite 행 수 (시작할 때 한 번 세고 이후 새로 저장한 행만 더함 - 통계 조회 때마다 세지 않도록)
+        self._disk_entries = 0
+        
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            logger.info(f"임베딩 캐시 사용: {path} ({dtype})")
+    
+    def _remember(self, key: bytes, vector: np.ndarray):
+        """메모리 LRU에 추가 (lock 안에서 호출)"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        캐시된 임베딩 조회
+        
+        Returns:
+            찾은 키 -> 벡터 (없는 키는 포함하지 않음)
+        """
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                else:
+                    missing.append(key)
+            self._stats["memory_hits"] += len(found)
+            
+            if missing and self._conn is not None:
+                # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, dtype, scale, vector FROM embeddings WHERE key IN ({placeholders})",
+                        chunk
+                    ).fetchall()
+                    for key, dtype, scale, data in rows:
+                        vector = decode_vector(data, dtype, scale)
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self._stats["disk_hits"] += 1
+            self._stats["misses"] += len(set(keys) - found.keys())
+        return found
+    
+    def put_many(self, items: Dict[bytes, List[float]]) -> Dict[bytes, np.ndarray]:
+        """
+        임베딩 저장
+        
+        Returns:
+            키 -> 저장 형식에서 복원한 벡터 (캐시 조회 결과와 동일한 값)
+        """
+        stored: Dict[bytes, np.ndarray] = {}
+        rows = []
+        for key, vector in items.items():
+            scale, data = encode_vector(vector, self.dtype)
+            stored[key] = decode_vector(data, self.dtype, scale)
+            rows.append((key, self.dtype, scale, data))
+        
+        with self._lock:
+            for key, vector in stored.items():
+                self._remember(key, vector)
+            if self._conn is not None and rows:
+                inserted = self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows).rowcount
+                if inserted < len(rows):
+                    # 이미 있던 키는 새 형식으로 교체 (행 수는 그대로)
+                    self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+                self._conn.commit()
+                self._disk_entries += inserted
+            self._stats["stored"] += len(rows)
+        return stored
+    
+    def stats(self) -> Dict:
+        """캐시 통계 (disk_entries는 시작 이후 다른 프로세스가 저장한 행을 포함하지 않음)"""
+        with self._lock:
+            info = {**self._stats, "memory_entries": len(self._memory), "dtype": self.dtype, "path": self.path}
+            if self._conn is not None:
+                info["disk_entries"] = self._disk_entries
+        return info
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -3,31 +3,172 @@
 """
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from app.config import EMBEDDING_MODEL, OPENAI_API_KEY, HUGGINGFACE_API_KEY
+from langchain_core.embeddings import Embeddings
+from app.config import (
+    EMBEDDING_MODEL, OPENAI_API_KEY, HUGGINGFACE_API_KEY,
+    EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_SIZE, EMBEDDING_CACHE_DTYPE,
+    OPENAI_EMBEDDING_BATCH_SIZE, OPENAI_EMBEDDING_BATCH_TOKENS,
+    HF_EMBEDDING_MODEL, HF_EMBEDDING_BATCH_SIZE, HF_EMBEDDING_NORMALIZE
+)
+from app.embedding_cache import EmbeddingCache, content_key
+from typing import Optional, List, Dict
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# 프로세스 공유 임베딩 생성기 (get_embedding_generator로 처음 사용할 때 생성)
+_shared_generator: Optional["EmbeddingGenerator"] = None
+_shared_lock = threading.Lock()
+
+class CachedEmbeddings(Embeddings):
+    """
+    캐시 + 마이크로 배치 임베딩
+    
+    벡터 저장소(Chroma/FAISS)의 embedding_function으로 그대로 사용 가능.
+    캐시에 없는 텍스트만 모아서 (중복 제거 후) 입력 수/토큰 수 한도에 맞춘 배치로 백엔드에 요청
+    """
+    
+    def __init__(self, backend: Embeddings, model_id: str, cache: Optional[EmbeddingCache] = None, max_batch_size: int = 512, max_batch_tokens: Optional[int] = None):
+        """
+        Args:
+            backend: 실제 임베딩 모델 (OpenAI 또는 HuggingFace)
+            model_id: 캐시 키에 포함할 모델 식별자
+            cache: 임베딩 캐시 (없으면 배치만 적용)
+            max_batch_size: 백엔드 호출당 최대 입력 수
+            max_batch_tokens: 백엔드 호출당 최대 토큰 수 (없으면 제한 없음)
+        """
+        self.backend = backend
+        self.model_id = model_id
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._encoding = None
+        if max_batch_tokens and TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # 인코딩 파일을 받을 수 없는 환경에서는 바이트 수로 추정
+                self._encoding = None
+        self._stats = {"backend_calls": 0, "embedded_texts": 0}
+    
+    def _count_tokens(self, text: str) -> int:
+        """토큰 수 (tiktoken이 없으면 UTF-8 바이트 수 기준으로 넉넉하게 추정)"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(text.encode("utf-8")) // 2 + 1
+    
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """입력 수/토큰 수 한도에 맞춰 배치 분할"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = self._count_tokens(text) if self.max_batch_tokens else 0
+            if current and (
+                len(current) >= self.max_batch_size
+                or (self.max_batch_tokens and current_tokens + tokens > self.max_batch_tokens)
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _embed_missing(self, texts: List[str]) -> List[List[float]]:
+        """백엔드로 배치 임베딩"""
+        vectors: List[List[float]] = []
+        for batch in self._batches(texts):
+            vectors.extend(self.backend.embed_documents(batch))
+            self._stats["backend_calls"] += 1
+        self._stats["embedded_texts"] += len(texts)
+        return vectors
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """여러 문서를 벡터로 변환 (캐시에 없는 문서만 계산)"""
+        if not texts:
+            return []
+        if self.cache is None:
+            unique = list(dict.fromkeys(texts))
+            vectors = dict(zip(unique, self._embed_missing(unique)))
+            return [vectors[text] for text in texts]
+        
+        keys = [content_key(self.model_id, text) for text in texts]
+        found = self.cache.get_many(keys)
+        
+        # 캐시에 없는 텍스트 (같은 텍스트는 한 번만 계산)
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self._embed_missing(list(missing.values()))
+            found.update(self.cache.put_many(dict(zip(missing.keys(), vectors))))
+        
+        return [found[key].tolist() for key in keys]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """검색 질의를 벡터로 변환 (반복 질의는 캐시 사용)"""
+        if self.cache is None:
+            return self.backend.embed_query(text)
+        key = content_key(self.model_id, text)
+        found = self.cache.get_many([key])
+        if key not in found:
+            vector = self.backend.embed_query(text)
+            self._stats["backend_calls"] += 1
+            self._stats["embedded_texts"] += 1
+            found = self.cache.put_many({key: vector})
+        return found[key].tolist()
+    
+    def stats(self) -> Dict:
+        """배치/캐시 통계"""
+        info = dict(self._stats)
+        if self.cache is not None:
+            info["cache"] = self.cache.stats()
+        return info
+
 class EmbeddingGenerator:
     """임베딩 생성기"""
     
     def __init__(self):
-        self.embeddings = self._initialize_embeddings()
+        self.backend, model_id, max_batch_size, max_batch_tokens = self._initialize_embeddings()
+        cache = None
+        if EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_SIZE, EMBEDDING_CACHE_DTYPE)
+        # 벡터 저장소에는 캐시/배치가 적용된 임베딩을 전달
+        self.embeddings = CachedEmbeddings(self.backend, model_id, cache, max_batch_size, max_batch_tokens)
     
     def _initialize_embeddings(self):
-        """임베딩 모델 초기화"""
+        """임베딩 모델 초기화 -> (모델, 캐시용 모델 ID, 배치당 최대 입력 수, 배치당 최대 토큰 수)"""
         try:
             if OPENAI_API_KEY:
                 logger.info(f"OpenAI 임베딩 모델 사용: {EMBEDDING_MODEL}")
-                return OpenAIEmbeddings(
+                backend = OpenAIEmbeddings(
                     model=EMBEDDING_MODEL,
-                    openai_api_key=OPENAI_API_KEY
+                    openai_api_key=OPENAI_API_KEY,
+                    chunk_size=OPENAI_EMBEDDING_BATCH_SIZE
                 )
+                return backend, f"openai:{EMBEDDING_MODEL}", OPENAI_EMBEDDING_BATCH_SIZE, OPENAI_EMBEDDING_BATCH_TOKENS
             else:
-                logger.info("HuggingFace 임베딩 모델 사용 (sentence-transformers)")
-                return HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/all-MiniLM-L6-v2"
+                logger.info(f"HuggingFace 임베딩 모델 사용 (sentence-transformers): {HF_EMBEDDING_MODEL}")
+                backend = HuggingFaceEmbeddings(
+                    model_name=HF_EMBEDDING_MODEL,
+                    encode_kwargs={
+                        "batch_size": HF_EMBEDDING_BATCH_SIZE,
+                        "normalize_embeddings": HF_EMBEDDING_NORMALIZE
+                    }
                 )
+                model_id = f"hf:{HF_EMBEDDING_MODEL}:{'norm' if HF_EMBEDDING_NORMALIZE else 'raw'}"
+                # sentence-transformers가 batch_size 단위로 나눠 계산하므로 한 번에 넘기는 양은 크게 설정
+                return backend, model_id, HF_EMBEDDING_BATCH_SIZE * 16, None
         except Exception as e:
             logger.error(f"임베딩 모델 초기화 실패: {e}")
             raise
@@ -47,4 +188,20 @@ class EmbeddingGenerator:
         except Exception as e:
             logger.error(f"문서 임베딩 생성 실패: {e}")
             raise
+    
+    def stats(self) -> dict:
+        """임베딩 배치/캐시 통계"""
+        return self.embeddings.stats()
 
+def get_embedding_generator() -> EmbeddingGenerator:
+    """
+    공유 임베딩 생성기 반환
+    
+    임베딩 모델은 무겁기 때문에 프로세스당 한 번만 로드하고 모든 벡터 저장소가 함께 사용
+    """
+    global _shared_generator
+    if _shared_generator is None:
+        with _shared_lock:
+            if _shared_generator is None:
+                _shared_generator = EmbeddingGenerator()
+    return _shared_generator
@@ -0,0 +1,896 @@
+"""
+추가 전용(append-only) FAISS 벡터 저장소
+문서를 추가할 때 전체 인덱스를 다시 저장하지 않고, 새 벡터만 WAL(write-ahead log)에 기록한 뒤 메모리의 델타 인덱스에 추가
+
+- 기본 인덱스: 마지막 스냅샷의 IndexIDMap2(HNSW 또는 Flat, L2 거리)를 mmap으로 열어 사용
+  (벡터를 역직렬화하지 않아 바로 열리고, 같은 파일을 여는 여러 워커가 페이지 캐시를 공유. mmap 인덱스에는 추가할 수 없으므로 읽기 전용)
+- 델타 인덱스: 스냅샷 이후 추가된 벡터 (IndexIDMap2(Flat), 메모리) - 검색 시 기본 인덱스 결과와 거리 순으로 합침
+- 문서 저장소: SQLite 키-값 파일(docstore.db) - 검색된 ID의 문서만 읽으며 pickle을 사용하지 않음
+- 메타데이터 필터: docstore.db의 역색인(필드, 값 -> 문서 ID)으로 조건에 맞는 ID를 먼저 구한 뒤 그 ID 안에서만 검색
+  (ID가 적으면 벡터를 꺼내 정확히 계산, 많으면 IDSelector로 인덱스 검색)
+- WAL: 추가된 벡터를 JSONL 세그먼트 파일에 순서대로 기록 (배치마다 fsync)
+- 삭제: 문서 저장소에서 바로 지우고 ID를 삭제 목록(deleted 테이블)에 기록 (검색 결과에서 바로 제외).
+  벡터는 델타 인덱스에서 바로 제거하고, 스냅샷 인덱스에서는 다음 스냅샷 때 제거
+  (HNSW는 벡터를 뺄 수 없으므로 삭제된 벡터가 스냅샷의 10% 이상일 때 다시 생성)
+- 스냅샷: 델타가 FAISS_COMPACT_EVERY건을 넘으면 백그라운드에서 기본 인덱스 + 델타를 snapshot-<다음 ID>/에 저장하고
+  CURRENT 파일을 교체한 뒤 새 스냅샷을 mmap으로 다시 열고 이전 WAL 세그먼트 삭제 (저장 중 추가되는 벡터는 새 세그먼트에 기록)
+- 로드: CURRENT가 가리키는 스냅샷을 mmap으로 열고, 스냅샷 이후 WAL 세그먼트를 델타 인덱스에 다시 적용
+- 여러 프로세스: 같은 디렉토리를 서버 워커와 수집 CLI가 함께 열 수 있음. 추가/삭제/스냅샷 게시는 LOCK 파일의 fcntl 잠금을
+  그 작업 동안만 잡고 수행하며, 스냅샷 생성은 COMPACT 잠금으로 한 프로세스만 수행.
+  검색/쓰기 전에 CURRENT와 WAL 세그먼트 크기를 확인해 바뀌었으면 새 스냅샷을 열거나 마지막으로 읽은 위치 이후의 WAL만 읽음
+
+디렉토리 구조:
+    faiss_index/
+    ├── CURRENT                 # 현재 스냅샷 디렉토리 이름
+    ├── LOCK                    # 쓰기 잠금 (fcntl, 추가/삭제/스냅샷 게시 동안)
+    ├── COMPACT                 # 스냅샷 생성 잠금 (fcntl)
+    ├── docstore.db             # 문서 ID -> 본문, 메타데이터 (+ 메타데이터 역색인)
+    ├── snapshot-<next_id>/
+    │   ├── index.faiss
+    │   └── meta.json
+    └── wal-<first_id>.jsonl    # 스냅샷 이후 추가된 벡터
+"""
+from langchain_core.vectorstores import VectorStore as BaseVectorStore
+from langchain_core.embeddings import Embeddings
+from langchain.schema import Document
+from app.filters import Condition, parse_filter
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+import numpy as np
+import faiss
+import threading
+import sqlite3
+import logging
+import base64
+import shutil
+import json
+import time
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows - 한 프로세스만 연다고 가정
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_CURRENT = "CURRENT"
+_LOCK = "LOCK"
+_COMPACT_LOCK = "COMPACT"
+_DOCSTORE = "docstore.db"
+_WAL_PREFIX = "wal-"
+_SNAPSHOT_PREFIX = "snapshot-"
+
+_DOCSTORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta_index (field TEXT NOT NULL, value NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (field, value, id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS meta_index_id ON meta_index (id);
+CREATE TABLE IF NOT EXISTS deleted (id INTEGER PRIMARY KEY);
+"""
+# 역색인 형식 버전 (PRAGMA user_version) - 이전 형식 문서 저장소는 열 때 한 번 역색인 생성
+_META_INDEX_VERSION = 1
+# 삭제된 벡터가 스냅샷 HNSW 인덱스의 이 비율 이상이면 스냅샷 때 인덱스를 다시 생성
+_HNSW_REBUILD_RATIO = 0.1
+_SQL_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+# Flat/HNSW 벡터 코드를 mmap으로 여는 플래그 (이전 버전 faiss에는 IVF용 IO_FLAG_MMAP만 있음)
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+def _encode(vector: np.ndarray) -> str:
+    return base64.b64encode(vector.astype(np.float32).tobytes()).decode("ascii")
+
+def _decode(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+
+def _write_json_atomic(path: str, data: Any):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _index_rows(doc_id: int, metadata: dict) -> List[Tuple[str, Any, int]]:
+    """역색인 행 (문자열/숫자/불리언 값만 색인)"""
+    return [
+        (field, value, doc_id)
+        for field, value in metadata.items()
+        if isinstance(value, (str, int, float, bool))
+    ]
+
+class DocStore:
+    """SQLite 기반 문서 저장소 (문서 ID -> 본문, 메타데이터) + 메타데이터 역색인"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_DOCSTORE_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _META_INDEX_VERSION:
+            self._build_meta_index()
+    
+    def _build_meta_index(self):
+        """기존 문서로 역색인 생성"""
+        started = time.perf_counter()
+        count = 0
+        cursor = self._conn.execute("SELECT id, metadata FROM docs")
+        while rows := cursor.fetchmany(1000):
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO meta_index VALUES (?, ?, ?)",
+                [row for doc_id, metadata in rows for row in _index_rows(doc_id, json.loads(metadata))]
+            )
+            count += len(rows)
+        self._conn.execute(f"PRAGMA user_version = {_META_INDEX_VERSION}")
+        self._conn.commit()
+        if count:
+            logger.info(f"메타데이터 역색인 생성: {count}개 문서 ({time.perf_counter() - started:.2f}초)")
+    
+    def put_many(self, docs: List[Tuple[int, str, dict]]):
+        """문서 저장 (같은 ID는 덮어쓰고 이전 메타데이터의 역색인 행은 삭제)"""
+        rows = [(doc_id, text, json.dumps(metadata, ensure_ascii=False)) for doc_id, text, metadata in docs]
+        index_rows = [row for doc_id, _, metadata in docs for row in _index_rows(doc_id, metadata)]
+        with self._lock:
+            self._conn.executemany("DELETE FROM meta_index WHERE id = ?", [(doc_id,) for doc_id, _, _ in docs])
+            self._conn.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)", rows)
+            self._conn.executemany("INSERT OR IGNORE INTO meta_index VALUES (?, ?, ?)", index_rows)
+            self._conn.commit()
+    
+    def delete_many(self, ids: List[int]):
+        """문서와 역색인 행 삭제 후 삭제 목록에 기록 (벡터는 스냅샷 때 제거)"""
+        rows = [(doc_id,) for doc_id in ids]
+        with self._lock:
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", rows)
+            self._conn.executemany("DELETE FROM meta_index WHERE id = ?", rows)
+            self._conn.executemany("INSERT OR IGNORE INTO deleted VALUES (?)", rows)
+            self._conn.commit()
+    
+    def deleted_ids(self) -> List[int]:
+        """삭제되었지만 아직 스냅샷 인덱스에 벡터가 남아 있을 수 있는 문서 ID"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM deleted")]
+    
+    def purge_deleted(self, ids: List[int]):
+        """인덱스에서 벡터를 제거한 ID를 삭제 목록에서 뺌"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM deleted WHERE id = ?", [(doc_id,) for doc_id in ids])
+            self._conn.commit()
+    
+    def filter_ids(self, conditions: List[Condition]) -> List[int]:
+        """
+        조건을 모두 만족하는 문서 ID (역색인 조회)
+        
+        $ne/$nin은 필드가 있고 값이 다른 문서. 범위 조건은 같은 종류(숫자/문자열) 값끼리만 비교
+        """
+        queries = []
+        params: List[Any] = []
+        for field, operator, value in conditions:
+            if operator in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(value))
+                negate = "NOT " if operator == "$nin" else ""
+                queries.append(f"SELECT id FROM meta_index WHERE field = ? AND value {negate}IN ({placeholders})")
+                params.extend([field, *value])
+            else:
+                sql = f"SELECT id FROM meta_index WHERE field = ? AND value {_SQL_OPERATORS[operator]} ?"
+                if operator in ("$gt", "$gte", "$lt", "$lte"):
+                    sql += " AND typeof(value) = 'text'" if isinstance(value, str) else " AND typeof(value) IN ('integer', 'real')"
+                queries.append(sql)
+                params.extend([field, value])
+        with self._lock:
+            rows = self._conn.execute(" INTERSECT ".join(queries), params).fetchall()
+        return [row[0] for row in rows]
+    
+    def get_many(self, ids: List[int]) -> Dict[int, Tuple[str, dict]]:
+        """ID로 문서 조회 -> ID -> (본문, 메타데이터)"""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, text, metadata FROM docs WHERE id IN ({placeholders})", ids).fetchall()
+        return {doc_id: (text, json.loads(metadata)) for doc_id, text, metadata in rows}
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class IncrementalFAISS(BaseVectorStore):
+    """mmap 스냅샷 + WAL 델타 기반 FAISS 벡터 저장소 (LangChain VectorStore 호환)"""
+    
+    def __init__(
+        self,
+        path: str,
+        embedding: Embeddings,
+        index_type: str = "hnsw",
+        hnsw_m: int = 32,
+        ef_search: int = 64,
+        compact_every: int = 1000,
+        mmap: bool = True,
+        filter_brute_force_max: int = 5000
+    ):
+        """
+        Args:
+            path: 저장 디렉토리
+            embedding: 임베딩 함수
+            index_type: hnsw 또는 flat
+            hnsw_m: HNSW 이웃 수
+            ef_search: HNSW 검색 폭
+            compact_every: 이 건수만큼 WAL에 쌓이면 스냅샷 생성
+            mmap: 스냅샷 인덱스를 mmap으로 열지 여부 (False면 메모리로 읽음)
+            filter_brute_force_max: 필터에 맞는 문서가 이 수 이하면 인덱스 대신 정확히 거리 계산
+        """
+        if index_type not in ("hnsw", "flat"):
+            raise ValueError(f"지원하지 않는 FAISS 인덱스 타입: {index_type} (hnsw 또는 flat)")
+        self.path = path
+        self.embedding = embedding
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.compact_every = compact_every
+        self.mmap = mmap
+        self.filter_brute_force_max = filter_brute_force_max
+        
+        self._lock = threading.RLock()
+        # 프로세스 간 쓰기 잠금 파일 (쓰기/스냅샷 한 번 동안만 잠금, 같은 스레드에서는 중첩 가능)
+        self._lock_file = None
+        self._file_mutex = threading.RLock()
+        self._file_lock_depth = 0
+        self._compacting = False
+        self._compact_thread: Optional[threading.Thread] = None
+        self.base: Optional[faiss.Index] = None
+        self.base_path: Optional[str] = None
+        # 열고 있는 스냅샷 디렉토리 이름과 그때의 CURRENT 파일 상태 (다른 프로세스의 스냅샷 교체 감지)
+        self.snapshot_name: Optional[str] = None
+        self._current_stat: Optional[Tuple[int, int]] = None
+        # 기본 인덱스에 포함된 ID 범위 (이 값 미만은 기본 인덱스, 이상은 델타 인덱스)
+        self.base_next_id = 0
+        self.delta: Optional[faiss.Index] = None
+        self.next_id = 0
+        # WAL 세그먼트별로 읽은 위치 (바이트) - 이후 다른 프로세스가 추가한 레코드만 이어서 읽음
+        self._wal_offsets: Dict[str, int] = {}
+        
+        os.makedirs(path, exist_ok=True)
+        self._lock_file = open(os.path.join(path, _LOCK), "a")
+        self.docstore = DocStore(os.path.join(path, _DOCSTORE))
+        self._load()
+    
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+    
+    # ------------------------------------------------------------------
+    # 로드 / 인덱스 생성
+    # ------------------------------------------------------------------
+    
+    def _new_index(self, dim: int) -> faiss.Index:
+        """스냅샷용 빈 인덱스"""
+        if self.index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            base.hnsw.efSearch = self.ef_search
+        else:
+            base = faiss.IndexFlatL2(dim)
+        return faiss.IndexIDMap2(base)
+    
+    def _read_index(self, index_path: str, mmap: bool) -> faiss.Index:
+        """스냅샷 인덱스 열기 (mmap으로 연 인덱스에는 벡터를 추가할 수 없음)"""
+        index = faiss.read_index(index_path, _MMAP_FLAG if mmap else 0)
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.ef_search
+        return index
+    
+    def _new_index(self, dim: int) -> faiss.Index:
+        """스냅샷용 빈 인덱스"""
+        if self.index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            base.hnsw.efSearch = self.ef_search
+        else:
+            base = faiss.IndexFlatL2(dim)
+        return faiss.IndexIDMap2(base)
+    
+    def _read_index(self, index_path: str, mmap: bool) -> faiss.Index:
+        """스냅샷 인덱스 열기 (mmap으로 연 인덱스에는 벡터를 추가할 수 없음)"""
+        index = faiss.read_index(index_path, _MMAP_FLAG if mmap else 0)
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.ef_search
+        return index
+    
+    @contextmanager
+    def _write_lock(self):
+        """
+        프로세스 간 쓰기 잠금 (LOCK 파일의 fcntl 잠금을 쓰기 한 번 동안만 유지)
+        
+        같은 스레드에서는 중첩 가능하며, 상태 lock(_lock)보다 먼저 잡음
+        """
+        with self._file_mutex:
+            if self._file_lock_depth == 0 and fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+                if self._file_lock_depth == 0 and fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+    
+    def _try_compact_lock(self):
+        """스냅샷 잠금 (COMPACT 파일) - 다른 프로세스가 스냅샷을 만드는 중이면 None"""
+        lock_file = open(os.path.join(self.path, _COMPACT_LOCK), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return None
+        return lock_file
+    
+    def _current_snapshot(self) -> Optional[str]:
+        """CURRENT가 가리키는 스냅샷 디렉토리 이름 (없으면 None)"""
+        try:
+            with open(os.path.join(self.path, _CURRENT), encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+    
+    def _wal_segments(self) -> List[Tuple[int, str]]:
+        """(첫 ID, 경로) 순으로 정렬된 WAL 세그먼트"""
+        segments = []
+        for name in os.listdir(self.path):
+            if name.startswith(_WAL_PREFIX) and name.endswith(".jsonl"):
+                segments.append((int(name[len(_WAL_PREFIX):-len(".jsonl")]), os.path.join(self.path, name)))
+        return sorted(segments)
+    
+    def _migrate_legacy(self) -> bool:
+        """
+        이전 형식(LangChain FAISS.save_local의 index.faiss + index.pkl)을 스냅샷으로 변환
+        
+        pickle은 이 서비스가 직접 저장한 파일일 때만, 변환할 때 한 번 읽으며 이후에는 사용하지 않음
+        """
+        if not (os.path.exists(os.path.join(self.path, "index.faiss")) and os.path.exists(os.path.join(self.path, "index.pkl"))):
+            return False
+        from langchain_community.vectorstores import FAISS
+        
+        legacy = FAISS.load_local(self.path, self.embedding, allow_dangerous_deserialization=True)
+        count = legacy.index.ntotal
+        if count:
+            vectors = legacy.index.reconstruct_n(0, count)
+            docs = [legacy.docstore.search(legacy.index_to_docstore_id[i]) for i in range(count)]
+            self.docstore.put_many([(i, doc.page_content, doc.metadata) for i, doc in enumerate(docs)])
+            self._apply(list(range(count)), vectors)
+        logger.info(f"이전 형식 FAISS 인덱스 변환: {count}개 문서")
+        return True
+    
+    def _load(self):
+        """스냅샷을 mmap으로 열고 WAL을 델타 인덱스에 재적용 (이전 형식이면 변환 후 스냅샷 생성)"""
+        if self._current_snapshot() is None and not self._wal_segments():
+            with self._write_lock():
+                # 잠금을 기다리는 동안 다른 프로세스가 먼저 변환했을 수 있으므로 다시 확인
+                with self._lock:
+                    migrated = self._current_snapshot() is None and not self._wal_segments() and self._migrate_legacy()
+                if migrated:
+                    # 변환 결과를 바로 스냅샷으로 저장 (이전 파일은 더 이상 읽지 않음)
+                    self._compacting = True
+                    self._compact()
+        with self._lock:
+            replayed = self._refresh()
+        if replayed:
+            logger.info(f"FAISS WAL 재적용: {replayed}개 벡터")
+    
+    def _refresh(self) -> int:
+        """
+        다른 프로세스(서버 워커, 수집 CLI)의 변경 반영 (lock 안에서 호출)
+        
+        CURRENT가 바뀌었으면 새 스냅샷을 열고, 각 WAL 세그먼트는 마지막으로 읽은 위치 이후만 델타에 적용.
+        바뀐 것이 없으면 stat 몇 번으로 끝남
+        
+        Returns:
+            새로 적용한 벡터 수
+        """
+        try:
+            stat = os.stat(os.path.join(self.path, _CURRENT))
+            current_stat = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            current_stat = None
+        if current_stat != self._current_stat:
+            current = self._current_snapshot()
+            try:
+                if current is not None and current != self.snapshot_name:
+                    self._open_snapshot(current)
+                self._current_stat = current_stat
+            except FileNotFoundError:
+                # 여는 사이 더 새 스냅샷으로 교체됨 (다음 호출에서 다시 읽음)
+                logger.debug(f"FAISS 스냅샷 교체 중: {current}")
+        
+        segments = [path for _, path in self._wal_segments()]
+        for path in set(self._wal_offsets) - set(segments):
+            del self._wal_offsets[path]
+        return sum(self._tail_wal(path) for path in segments)
+    
+    def _open_snapshot(self, name: str):
+        """스냅샷을 기본 인덱스로 열고 스냅샷에 포함된 벡터는 델타에서 제거 (lock 안에서 호출)"""
+        started = time.perf_counter()
+        snapshot_dir = os.path.join(self.path, name)
+        with open(os.path.join(snapshot_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        base_path = os.path.join(snapshot_dir, "index.faiss")
+        base = self._read_index(base_path, self.mmap)
+        # 문서를 스냅샷에 함께 저장하던 형식이면 문서 저장소로 옮김 (파일은 다음 스냅샷 때 디렉토리와 함께 삭제)
+        legacy_docs = os.path.join(snapshot_dir, "docstore.jsonl")
+        if os.path.exists(legacy_docs):
+            with open(legacy_docs, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            self.docstore.put_many([(r["id"], r["text"], r["metadata"]) for r in records])
+        self.base = base
+        self.base_path = base_path
+        self.snapshot_name = name
+        self.base_next_id = meta["next_id"]
+        self.next_id = max(self.next_id, self.base_next_id)
+        if self.delta is not None:
+            self.delta.remove_ids(faiss.IDSelectorRange(0, self.base_next_id))
+        logger.info(f"FAISS 스냅샷 로드: {snapshot_dir} ({base.ntotal}개 벡터, mmap={self.mmap}, {time.perf_counter() - started:.3f}초)")
+    
+    def _tail_wal(self, segment: str) -> int:
+        """
+        WAL 세그먼트에서 마지막으로 읽은 위치 이후의 레코드 적용 (lock 안에서 호출)
+        
+        줄바꿈으로 끝나지 않은 마지막 줄은 다른 프로세스가 쓰는 중일 수 있으므로 다음 호출에서 다시 읽음
+        
+        Returns:
+            새로 적용한 벡터 수
+        """
+        offset = self._wal_offsets.get(segment, 0)
+        try:
+            if os.path.getsize(segment) <= offset:
+                return 0
+            with open(segment, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            # 다른 프로세스가 스냅샷 후 삭제한 세그먼트
+            return 0
+        
+        batch: List[Dict] = []
+        applied = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # 기록 중 중단된 줄 (다음 쓰기 때 잘라냄)
+                logger.warning(f"WAL 레코드 손상, 이후 무시: {segment}")
+                break
+            offset += len(line)
+            if record["id"] >= self.next_id:  # 스냅샷에 포함됐거나 이미 적용한 벡터는 건너뜀
+                batch.append(record)
+            if len(batch) >= 1000:
+                self._apply_records(batch)
+                applied += len(batch)
+                batch = []
+        if batch:
+            self._apply_records(batch)
+            applied += len(batch)
+        self._wal_offsets[segment] = offset
+        return applied
+    
+    def _apply_records(self, records: List[Dict]):
+        """WAL 레코드 적용 (문서를 WAL에 함께 기록하던 형식이면 문서 저장소로 옮김)"""
+        legacy_docs = [(r["id"], r["text"], r["metadata"]) for r in records if "text" in r]
+        if legacy_docs:
+            self.docstore.put_many(legacy_docs)
+        self._apply(
+            [record["id"] for record in records],
+            np.stack([_decode(record["vector"]) for record in records])
+        )
+    
+    def _apply(self, ids: List[int], vectors: np.ndarray):
+        """델타 인덱스에 반영 (lock 안에서 호출)"""
+        if self.delta is None:
+            self.delta = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+        self.delta.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+        self.next_id = max(self.next_id, ids[-1] + 1)
+    
+    # ------------------------------------------------------------------
+    # 추가
+    # ------------------------------------------------------------------
+    
+    def _wal_segment_for_append(self) -> str:
+        """
+        이어서 기록할 WAL 세그먼트 (쓰기 잠금 + lock 안에서 _refresh 후 호출)
+        
+        마지막 세그먼트에 읽지 못한 나머지가 있으면 중단된 쓰기의 잔여물이므로 잘라냄
+        """
+        segments = self._wal_segments()
+        # 스냅샷 이후 세그먼트가 있으면 이어서 기록
+        path = segments[-1][1] if segments else os.path.join(self.path, f"{_WAL_PREFIX}{self.next_id}.jsonl")
+        valid_size = self._wal_offsets.get(path, 0)
+        if os.path.exists(path) and os.path.getsize(path) > valid_size:
+            logger.warning(f"WAL 마지막 레코드 손상, 잘라냄: {path}")
+            with open(path, "r+b") as f:
+                f.truncate(valid_size)
+        return path
+    
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        """
+        문서 추가 (추가한 문서 수에 비례하는 비용)
+        
+        Returns:
+            추가된 문서 ID 목록
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        # 임베딩은 lock 밖에서 계산 (검색을 막지 않도록)
+        vectors = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+        
+        # 다른 프로세스가 그 사이 추가한 벡터를 먼저 반영해야 ID가 겹치지 않음
+        with self._write_lock(), self._lock:
+            self._refresh()
+            ids = list(range(self.next_id, self.next_id + len(texts)))
+            # 문서를 먼저 저장 (WAL 기록 전에 중단되면 벡터가 없는 문서는 검색되지 않으므로 무해)
+            self.docstore.put_many(list(zip(ids, texts, metadatas)))
+            segment = self._wal_segment_for_append()
+            with open(segment, "a", encoding="utf-8") as wal:
+                for doc_id, vector in zip(ids, vectors):
+                    wal.write(json.dumps({"id": doc_id, "vector": _encode(vector)}) + "\n")
+                wal.flush()
+                os.fsync(wal.fileno())
+            self._wal_offsets[segment] = os.path.getsize(segment)
+            self._apply(ids, vectors)
+            should_compact = self.delta.ntotal >= self.compact_every and not self._compacting
+            if should_compact:
+                self._compacting = True
+        
+        if should_compact:
+            self._compact_thread = threading.Thread(target=self._compact, name="faiss-compact", daemon=True)
+            self._compact_thread.start()
+        return [str(doc_id) for doc_id in ids]
+    
+    # ------------------------------------------------------------------
+    # 삭제
+    # ------------------------------------------------------------------
+    
+    def _delete_ids(self, ids: List[int]) -> int:
+        """문서 삭제 (문서 저장소에서 바로 삭제, 델타 벡터는 바로 제거, 스냅샷 벡터는 다음 스냅샷 때 제거)"""
+        if not ids:
+            return 0
+        with self._write_lock(), self._lock:
+            self._refresh()
+            self.docstore.delete_many(ids)
+            if self.delta is not None:
+                self.delta.remove_ids(faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64)))
+        return len(ids)
+    
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """ID로 문서 삭제 (add_texts가 반환한 ID)"""
+        return self._delete_ids([int(doc_id) for doc_id in ids or []]) > 0
+    
+    def delete_by_filter(self, filter: Dict[str, Any]) -> int:
+        """
+        메타데이터 필터에 맞는 문서 삭제
+        
+        Returns:
+            삭제한 문서 수
+        """
+        return self._delete_ids(self.docstore.filter_ids(parse_filter(filter)))
+    
+    # ------------------------------------------------------------------
+    # 스냅샷
+    # ------------------------------------------------------------------
+    
+    def _compact(self):
+        """
+        기본 인덱스 + 델타로 새 스냅샷 생성 후 스냅샷에 포함된 WAL 세그먼트 삭제
+        
+        COMPACT 잠금으로 한 프로세스만 수행하고 (다른 프로세스가 하고 있으면 건너뜀), 세그먼트 교체와 CURRENT 게시는
+        쓰기 잠금 안에서 수행. 그래도 CURRENT가 병합한 스냅샷과 다르거나 더 최신 스냅샷을 가리키면 교체/삭제하지 않음
+        """
+        compact_lock = self._try_compact_lock()
+        try:
+            if compact_lock is None:
+                return
+            with self._write_lock(), self._lock:
+                # 다른 프로세스가 추가/스냅샷한 내용까지 반영한 상태로 병합
+                self._refresh()
+                if self.delta is None or self.delta.ntotal == 0:
+                    return
+                # 델타 벡터 복사만 lock 안에서 하고 병합/파일 기록은 lock 밖에서 수행
+                delta_ids = faiss.vector_to_array(self.delta.id_map).copy()
+                delta_vectors = self.delta.index.reconstruct_n(0, self.delta.ntotal)
+                deleted = np.asarray(self.docstore.deleted_ids(), dtype=np.int64)
+                base_path = self.base_path
+                loaded_snapshot = self.snapshot_name
+                next_id = self.next_id
+                # 이후 추가분은 (다른 프로세스도) 새 세그먼트에 기록
+                new_segment = os.path.join(self.path, f"{_WAL_PREFIX}{next_id}.jsonl")
+                old_segments = [path for _, path in self._wal_segments() if path != new_segment]
+                open(new_segment, "a").close()
+            
+            started = time.perf_counter()
+            # 삭제된 문서의 벡터는 새 스냅샷에 넣지 않음
+            live = ~np.isin(delta_ids, deleted)
+            kept: List[int] = []
+            # 기존 스냅샷은 추가 가능하도록 메모리로 읽어서 병합
+            if base_path:
+                merged = self._read_index(base_path, mmap=False)
+                merged, kept = self._remove_deleted(merged, deleted)
+            else:
+                merged = self._new_index(delta_vectors.shape[1])
+            if live.any():
+                merged.add_with_ids(delta_vectors[live], delta_ids[live])
+            count = merged.ntotal
+            
+            name = f"{_SNAPSHOT_PREFIX}{next_id}"
+            snapshot_dir = os.path.join(self.path, name)
+            tmp_dir = f"{snapshot_dir}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            faiss.write_index(merged, os.path.join(tmp_dir, "index.faiss"))
+            _write_json_atomic(os.path.join(tmp_dir, "meta.json"), {
+                "next_id": next_id,
+                "dim": merged.d,
+                "index_type": self.index_type,
+                "count": count,
+                "created_at": int(time.time())
+            })
+            del merged
+            
+            with self._write_lock():
+                current = self._current_snapshot()
+                if current != loaded_snapshot or self._snapshot_next_id(current) >= next_id:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    logger.warning(f"FAISS 스냅샷 건너뜀: CURRENT({current})가 병합한 스냅샷({loaded_snapshot})과 다름 (WAL은 유지됨)")
+                    return
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+                os.replace(tmp_dir, snapshot_dir)
+                
+                # CURRENT 교체가 커밋 시점 (이후 이전 스냅샷/WAL은 불필요)
+                current_path = os.path.join(self.path, _CURRENT)
+                tmp_current = f"{current_path}.tmp"
+                with open(tmp_current, "w", encoding="utf-8") as f:
+                    f.write(name)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_current, current_path)
+                
+                # 새 스냅샷과 남은 WAL에 벡터가 없는 삭제 ID는 목록에서 뺌
+                purged = sorted(set(deleted[deleted < next_id].tolist()) - set(kept))
+                if purged:
+                    self.docstore.purge_deleted(purged)
+                # 이전 스냅샷은 다른 프로세스가 mmap으로 열고 있어도 삭제 가능 (열린 매핑은 유지되고, 다음 검색 때 CURRENT를 다시 읽음)
+                for path in old_segments:
+                    os.remove(path)
+                for entry in os.listdir(self.path):
+                    if entry.startswith(_SNAPSHOT_PREFIX) and entry != name:
+                        shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+            
+            # 새 스냅샷으로 교체하고 스냅샷에 포함된 벡터는 델타에서 제거
+            with self._lock:
+                self._refresh()
+            logger.info(f"FAISS 스냅샷 생성: {name} ({count}개 벡터, {time.perf_counter() - started:.2f}초)")
+        except Exception as e:
+            logger.error(f"FAISS 스냅샷 생성 실패 (WAL은 유지됨): {e}")
+        finally:
+            if compact_lock is not None:
+                compact_lock.close()
+            with self._lock:
+                self._compacting = False
+    
+    def _remove_deleted(self, index: faiss.Index, deleted: np.ndarray) -> Tuple[faiss.Index, List[int]]:
+        """
+        메모리로 읽은 스냅샷 인덱스에서 삭제된 문서의 벡터 제거
+        
+        Flat은 바로 제거하고, HNSW는 벡터를 뺄 수 없으므로 삭제된 벡터가 _HNSW_REBUILD_RATIO 이상일 때만
+        남은 벡터로 다시 생성 (그 전에는 문서 저장소에 없어 검색 결과에서만 제외)
+        
+        Returns:
+            (인덱스, 벡터가 남아 있는 삭제된 ID)
+        """
+        ids = faiss.vector_to_array(index.id_map)
+        removed = ids[np.isin(ids, deleted)]
+        if not len(removed):
+            return index, []
+        inner = faiss.downcast_index(index.index)
+        if not isinstance(inner, faiss.IndexHNSW):
+            index.remove_ids(faiss.IDSelectorBatch(removed))
+            return index, []
+        if len(removed) < index.ntotal * _HNSW_REBUILD_RATIO:
+            return index, removed.tolist()
+        
+        vectors = inner.reconstruct_n(0, inner.ntotal)
+        keep = ~np.isin(ids, removed)
+        rebuilt = self._new_index(index.d)
+        if keep.any():
+            rebuilt.add_with_ids(vectors[keep], ids[keep])
+        logger.info(f"FAISS HNSW 인덱스 재생성: 삭제된 벡터 {len(removed)}개 제거")
+        return rebuilt, []
+    
+    def _snapshot_next_id(self, name: Optional[str]) -> int:
+        """스냅샷에 포함된 ID 범위 (meta.json의 next_id, 스냅샷이 없으면 0)"""
+        if name is None:
+            return 0
+        with open(os.path.join(self.path, name, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)["next_id"]
+    
+    def snapshot(self):
+        """스냅샷 즉시 생성 (진행 중인 스냅샷이 있으면 완료 후 생성)"""
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+        with self._lock:
+            self._refresh()
+            if self.delta is None or self.delta.ntotal == 0:
+                return
+            self._compacting = True
+        self._compact()
+    
+    def close(self):
+        """종료 시 WAL을 스냅샷으로 정리 (다른 프로세스가 스냅샷 중이면 건너뜀)"""
+        self.snapshot()
+        self._lock_file.close()
+        self.docstore.close()
+    
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+    
+    def _search_ids(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """기본 인덱스와 델타 인덱스를 검색하여 거리 순으로 합침 -> [(문서 ID, L2 거리)]"""
+        hits: List[Tuple[int, float]] = []
+        with self._lock:
+            for index in (self.base, self.delta):
+                if index is None or index.ntotal == 0:
+                    continue
+                distances, ids = index.search(query, min(k, index.ntotal))
+                hits.extend((int(doc_id), float(distance)) for distance, doc_id in zip(distances[0], ids[0]) if doc_id >= 0)
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+    
+    def _reconstruct_many(self, ids: List[int]) -> Tuple[List[int], List[np.ndarray]]:
+        """문서 ID의 벡터를 인덱스에서 꺼냄 -> (벡터가 있는 ID, 벡터)"""
+        found, vectors = [], []
+        with self._lock:
+            for doc_id in ids:
+                index = self.base if doc_id < self.base_next_id else self.delta
+                if index is None:
+                    continue
+                try:
+                    vectors.append(index.reconstruct(doc_id))
+                    found.append(doc_id)
+                except RuntimeError:
+                    continue  # 벡터 기록 전에 중단된 문서
+        return found, vectors
+    
+    def _search_subset(self, query: np.ndarray, k: int, ids: List[int]) -> List[Tuple[int, float]]:
+        """주어진 문서 ID 안에서만 검색 -> [(문서 ID, L2 거리)]"""
+        if not ids:
+            return []
+        if len(ids) <= self.filter_brute_force_max:
+            # 후보가 적으면 벡터를 꺼내 정확히 계산 (HNSW는 후보가 적을 때 놓치는 결과가 생김)
+            found, vectors = self._reconstruct_many(ids)
+            if not found:
+                return []
+            distances = ((np.stack(vectors) - query[0]) ** 2).sum(axis=1)
+            order = np.argsort(distances)[:k]
+            return [(found[i], float(distances[i])) for i in order]
+        
+        selector = faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64))
+        hits: List[Tuple[int, float]] = []
+        with self._lock:
+            for index in (self.base, self.delta):
+                if index is None or index.ntotal == 0:
+                    continue
+                if isinstance(faiss.downcast_index(index.index), faiss.IndexHNSW):
+                    # 조건에 맞지 않는 이웃을 건너뛰는 만큼 탐색 폭을 넓힘
+                    params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(self.ef_search, k * 8))
+                else:
+                    params = faiss.SearchParameters(sel=selector)
+                distances, result_ids = index.search(query, min(k, index.ntotal), params=params)
+                hits.extend((int(doc_id), float(distance)) for distance, doc_id in zip(distances[0], result_ids[0]) if doc_id >= 0)
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+    
+    def _search_hits(self, embedding: List[float], k: int, filter: Optional[Dict[str, Any]]) -> List[Tuple[int, float]]:
+        """필터가 있으면 조건에 맞는 ID 안에서, 없으면 전체에서 검색 -> [(문서 ID, L2 거리)]"""
+        query = np.asarray([embedding], dtype=np.float32)
+        if filter:
+            return self._search_subset(query, k, self.docstore.filter_ids(parse_filter(filter)))
+        return self._search_ids(query, k)
+    
+    def _live_hits(self, embedding: List[float], k: int, filter: Optional[Dict[str, Any]]) -> Tuple[List[Tuple[int, float]], Dict[int, Tuple[str, dict]]]:
+        """
+        삭제된 문서를 뺀 검색 결과 -> ([(문서 ID, L2 거리)], ID -> (본문, 메타데이터))
+        
+        스냅샷에 남은 삭제된 벡터 때문에 k개가 안 되면 두 배씩 더 가져옴
+        """
+        # 다른 프로세스가 추가/스냅샷한 내용 반영 (바뀐 것이 없으면 stat만 수행)
+        with self._lock:
+            self._refresh()
+        fetch = k
+        while True:
+            hits = self._search_hits(embedding, fetch, filter)
+            docs = self.docstore.get_many([doc_id for doc_id, _ in hits])
+            live = [hit for hit in hits if hit[0] in docs]
+            if len(live) >= k or len(hits) < fetch:
+                return live[:k], docs
+            fetch *= 2
+    
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """
+        벡터로 검색 -> (문서, L2 거리)
+        
+        Args:
+            filter: 메타데이터 필터 (app.filters 형식) - 역색인으로 후보 ID를 구한 뒤 그 안에서만 검색
+        """
+        hits, docs = self._live_hits(embedding, k, filter)
+        return [(Document(page_content=docs[doc_id][0], metadata=docs[doc_id][1]), distance) for doc_id, distance in hits]
+    
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+    
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+    
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+    
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """
+        MMR 검색 - 가까운 fetch_k개 후보 중 질문과 가까우면서 서로 겹치지 않는 k개 선택
+        
+        Args:
+            lambda_mult: 1이면 유사도만, 0이면 다양성만 고려
+        """
+        hits, _ = self._live_hits(embedding, max(k, fetch_k), filter)
+        found, vectors = self._reconstruct_many([doc_id for doc_id, _ in hits])
+        if not found:
+            return []
+        selected = maximal_marginal_relevance(np.asarray(embedding, dtype=np.float32), vectors, lambda_mult=lambda_mult, k=min(k, len(found)))
+        selected_ids = [found[i] for i in selected]
+        docs = self.docstore.get_many(selected_ids)
+        return [Document(page_content=docs[doc_id][0], metadata=docs[doc_id][1]) for doc_id in selected_ids if doc_id in docs]
+    
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(self.embedding.embed_query(query), k, fetch_k, lambda_mult, **kwargs)
+    
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+    
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, path: str = "faiss_index", **kwargs: Any) -> "IncrementalFAISS":
+        store = cls(path, embedding, **kwargs)
+        store.add_texts(texts, metadatas)
+        return store
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return sum(index.ntotal for index in (self.base, self.delta) if index is not None)
@@ -0,0 +1,74 @@
+"""
+메타데이터 필터 모듈
+검색 요청의 메타데이터 필터를 검증하고 벡터 저장소별 형식으로 변환
+
+필터 형식 (Chroma where와 같은 형식, 여러 필드는 AND):
+    {"category": "seoul"}                        # 같음
+    {"price": {"$gte": 10000, "$lt": 20000}}     # 범위
+    {"source": {"$in": ["guide", "faq"]}}        # 목록 중 하나
+    {"status": {"$ne": "closed"}}                # 다름
+    {"$and": [{...}, {...}]}                     # 조건 묶음
+
+지원 연산자: $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin")
+_RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+_SCALAR_TYPES = (str, int, float, bool)
+
+# (필드, 연산자, 값)
+Condition = Tuple[str, str, Any]
+
+def parse_filter(filter: Optional[Dict[str, Any]], string_ranges: bool = True) -> List[Condition]:
+    """
+    필터를 (필드, 연산자, 값) 조건 목록으로 변환 (모든 조건을 만족해야 함)
+    
+    Args:
+        string_ranges: 범위 연산자($gt, $gte, $lt, $lte)에 문자열 값 허용 여부 (Chroma는 숫자만 지원)
+    
+    Raises:
+        ValueError: 형식이 잘못된 필터
+    """
+    if not filter:
+        return []
+    if not isinstance(filter, dict):
+        raise ValueError("필터는 객체여야 합니다.")
+    
+    conditions: List[Condition] = []
+    for field, spec in filter.items():
+        if field == "$and":
+            if not isinstance(spec, list):
+                raise ValueError("$and에는 필터 목록이 필요합니다.")
+            for sub_filter in spec:
+                conditions.extend(parse_filter(sub_filter, string_ranges))
+            continue
+        if field.startswith("$"):
+            raise ValueError(f"지원하지 않는 필터 연산자: {field}")
+        
+        if not isinstance(spec, dict):
+            spec = {"$eq": spec}
+        if not spec:
+            raise ValueError(f"'{field}' 필드에 조건이 없습니다.")
+        for operator, value in spec.items():
+            if operator not in OPERATORS:
+                raise ValueError(f"지원하지 않는 필터 연산자: {operator} (사용 가능: {', '.join(OPERATORS)})")
+            if operator in ("$in", "$nin"):
+                if not isinstance(value, list) or not value or not all(isinstance(v, _SCALAR_TYPES) for v in value):
+                    raise ValueError(f"'{field}'의 {operator}에는 값 목록이 필요합니다.")
+            elif operator in _RANGE_OPERATORS:
+                if not string_ranges and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                    raise ValueError(f"'{field}'의 {operator}에는 숫자가 필요합니다.")
+                if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                    raise ValueError(f"'{field}'의 {operator}에는 숫자 또는 문자열이 필요합니다.")
+            elif not isinstance(value, _SCALAR_TYPES):
+                raise ValueError(f"'{field}'의 {operator}에는 문자열, 숫자, 불리언 값이 필요합니다.")
+            conditions.append((field, operator, value))
+    return conditions
+
+def to_chroma_where(filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Chroma where 절로 변환 (조건이 여러 개면 $and로 묶음)"""
+    clauses = [{field: {operator: value}} for field, operator, value in parse_filter(filter, string_ranges=False)]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,437 @@
+"""
+파일 적재 파이프라인
+PDF, TXT, MD, HTML 파일을 프로세스 풀에서 파싱/청크 분할하고, 청크를 배치로 모아 벡터 저장소에 기록
+
+- 파싱: 파일 단위로 프로세스 풀에 제출 (동시에 처리 중인 파일은 워커 수의 2배까지만)
+- 청크: RecursiveCharacterTextSplitter (INGEST_CHUNK_SIZE 글자, INGEST_CHUNK_OVERLAP 글자 겹침)
+- 기록: 청크를 INGEST_BATCH_SIZE개씩 모아 크기가 제한된 큐(INGEST_QUEUE_SIZE)로 넘기면 기록 스레드가 임베딩 + 저장
+  (저장이 밀리면 큐가 차서 파싱 제출이 멈추므로 메모리 사용량이 전체 문서 수와 무관하게 일정)
+- 적재 기록: 적재한 파일의 경로/수정 시각/크기를 SQLite에 저장하여 디렉토리 감시 시 새 파일/변경된 파일만 적재
+  (이전에 적재한 파일은 새 청크를 저장하기 전에 같은 source의 이전 청크를 삭제)
+
+사용법:
+    python -m app.ingest [디렉토리]            # 한 번 적재 (기본: DATA_DIR)
+    python -m app.ingest [디렉토리] --watch    # INGEST_WATCH_INTERVAL초마다 새 파일 적재
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from html.parser import HTMLParser
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.config import (
+    DATA_DIR, INGEST_WORKERS, INGEST_CHUNK_SIZE, INGEST_CHUNK_OVERLAP,
+    INGEST_BATCH_SIZE, INGEST_QUEUE_SIZE, INGEST_STATE_PATH, INGEST_WATCH_INTERVAL
+)
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import threading
+import argparse
+import sqlite3
+import logging
+import queue
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# 확장자 -> 파일 종류
+SUPPORTED_EXTENSIONS = {
+    ".pdf": "pdf",
+    ".txt": "text",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".html": "html",
+    ".htm": "html"
+}
+
+_MARKDOWN_SEPARATORS = ["\n## ", "\n### ", "\n#### ", "\n\n", "\n", " ", ""]
+
+@dataclass
+class IngestStats:
+    """적재 결과"""
+    files: int = 0
+    failed_files: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    
+    @property
+    def docs_per_sec(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+    
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+    
+    def to_dict(self) -> Dict:
+        return {
+            **asdict(self),
+            "seconds": round(self.seconds, 3),
+            "docs_per_sec": round(self.docs_per_sec, 2),
+            "chunks_per_sec": round(self.chunks_per_sec, 2)
+        }
+
+# ============================================================================
+# 파싱 / 청크 분할 (프로세스 풀에서 실행)
+# ============================================================================
+
+class _HTMLTextExtractor(HTMLParser):
+    """HTML에서 본문 텍스트 추출 (script/style 제외, 블록 태그는 줄바꿈)"""
+    
+    _SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+    _BLOCK_TAGS = {"p", "div", "br", "li", "tr", "section", "article", "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip_depth = 0
+        self._in_title = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data.strip()
+        else:
+            self.parts.append(data)
+    
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8", "cp949"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+def parse_file(path: str) -> List[Tuple[str, dict]]:
+    """
+    파일에서 텍스트 추출
+    
+    Returns:
+        [(텍스트, 추가 메타데이터)] - PDF는 페이지별, 나머지는 파일 전체 하나
+    """
+    file_type = SUPPORTED_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if file_type is None:
+        raise ValueError(f"지원하지 않는 파일 형식: {path}")
+    
+    if file_type == "pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise RuntimeError("PDF 적재에는 pypdf 패키지가 필요합니다 (pip install pypdf)")
+        reader = PdfReader(path)
+        return [
+            (text, {"page": number})
+            for number, page in enumerate(reader.pages, start=1)
+            if (text := (page.extract_text() or "").strip())
+        ]
+    
+    text = _read_text(path)
+    if file_type == "html":
+        extractor = _HTMLTextExtractor()
+        extractor.feed(text)
+        extractor.close()
+        return [(extractor.text(), {"title": extractor.title} if extractor.title else {})]
+    return [(text, {})]
+
+def source_name(path: str, root: Optional[str] = None) -> str:
+    """청크 메타데이터 source (root 기준 상대 경로, root가 없으면 파일 이름)"""
+    return os.path.relpath(path, root) if root else os.path.basename(path)
+
+def chunk_file(path: str, chunk_size: int, chunk_overlap: int, root: Optional[str] = None) -> List[Tuple[str, dict]]:
+    """
+    파일을 파싱하여 겹치는 청크로 분할 (프로세스 풀 작업 단위)
+    
+    Returns:
+        [(청크 텍스트, 메타데이터)]
+    """
+    file_type = SUPPORTED_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=_MARKDOWN_SEPARATORS if file_type == "markdown" else None
+    )
+    source = source_name(path, root)
+    chunks = []
+    for text, extra in parse_file(path):
+        for chunk in splitter.split_text(text):
+            chunks.append((chunk, {"source": source, "file_type": file_type, **extra, "chunk": len(chunks)}))
+    return chunks
+
+def iter_files(directory: str) -> Iterator[str]:
+    """디렉토리 아래 지원하는 파일 경로 (이름 순)"""
+    for current, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if not name.startswith(".") and os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield os.path.join(current, name)
+
+# ============================================================================
+# 적재 기록
+# ============================================================================
+
+class IngestLedger:
+    """적재한 파일 기록 (경로, 수정 시각, 크기) - 변경되지 않은 파일은 다시 적재하지 않음"""
+    
+    def __init__(self, path: str = INGEST_STATE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, chunks INTEGER NOT NULL, ingested_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def signature(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def is_current(self, path: str) -> bool:
+        """마지막 적재 이후 변경되지 않은 파일인지"""
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns, size FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return row is not None and tuple(row) == self.signature(path)
+    
+    def was_ingested(self, path: str) -> bool:
+        """이전에 적재한 적이 있는 파일인지 (다시 적재하면 이전 청크를 교체해야 함)"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return row is not None
+    
+    def new_files(self, directory: str, settle_seconds: float = 0) -> Iterator[str]:
+        """
+        새 파일/변경된 파일
+        
+        Args:
+            settle_seconds: 마지막 수정 후 이 시간이 지나지 않은 파일은 (복사 중일 수 있으므로) 다음에 적재
+        """
+        now = time.time()
+        for path in iter_files(directory):
+            try:
+                if settle_seconds and now - os.path.getmtime(path) < settle_seconds:
+                    continue
+                if not self.is_current(path):
+                    yield path
+            except FileNotFoundError:
+                continue
+    
+    def mark(self, entries: List[Tuple[str, int, int, int]]):
+        """적재 완료 기록 [(경로, 수정 시각, 크기, 청크 수)]"""
+        now = int(time.time())
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                [(os.path.abspath(path), mtime_ns, size, chunks, now) for path, mtime_ns, size, chunks in entries]
+            )
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ============================================================================
+# 파이프라인
+# ============================================================================
+
+class IngestPipeline:
+    """파일 -> (프로세스 풀) 파싱/청크 -> (제한된 큐) 배치 임베딩/저장"""
+    
+    def __init__(
+        self,
+        vector_store,
+        workers: int = INGEST_WORKERS,
+        chunk_size: int = INGEST_CHUNK_SIZE,
+        chunk_overlap: int = INGEST_CHUNK_OVERLAP,
+        batch_size: int = INGEST_BATCH_SIZE,
+        queue_size: int = INGEST_QUEUE_SIZE,
+        ledger: Optional[IngestLedger] = None
+    ):
+        """
+        Args:
+            vector_store: 청크를 기록할 벡터 저장소 (app.vector_store.VectorStore)
+            workers: 파싱 프로세스 수
+            chunk_size: 청크 최대 글자 수
+            chunk_overlap: 이웃 청크와 겹치는 글자 수
+            batch_size: 벡터 저장소에 한 번에 쓰는 청크 수
+            queue_size: 저장 대기 배치 수
+            ledger: 적재 기록 (있으면 저장이 끝난 파일을 기록하고, 이전에 적재한 파일은 이전 청크를 삭제한 뒤 저장)
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"청크 겹침({chunk_overlap})은 청크 크기({chunk_size})보다 작아야 합니다.")
+        self.vector_store = vector_store
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.ledger = ledger
+    
+    def _write_batches(self, batches: "queue.Queue", errors: List[Exception]):
+        """기록 스레드: 다시 적재하는 파일의 이전 청크를 삭제하고 배치를 벡터 저장소에 추가한 뒤 끝난 파일을 적재 기록에 반영"""
+        while True:
+            item = batches.get()
+            if item is None:
+                return
+            if errors:
+                continue  # 실패 후에는 남은 배치를 비우기만 함
+            documents, finished, replaced = item
+            try:
+                for source in replaced:
+                    self.vector_store.delete_documents({"source": source})
+                if documents:
+                    self.vector_store.add_documents(documents)
+                if finished and self.ledger is not None:
+                    self.ledger.mark(finished)
+            except Exception as e:
+                logger.error(f"청크 저장 실패: {e}")
+                errors.append(e)
+    
+    def run(self, paths: Iterable[str], root: Optional[str] = None) -> IngestStats:
+        """
+        파일 적재
+        
+        Args:
+            paths: 파일 경로 (제너레이터 가능 - 필요한 만큼만 읽음)
+            root: 메타데이터 source를 이 디렉토리 기준 상대 경로로 기록
+        
+        Returns:
+            적재 결과 (파일 수, 청크 수, 처리 속도)
+        """
+        stats = IngestStats()
+        started = time.perf_counter()
+        batches: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        errors: List[Exception] = []
+        writer = threading.Thread(target=self._write_batches, args=(batches, errors), name="ingest-writer", daemon=True)
+        writer.start()
+        
+        pending: List[Document] = []
+        # (마지막 청크 위치, 적재 기록) - 해당 위치까지 저장되면 파일 적재 완료
+        finished: List[Tuple[int, Tuple[str, int, int, int]]] = []
+        # 이전 청크를 삭제할 source - 다음 배치를 저장하기 전에 삭제 (해당 파일의 청크는 그 배치부터 들어감)
+        replaced: List[str] = []
+        queued = 0
+        
+        def flush(final: bool = False):
+            nonlocal pending, finished, replaced, queued
+            while len(pending) >= self.batch_size or (final and (pending or finished)):
+                batch, pending = pending[:self.batch_size], pending[self.batch_size:]
+                queued += len(batch)
+                done = [entry for end, entry in finished if end <= queued]
+                finished = [(end, entry) for end, entry in finished if end > queued]
+                batches.put((batch, done, replaced))  # 큐가 가득 차면 저장이 따라올 때까지 대기
+                replaced = []
+        
+        try:
+            files = iter(paths)
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                in_flight: Dict = {}
+                while True:
+                    while len(in_flight) < self.workers * 2 and not errors:
+                        path = next(files, None)
+                        if path is None:
+                            break
+                        try:
+                            signature = IngestLedger.signature(path)
+                        except FileNotFoundError:
+                            continue
+                        future = pool.submit(chunk_file, path, self.chunk_size, self.chunk_overlap, root)
+                        in_flight[future] = (path, signature)
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, (mtime_ns, size) = in_flight.pop(future)
+                        try:
+                            chunks = future.result()
+                        except Exception as e:
+                            logger.warning(f"파일 파싱 실패: {path} ({e})")
+                            stats.failed_files += 1
+                            # 실패한 파일도 기록하여 수정되기 전까지 감시할 때마다 다시 시도하지 않음
+                            if self.ledger is not None:
+                                self.ledger.mark([(path, mtime_ns, size, 0)])
+                            continue
+                        if self.ledger is not None and self.ledger.was_ingested(path):
+                            replaced.append(source_name(path, root))
+                        pending.extend(Document(page_content=text, metadata=metadata) for text, metadata in chunks)
+                        stats.files += 1
+                        stats.chunks += len(chunks)
+                        finished.append((queued + len(pending), (path, mtime_ns, size, len(chunks))))
+                        flush()
+            if not errors:
+                flush(final=True)
+        finally:
+            batches.put(None)
+            writer.join()
+        stats.seconds = time.perf_counter() - started
+        
+        if errors:
+            raise errors[0]
+        if stats.files or stats.failed_files:
+            logger.info(
+                f"파일 적재 완료: {stats.files}개 파일, {stats.chunks}개 청크, 실패 {stats.failed_files}개 "
+                f"({stats.seconds:.2f}초, {stats.docs_per_sec:.1f} docs/s, {stats.chunks_per_sec:.1f} chunks/s)"
+            )
+        return stats
+
+def watch(directory: str, pipeline: IngestPipeline, ledger: IngestLedger, interval: float = INGEST_WATCH_INTERVAL):
+    """디렉토리를 주기적으로 확인하여 새 파일/변경된 파일 적재 (Ctrl+C로 종료)"""
+    logger.info(f"디렉토리 감시 시작: {directory} ({interval}초 간격)")
+    while True:
+        pipeline.run(ledger.new_files(directory, settle_seconds=interval), root=directory)
+        time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 파일 적재 (PDF, TXT, MD, HTML)")
+    parser.add_argument("directory", nargs="?", default=DATA_DIR, help="적재할 디렉토리")
+    parser.add_argument("--watch", action="store_true", help="새 파일을 계속 감시하여 적재")
+    parser.add_argument("--interval", type=float, default=INGEST_WATCH_INTERVAL, help="감시 주기 (초)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="파싱 프로세스 수")
+    parser.add_argument("--all", action="store_true", help="적재 기록을 무시하고 모든 파일 적재")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    from app.vector_store import get_vector_store
+    
+    vector_store = get_vector_store()
+    ledger = IngestLedger()
+    pipeline = IngestPipeline(vector_store, workers=args.workers, ledger=ledger)
+    try:
+        if args.watch:
+            watch(args.directory, pipeline, ledger, args.interval)
+        else:
+            paths = iter_files(args.directory) if args.all else ledger.new_files(args.directory)
+            stats = pipeline.run(paths, root=args.directory)
+            print(json.dumps(stats.to_dict(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        vector_store.close()
+        ledger.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+로컬 CPU LLM 모듈
+OpenAI 키가 없을 때 사용하는 로컬 답변 생성 모델을 CPU에 맞게 준비
+
+- 백엔드 (LOCAL_LLM_BACKEND):
+  - int8: PyTorch 동적 양자화 (Linear 가중치를 int8로 저장하고 int8 연산, 기본값)
+  - onnx: ONNX Runtime (optimum으로 변환한 모델을 LOCAL_LLM_ONNX_DIR에 저장하여 다음 시작부터 재사용)
+  - fp32: 양자화 없는 PyTorch (비교용, 기존 방식)
+- 스레드 수: LOCAL_LLM_THREADS (PyTorch / ONNX Runtime 연산 스레드)
+- 생성 길이: 최대 LOCAL_LLM_MAX_NEW_TOKENS 토큰, greedy 디코딩
+- 입력 길이: LOCAL_LLM_MAX_INPUT_TOKENS를 넘으면 앞쪽(컨텍스트)부터 잘라 프롬프트 끝의 질문은 유지
+- 시작 시 짧은 프롬프트로 한 번 생성하여 첫 요청의 지연(메모리 할당, 커널 준비)을 미리 처리
+- 생성은 CPU 스레드를 모두 사용하므로 동시에 여러 개를 실행하지 않고 한 번에 하나씩 처리
+
+torch, transformers (onnx는 optimum[onnxruntime])는 로컬 LLM을 사용할 때만 필요하므로 함수 안에서 import
+"""
+from langchain_community.llms import HuggingFacePipeline
+from app.config import (
+    LOCAL_LLM_MODEL, LOCAL_LLM_TASK, LOCAL_LLM_BACKEND, LOCAL_LLM_THREADS,
+    LOCAL_LLM_MAX_NEW_TOKENS, LOCAL_LLM_MAX_INPUT_TOKENS, LOCAL_LLM_WARMUP, LOCAL_LLM_ONNX_DIR
+)
+from typing import Any, Dict, Optional, Tuple
+import threading
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("int8", "onnx", "fp32")
+_TASKS = ("text2text-generation", "text-generation")
+_WARMUP_PROMPT = "컨텍스트: 서울에는 경복궁이 있습니다.\n\n질문: 서울의 궁궐은?\n\n답변:"
+
+class _SerializedPipeline:
+    """transformers 파이프라인을 한 번에 하나씩 실행 (동시 생성이 CPU 스레드를 나눠 쓰며 모두 느려지지 않도록)"""
+    
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+        self._lock = threading.Lock()
+    
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self._pipeline(*args, **kwargs)
+    
+    def __getattr__(self, name: str):
+        # task, tokenizer, model 등은 원래 파이프라인 값 사용 (복사/pickle 중 _pipeline이 없을 때 재귀 방지)
+        if name.startswith("__") or name == "_pipeline":
+            raise AttributeError(name)
+        return getattr(self._pipeline, name)
+
+def _configure_torch_threads(threads: int):
+    """PyTorch 연산 스레드 수 설정 (inter-op 스레드는 생성 중 거의 쓰이지 않으므로 1개)"""
+    import torch
+    
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # 이미 병렬 작업이 시작된 뒤에는 바꿀 수 없음
+
+def _load_onnx_model(model_id: str, task: str, threads: int):
+    """ONNX Runtime 모델 로드 (처음에는 변환 후 LOCAL_LLM_ONNX_DIR에 저장)"""
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTModelForSeq2SeqLM
+    
+    model_class = ORTModelForSeq2SeqLM if task == "text2text-generation" else ORTModelForCausalLM
+    session_options = onnxruntime.SessionOptions()
+    session_options.intra_op_num_threads = threads
+    session_options.inter_op_num_threads = 1
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    
+    export_dir = os.path.join(LOCAL_LLM_ONNX_DIR, model_id.replace("/", "--"))
+    if os.path.isdir(export_dir) and os.listdir(export_dir):
+        return model_class.from_pretrained(
+            export_dir, session_options=session_options, provider="CPUExecutionProvider"
+        )
+    
+    logger.info(f"ONNX 변환: {model_id} -> {export_dir}")
+    model = model_class.from_pretrained(
+        model_id, export=True, session_options=session_options, provider="CPUExecutionProvider"
+    )
+    model.save_pretrained(export_dir)
+    return model
+
+def load_model(model_id: str, backend: str, task: str, threads: int) -> Tuple[Any, Any]:
+    """
+    백엔드에 맞게 모델과 토크나이저 로드
+    
+    Returns:
+        (모델, 토크나이저)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 로컬 LLM 백엔드: {backend} (사용 가능: {', '.join(BACKENDS)})")
+    if task not in _TASKS:
+        raise ValueError(f"지원하지 않는 로컬 LLM 작업: {task} (사용 가능: {', '.join(_TASKS)})")
+    
+    from transformers import AutoTokenizer
+    
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    # 프롬프트는 컨텍스트 뒤에 질문이 오므로 길면 앞쪽부터 자름
+    tokenizer.truncation_side = "left"
+    tokenizer.model_max_length = LOCAL_LLM_MAX_INPUT_TOKENS
+    
+    if backend == "onnx":
+        return _load_onnx_model(model_id, task, threads), tokenizer
+    
+    import torch
+    from transformers import AutoModelForCausalLM, AutoModelForSeq2SeqLM
+    
+    _configure_torch_threads(threads)
+    model_class = AutoModelForSeq2SeqLM if task == "text2text-generation" else AutoModelForCausalLM
+    model = model_class.from_pretrained(model_id, torch_dtype=torch.float32)
+    model.eval()
+    if backend == "int8":
+        # Linear 가중치만 int8로 양자화 (활성값은 실행 시 양자화) - 별도 보정 데이터 없이 CPU에서 바로 사용
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, tokenizer
+
+def generation_kwargs(task: str, max_new_tokens: int) -> Dict[str, Any]:
+    """파이프라인 생성 옵션 (greedy 디코딩, 생성 길이 제한, 긴 입력은 자름)"""
+    kwargs: Dict[str, Any] = {"max_new_tokens": max_new_tokens, "do_sample": False, "truncation": True}
+    if task == "text-generation":
+        kwargs["return_full_text"] = False  # 프롬프트를 제외한 답변만 반환
+    return kwargs
+
+def build_pipeline(
+    model_id: str = LOCAL_LLM_MODEL,
+    backend: str = LOCAL_LLM_BACKEND,
+    task: str = LOCAL_LLM_TASK,
+    threads: int = LOCAL_LLM_THREADS
+):
+    """CPU용 transformers 파이프라인 생성"""
+    from transformers import pipeline
+    
+    model, tokenizer = load_model(model_id, backend, task, threads)
+    return pipeline(task, model=model, tokenizer=tokenizer, device="cpu")
+
+def warm_up(pipe, task: str = LOCAL_LLM_TASK) -> float:
+    """짧은 프롬프트로 한 번 생성 -> 걸린 시간(초)"""
+    start = time.perf_counter()
+    pipe(_WARMUP_PROMPT, **generation_kwargs(task, 8))
+    return time.perf_counter() - start
+
+def create_local_llm(max_new_tokens: Optional[int] = None) -> HuggingFacePipeline:
+    """RAGEngine용 로컬 LLM 생성 (로드 + 워밍업)"""
+    if max_new_tokens is None:
+        max_new_tokens = LOCAL_LLM_MAX_NEW_TOKENS
+    
+    start = time.perf_counter()
+    pipe = build_pipeline()
+    logger.info(
+        f"로컬 LLM 로드: {LOCAL_LLM_MODEL} ({LOCAL_LLM_BACKEND}, 스레드 {LOCAL_LLM_THREADS}개, "
+        f"{time.perf_counter() - start:.1f}초)"
+    )
+    if LOCAL_LLM_WARMUP:
+        logger.info(f"로컬 LLM 워밍업 완료 ({warm_up(pipe):.2f}초)")
+    
+    return HuggingFacePipeline(
+        pipeline=_SerializedPipeline(pipe),
+        model_id=f"{LOCAL_LLM_MODEL}:{LOCAL_LLM_BACKEND}",
+        pipeline_kwargs=generation_kwargs(LOCAL_LLM_TASK, max_new_tokens)
+    )
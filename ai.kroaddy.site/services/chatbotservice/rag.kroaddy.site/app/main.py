@@ -2,12 +2,15 @@
 RAG Service - FastAPI 애플리케이션
 """
 from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from langchain.schema import Document
 from app.rag_engine import RAGEngine
-from app.vector_store import VectorStore
+from app.ingest import IngestLedger, IngestPipeline, SUPPORTED_EXTENSIONS
+from app.filters import parse_filter
+from app.config import DATA_DIR, INGEST_WORKERS, MAX_TOP_K, VECTOR_DB_TYPE
 import logging
 import os
 
@@ -31,15 +34,29 @@ app.add_middleware(
 )
 
 # RAG 엔진 초기화
+# 문서 추가(/documents)와 검색(/query, /search)은 같은 공유 벡터 저장소/임베딩 모델을 사용
 logger.info("RAG 엔진 초기화 중...")
 try:
     rag_engine = RAGEngine()
-    vector_store = VectorStore()
+    vector_store = rag_engine.vector_store
+    # 업로드 파일 적재 기록 (수집 CLI와 같은 파일 - 같은 이름으로 다시 올리면 이전 청크를 교체)
+    ingest_ledger = IngestLedger()
     logger.info("RAG 엔진 초기화 완료")
 except Exception as e:
     logger.error(f"RAG 엔진 초기화 실패: {e}")
     rag_engine = None
     vector_store = None
+    ingest_ledger = None
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """종료 시 벡터 저장소 / 스레드 풀 정리"""
+    if vector_store is not None:
+        vector_store.close()
+    if rag_engine is not None:
+        rag_engine.close()
+    if ingest_ledger is not None:
+        ingest_ledger.close()
 
 # ============================================================================
 # 요청/응답 모델
@@ -47,7 +64,12 @@ except Exception as e:
 
 class QueryRequest(BaseModel):
     question: str
-    top_k: Optional[int] = None
+    # 컨텍스트 문서 수 (없으면 TOP_K_RESULTS)
+    top_k: Optional[int] = Field(None, ge=1, le=MAX_TOP_K)
+    # 메타데이터 필터 (예: {"category": "seoul", "year": {"$gte": 2023}}) - app/filters.py 참고
+    filter: Optional[dict] = None
+    # MMR로 서로 겹치는 청크 제외 (없으면 RAG_USE_MMR)
+    mmr: Optional[bool] = None
 
 class QueryResponse(BaseModel):
     answer: str
@@ -55,7 +77,8 @@ class QueryResponse(BaseModel):
 
 class SearchRequest(BaseModel):
     query: str
-    top_k: Optional[int] = None
+    top_k: Optional[int] = Field(None, ge=1, le=MAX_TOP_K)
+    filter: Optional[dict] = None
 
 class SearchResponse(BaseModel):
     results: List[dict]
@@ -68,6 +91,22 @@ class DocumentResponse(BaseModel):
     message: str
     document_count: int
 
+class UploadResponse(BaseModel):
+    message: str
+    files: int
+    failed_files: int
+    chunks: int
+    seconds: float
+    docs_per_sec: float
+    chunks_per_sec: float
+
+def _validate_filter(filter: Optional[dict]):
+    """메타데이터 필터 형식 검사 (잘못된 필터는 400, Chroma는 범위 연산자에 숫자만 허용)"""
+    try:
+        parse_filter(filter, string_ranges=VECTOR_DB_TYPE != "chroma")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 필터: {e}")
+
 # ============================================================================
 # API 엔드포인트
 # ============================================================================
@@ -87,7 +126,9 @@ async def health_check():
     return {
         "status": "healthy",
         "rag_engine_ready": rag_engine is not None,
-        "vector_store_ready": vector_store is not None
+        "vector_store_ready": vector_store is not None,
+        "embeddings": vector_store.embedding_generator.stats() if vector_store is not None else None,
+        "query_cache": rag_engine.cache_stats() if rag_engine is not None else None
     }
 
 @app.post("/query", response_model=QueryResponse)
@@ -95,10 +136,11 @@ async def query(request: QueryRequest):
     """질문에 대한 답변 생성 (RAG)"""
     if rag_engine is None:
         raise HTTPException(status_code=503, detail="RAG 엔진이 초기화되지 않았습니다.")
+    _validate_filter(request.filter)
     
     try:
         logger.info(f"질문 수신: {request.question}")
-        result = rag_engine.query(request.question)
+        result = await rag_engine.aquery(request.question, k=request.top_k, filter=request.filter, mmr=request.mmr)
         logger.info(f"답변 생성 완료")
         return QueryResponse(**result)
     except Exception as e:
@@ -110,10 +152,11 @@ async def search(request: SearchRequest):
     """문서 검색 (생성 없음)"""
     if vector_store is None:
         raise HTTPException(status_code=503, detail="벡터 저장소가 초기화되지 않았습니다.")
+    _validate_filter(request.filter)
     
     try:
         logger.info(f"검색 쿼리: {request.query}")
-        results = rag_engine.search_only(request.query, k=request.top_k)
+        results = await rag_engine.asearch_only(request.query, k=request.top_k, filter=request.filter)
         logger.info(f"검색 결과: {len(results)}개")
         return SearchResponse(results=results)
     except Exception as e:
@@ -132,7 +175,8 @@ async def add_document(request: DocumentRequest):
             page_content=request.text,
             metadata=request.metadata or {}
         )
-        vector_store.add_documents([document])
+        # 임베딩/저장은 스레드 풀에서 실행 (다른 요청을 막지 않도록)
+        await rag_engine.run_sync(vector_store.add_documents, [document])
         logger.info("문서 추가 완료")
         return DocumentResponse(
             message="문서가 성공적으로 추가되었습니다.",
@@ -157,7 +201,7 @@ async def add_documents_batch(documents: List[DocumentRequest]):
             )
             for doc in documents
         ]
-        vector_store.add_documents(docs)
+        await rag_engine.run_sync(vector_store.add_documents, docs)
         logger.info(f"{len(documents)}개 문서 추가 완료")
         return DocumentResponse(
             message=f"{len(documents)}개 문서가 성공적으로 추가되었습니다.",
@@ -167,6 +211,47 @@ async def add_documents_batch(documents: List[DocumentRequest]):
         logger.error(f"문서 일괄 추가 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/documents/upload", response_model=UploadResponse)
+async def upload_documents(files: List[UploadFile] = File(...)):
+    """파일 업로드 적재 (PDF, TXT, MD, HTML) - 청크로 나눠 벡터 저장소에 추가"""
+    if vector_store is None:
+        raise HTTPException(status_code=503, detail="벡터 저장소가 초기화되지 않았습니다.")
+    
+    names = [os.path.basename(upload.filename or "") for upload in files]
+    unsupported = [name for name in names if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS]
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 파일 형식: {', '.join(unsupported)} (지원: {', '.join(sorted(SUPPORTED_EXTENSIONS))})"
+        )
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"같은 이름의 파일이 중복되었습니다: {', '.join(duplicates)}")
+    
+    try:
+        # 업로드 파일은 DATA_DIR/uploads에 보관 (1MB 단위로 복사하여 큰 파일도 메모리에 올리지 않음)
+        upload_dir = os.path.join(DATA_DIR, "uploads")
+        os.makedirs(upload_dir, exist_ok=True)
+        paths = []
+        for upload, name in zip(files, names):
+            path = os.path.join(upload_dir, name)
+            with open(path, "wb") as f:
+                while data := await upload.read(1024 * 1024):
+                    f.write(data)
+            paths.append(path)
+        
+        logger.info(f"파일 업로드 적재: {len(paths)}개")
+        pipeline = IngestPipeline(vector_store, workers=min(INGEST_WORKERS, len(paths)), ledger=ingest_ledger)
+        # source는 수집 CLI(기본 DATA_DIR)와 같이 DATA_DIR 기준 경로(uploads/<파일 이름>)로 기록
+        stats = await run_in_threadpool(pipeline.run, paths, DATA_DIR)
+        return UploadResponse(
+            message=f"{stats.files}개 파일 ({stats.chunks}개 청크)이 추가되었습니다.",
+            **stats.to_dict()
+        )
+    except Exception as e:
+        logger.error(f"파일 업로드 적재 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     from app.config import HOST, PORT
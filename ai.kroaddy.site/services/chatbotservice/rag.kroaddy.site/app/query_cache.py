@@ -0,0 +1,95 @@
+"""
+질의 캐시 모듈
+RAGEngine.query의 검색 결과와 최종 답변을 메모리에 저장하여 같은 질문에 검색/답변 생성을 반복하지 않음
+
+- 검색 캐시: (정규화한 질문, top_k, 필터, MMR 여부, 인덱스 버전) -> 검색된 문서
+- 답변 캐시: (정규화한 질문, 검색된 문서 ID, LLM 설정) -> 답변 + 소스
+- 항목은 TTL이 지나면 만료되고, 최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 제거 (LRU)
+- 문서가 추가되어 인덱스 버전이 바뀌면 두 캐시를 모두 비움 (RAGEngine에서 처리)
+"""
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from langchain.schema import Document
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질문 정규화 (유니코드 NFKC, 대소문자, 공백 차이 무시)"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+def filter_key(filter: Optional[dict]) -> str:
+    """메타데이터 필터를 키 순서와 무관한 문자열로 변환"""
+    return json.dumps(filter or {}, sort_keys=True, ensure_ascii=False)
+
+def document_id(doc: Document) -> str:
+    """문서 내용(본문 + 메타데이터) 해시 - 저장소와 관계없이 같은 문서는 같은 ID"""
+    payload = json.dumps([doc.page_content, doc.metadata], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class TTLCache:
+    """TTL + LRU 메모리 캐시 (스레드 안전)"""
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600):
+        """
+        Args:
+            max_entries: 최대 항목 수 (0이면 캐시 사용 안 함)
+            ttl_seconds: 항목 유효 시간 (0 이하면 만료 없음)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "invalidations": 0}
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any):
+        """캐시 저장 (최대 개수를 넘으면 가장 오래 사용하지 않은 항목 제거)"""
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evicted"] += 1
+    
+    def clear(self):
+        """모든 항목 삭제 (인덱스가 바뀌었을 때)"""
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+    
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -2,12 +2,23 @@
 RAG 엔진: 검색 + 생성
 """
 from langchain_openai import ChatOpenAI
-from langchain_community.llms import HuggingFacePipeline
-from langchain.chains import RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
-from app.vector_store import VectorStore
-from app.config import LLM_MODEL, OPENAI_API_KEY, TOP_K_RESULTS, SIMILARITY_THRESHOLD
+from app.vector_store import VectorStore, get_vector_store
+from app.query_cache import TTLCache, normalize_query, filter_key, document_id
+from app.config import (
+    LLM_MODEL, OPENAI_API_KEY, TOP_K_RESULTS, SIMILARITY_THRESHOLD,
+    LOCAL_LLM_MODEL, LOCAL_LLM_BACKEND,
+    RAG_USE_MMR, RAG_MMR_FETCH_K, RAG_MMR_LAMBDA,
+    RAG_MAX_CONCURRENT_QUERIES, RAG_MAX_CONCURRENT_SEARCHES, RAG_THREAD_POOL_SIZE,
+    RAG_RETRIEVAL_CACHE_SIZE, RAG_ANSWER_CACHE_SIZE, RAG_CACHE_TTL_SECONDS
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import functools
+import json
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,10 +26,23 @@ logger = logging.getLogger(__name__)
 class RAGEngine:
     """RAG 엔진 클래스"""
     
-    def __init__(self):
-        self.vector_store = VectorStore()
+    def __init__(self, vector_store: Optional[VectorStore] = None):
+        """
+        Args:
+            vector_store: 검색에 사용할 벡터 저장소 (없으면 공유 벡터 저장소)
+        """
+        self.vector_store = vector_store or get_vector_store()
         self.llm = self._initialize_llm()
         self.qa_chain = self._create_qa_chain()
+        # 검색 결과 / 답변 캐시 (문서가 추가되어 인덱스 버전이 바뀌면 비움)
+        self.retrieval_cache = TTLCache(RAG_RETRIEVAL_CACHE_SIZE, RAG_CACHE_TTL_SECONDS)
+        self.answer_cache = TTLCache(RAG_ANSWER_CACHE_SIZE, RAG_CACHE_TTL_SECONDS)
+        self._cache_version = self.vector_store.version
+        self._llm_config = self._llm_config_key()
+        # 동기 작업(질의 임베딩, 벡터 검색)은 크기가 제한된 스레드 풀에서 실행하여 이벤트 루프를 막지 않음
+        self._executor = ThreadPoolExecutor(max_workers=RAG_THREAD_POOL_SIZE, thread_name_prefix="rag")
+        self._query_semaphore = asyncio.Semaphore(RAG_MAX_CONCURRENT_QUERIES)
+        self._search_semaphore = asyncio.Semaphore(RAG_MAX_CONCURRENT_SEARCHES)
     
     def _initialize_llm(self):
         """LLM 초기화"""
@@ -31,19 +55,20 @@ class RAGEngine:
                     openai_api_key=OPENAI_API_KEY
                 )
             else:
-                logger.info("HuggingFace LLM 사용 (기본 모델)")
-                # HuggingFace 모델 사용 (예: google/flan-t5-base)
-                return HuggingFacePipeline.from_model_id(
-                    model_id="google/flan-t5-base",
-                    task="text2text-generation",
-                    model_kwargs={"temperature": 0.7}
-                )
+                logger.info(f"로컬 CPU LLM 사용: {LOCAL_LLM_MODEL} ({LOCAL_LLM_BACKEND})")
+                # torch/transformers는 로컬 LLM에서만 필요하므로 여기서 import (로드 + 워밍업)
+                from app.local_llm import create_local_llm
+                return create_local_llm()
         except Exception as e:
             logger.error(f"LLM 초기화 실패: {e}")
             raise
     
     def _create_qa_chain(self):
-        """QA 체인 생성"""
+        """
+        QA 체인 생성 (검색한 문서를 프롬프트에 넣어 답변 생성)
+        
+        검색은 요청마다 top_k, 필터, MMR을 다르게 적용하도록 _retrieve에서 하고, 체인은 답변 생성만 담당
+        """
         try:
             prompt_template = """다음 컨텍스트를 사용하여 질문에 답변하세요. 
 컨텍스트에 답이 없으면 "답을 찾을 수 없습니다"라고 답변하세요.
@@ -59,19 +84,7 @@ class RAGEngine:
                 input_variables=["context", "question"]
             )
             
-            if self.vector_store.vector_store is None:
-                logger.warning("벡터 저장소가 비어있어 QA 체인을 생성할 수 없습니다.")
-                return None
-            
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vector_store.vector_store.as_retriever(
-                    search_kwargs={"k": TOP_K_RESULTS}
-                ),
-                chain_type_kwargs={"prompt": PROMPT},
-                return_source_documents=True
-            )
+            qa_chain = load_qa_chain(llm=self.llm, chain_type="stuff", prompt=PROMPT)
             
             logger.info("QA 체인 생성 완료")
             return qa_chain
@@ -80,30 +93,181 @@ class RAGEngine:
             logger.error(f"QA 체인 생성 실패: {e}")
             return None
     
-    def query(self, question: str) -> dict:
-        """질문에 대한 답변 생성"""
+    def _get_qa_chain(self):
+        """QA 체인 (벡터 저장소가 비어 있으면 None)"""
+        if self.vector_store.vector_store is None:
+            logger.warning("벡터 저장소가 비어있어 답변을 생성할 수 없습니다.")
+            return None
+        if self.qa_chain is None:
+            self.qa_chain = self._create_qa_chain()
+        return self.qa_chain
+    
+    def _llm_config_key(self) -> str:
+        """답변 캐시 키에 넣을 LLM 설정 (모델이나 생성 옵션이 바뀌면 다른 키)"""
+        return json.dumps({
+            "type": type(self.llm).__name__,
+            "model": getattr(self.llm, "model_name", None) or getattr(self.llm, "model_id", None),
+            "temperature": getattr(self.llm, "temperature", None),
+            "max_tokens": getattr(self.llm, "max_tokens", None),
+            "pipeline_kwargs": getattr(self.llm, "pipeline_kwargs", None)
+        }, sort_keys=True, default=str)
+    
+    async def run_sync(self, func, *args, **kwargs):
+        """동기 함수를 RAG 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    def _format_answer(self, answer: str, source_documents: list[Document]) -> dict:
+        """답변 + 소스 문서 정보"""
+        sources = []
+        for doc in source_documents:
+            sources.append({
+                "content": doc.page_content[:200] + "...",  # 처음 200자만
+                "metadata": doc.metadata
+            })
+        return {
+            "answer": answer,
+            "sources": sources
+        }
+    
+    def _retrieve(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        mmr: Optional[bool] = None
+    ) -> list[Document]:
+        """
+        답변 컨텍스트로 사용할 문서 검색 (메타데이터 필터는 벡터 저장소 안에서 적용)
+        
+        Args:
+            k: 컨텍스트 문서 수 (없으면 TOP_K_RESULTS)
+            mmr: MMR로 서로 겹치는 청크를 제외할지 여부 (없으면 RAG_USE_MMR)
+        """
+        if k is None:
+            k = TOP_K_RESULTS
+        if mmr is None:
+            mmr = RAG_USE_MMR
+        if mmr:
+            return self.vector_store.search_mmr(
+                question, k=k, fetch_k=RAG_MMR_FETCH_K, lambda_mult=RAG_MMR_LAMBDA, filter=filter
+            )
+        return self.vector_store.search(question, k=k, filter=filter)
+    
+    def _sync_cache_version(self):
+        """인덱스 버전이 바뀌었으면 (문서 추가) 검색/답변 캐시를 비움"""
+        version = self.vector_store.version
+        if version != self._cache_version:
+            self._cache_version = version
+            self.retrieval_cache.clear()
+            self.answer_cache.clear()
+    
+    def _retrieve_cached(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        mmr: Optional[bool] = None
+    ) -> list[Document]:
+        """
+        검색 캐시를 거쳐 컨텍스트 문서 검색
+        
+        키: (정규화한 질문, top_k, 필터, MMR 여부, 인덱스 버전). 검색 실패와 구분할 수 없는 빈 결과는 저장하지 않음
+        """
+        self._sync_cache_version()
+        key = (
+            normalize_query(question),
+            k or TOP_K_RESULTS,
+            filter_key(filter),
+            RAG_USE_MMR if mmr is None else mmr,
+            self.vector_store.version
+        )
+        docs = self.retrieval_cache.get(key)
+        if docs is None:
+            docs = self._retrieve(question, k, filter, mmr)
+            if docs:
+                self.retrieval_cache.put(key, docs)
+        return docs
+    
+    def _answer_key(self, question: str, docs: list[Document]) -> tuple:
+        """답변 캐시 키: (정규화한 질문, 검색된 문서 ID, LLM 설정)"""
+        return (normalize_query(question), tuple(document_id(doc) for doc in docs), self._llm_config)
+    
+    def query(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        mmr: Optional[bool] = None
+    ) -> dict:
+        """질문에 대한 답변 생성 (동기 - 이벤트 루프 안에서는 aquery 사용)"""
         try:
-            if self.qa_chain is None:
+            qa_chain = self._get_qa_chain()
+            if qa_chain is None:
                 return {
                     "answer": "벡터 저장소가 비어있습니다. 먼저 문서를 추가해주세요.",
                     "sources": []
                 }
             
-            result = self.qa_chain({"query": question})
-            
-            # 소스 문서 정보 추출
-            sources = []
-            if "source_documents" in result:
-                for doc in result["source_documents"]:
-                    sources.append({
-                        "content": doc.page_content[:200] + "...",  # 처음 200자만
-                        "metadata": doc.metadata
-                    })
+            docs = self._retrieve_cached(question, k, filter, mmr)
+            answer_key = self._answer_key(question, docs)
+            cached = self.answer_cache.get(answer_key)
+            if cached is not None:
+                return cached
             
+            result = qa_chain.invoke({
+                "input_documents": docs,
+                "question": question
+            })
+            answer = self._format_answer(result["output_text"], docs)
+            if docs:
+                self.answer_cache.put(answer_key, answer)
+            return answer
+        
+        except Exception as e:
+            logger.error(f"질문 처리 실패: {e}")
             return {
-                "answer": result["result"],
-                "sources": sources
+                "answer": f"오류가 발생했습니다: {str(e)}",
+                "sources": []
             }
+    
+    async def aquery(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        mmr: Optional[bool] = None
+    ) -> dict:
+        """
+        질문에 대한 답변 생성 (비동기)
+        
+        검색은 스레드 풀에서, 답변 생성은 LLM 비동기 호출(ainvoke)로 실행하여 느린 답변이 다른 요청을 막지 않음.
+        동시에 진행하는 답변 생성은 RAG_MAX_CONCURRENT_QUERIES개로 제한.
+        캐시된 답변이 있으면 LLM을 호출하지 않음
+        """
+        try:
+            qa_chain = self._get_qa_chain()
+            if qa_chain is None:
+                return {
+                    "answer": "벡터 저장소가 비어있습니다. 먼저 문서를 추가해주세요.",
+                    "sources": []
+                }
+            
+            async with self._query_semaphore:
+                docs = await self.run_sync(self._retrieve_cached, question, k, filter, mmr)
+                answer_key = self._answer_key(question, docs)
+                cached = self.answer_cache.get(answer_key)
+                if cached is not None:
+                    return cached
+                
+                result = await qa_chain.ainvoke({
+                    "input_documents": docs,
+                    "question": question
+                })
+            answer = self._format_answer(result["output_text"], docs)
+            if docs:
+                self.answer_cache.put(answer_key, answer)
+            return answer
         
         except Exception as e:
             logger.error(f"질문 처리 실패: {e}")
@@ -112,21 +276,27 @@ class RAGEngine:
                 "sources": []
             }
     
-    def search_only(self, query: str, k: int = None) -> list[dict]:
-        """검색만 수행 (생성 없음)"""
+    def search_only(self, query: str, k: int = None, filter: Optional[dict] = None) -> list[dict]:
+        """
+        검색만 수행 (생성 없음, filter: 메타데이터 필터)
+        
+        score는 0~1 유사도(높을수록 유사), distance는 저장소가 반환한 L2 제곱 거리.
+        score가 SIMILARITY_THRESHOLD 미만인 문서는 제외
+        """
         try:
             if k is None:
                 k = TOP_K_RESULTS
             
-            results = self.vector_store.search_with_score(query, k=k)
+            results = self.vector_store.search_with_similarity(query, k=k, filter=filter)
             
             formatted_results = []
-            for doc, score in results:
+            for doc, score, distance in results:
                 if score >= SIMILARITY_THRESHOLD:  # 유사도 임계값 필터링
                     formatted_results.append({
                         "content": doc.page_content,
                         "metadata": doc.metadata,
-                        "score": float(score)
+                        "score": float(score),
+                        "distance": float(distance)
                     })
             
             return formatted_results
@@ -134,4 +304,20 @@ class RAGEngine:
         except Exception as e:
             logger.error(f"검색 실패: {e}")
             return []
-
+    
+    async def asearch_only(self, query: str, k: int = None, filter: Optional[dict] = None) -> list[dict]:
+        """검색만 수행 (비동기 - 스레드 풀에서 실행, 동시 검색 수는 RAG_MAX_CONCURRENT_SEARCHES개로 제한)"""
+        async with self._search_semaphore:
+            return await self.run_sync(self.search_only, query, k, filter)
+    
+    def cache_stats(self) -> dict:
+        """검색/답변 캐시 통계 (/health)"""
+        return {
+            "index_version": self.vector_store.version,
+            "retrieval": self.retrieval_cache.stats(),
+            "answer": self.answer_cache.stats()
+        }
+    
+    def close(self):
+        """스레드 풀 정리"""
+        self._executor.shutdown(wait=False)
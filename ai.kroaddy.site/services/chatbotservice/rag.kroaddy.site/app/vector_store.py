@@ -2,21 +2,46 @@
 벡터 저장소 관리 모듈
 """
 from langchain_community.vectorstores import Chroma
-from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
-from app.embeddings import EmbeddingGenerator
-from app.config import VECTOR_DB_TYPE, VECTOR_DB_PATH, COLLECTION_NAME
+from app.embeddings import EmbeddingGenerator, get_embedding_generator
+from app.config import (
+    VECTOR_DB_TYPE, VECTOR_DB_PATH, COLLECTION_NAME,
+    FAISS_INDEX_TYPE, FAISS_HNSW_M, FAISS_HNSW_EF_SEARCH, FAISS_COMPACT_EVERY, FAISS_MMAP, FAISS_FILTER_BRUTE_FORCE_MAX
+)
+from app.filters import to_chroma_where
+from typing import Optional
+import threading
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+def distance_to_similarity(distance: float) -> float:
+    """
+    L2 제곱 거리를 0~1 유사도로 변환 (높을수록 유사)
+    
+    FAISS(IndexFlatL2/HNSW)와 ChromaDB(기본 l2 공간) 모두 L2 제곱 거리를 반환하며,
+    정규화된 임베딩(OpenAI, HF_EMBEDDING_NORMALIZE=true)에서는 1 - 거리/2가 코사인 유사도와 같음
+    """
+    return max(0.0, min(1.0, 1.0 - distance / 2.0))
+
+# 프로세스 공유 벡터 저장소 (get_vector_store로 처음 사용할 때 생성)
+_shared_store: Optional["VectorStore"] = None
+_shared_lock = threading.Lock()
+
 class VectorStore:
     """벡터 저장소 관리 클래스"""
     
-    def __init__(self):
-        self.embedding_generator = EmbeddingGenerator()
+    def __init__(self, embedding_generator: Optional[EmbeddingGenerator] = None):
+        """
+        Args:
+            embedding_generator: 사용할 임베딩 생성기 (없으면 공유 임베딩 생성기)
+        """
+        self.embedding_generator = embedding_generator or get_embedding_generator()
         self.vector_store = self._initialize_vector_store()
+        # 인덱스 버전 - 문서를 추가할 때마다 증가 (검색/답변 캐시 무효화에 사용)
+        self.version = 0
+        self._version_lock = threading.Lock()
     
     def _initialize_vector_store(self):
         """벡터 저장소 초기화"""
@@ -44,17 +69,21 @@ class VectorStore:
                 faiss_path = os.path.join(VECTOR_DB_PATH, "faiss_index")
                 os.makedirs(faiss_path, exist_ok=True)
                 
-                if os.path.exists(faiss_path) and os.listdir(faiss_path):
-                    logger.info(f"기존 FAISS 인덱스 로드: {faiss_path}")
-                    return FAISS.load_local(
-                        faiss_path,
-                        self.embedding_generator.embeddings,
-                        allow_dangerous_deserialization=True
-                    )
-                else:
-                    logger.info(f"새 FAISS 인덱스 생성: {faiss_path}")
-                    # 빈 FAISS 인덱스 생성 (문서 추가 후 저장)
-                    return None
+                # faiss는 FAISS 모드에서만 필요하므로 여기서 import
+                from app.faiss_store import IncrementalFAISS
+                
+                # 스냅샷을 mmap으로 열고 WAL을 다시 적용 (비어 있으면 빈 저장소, 첫 문서 추가 시 인덱스 생성)
+                logger.info(f"FAISS 인덱스 로드: {faiss_path} ({FAISS_INDEX_TYPE})")
+                return IncrementalFAISS(
+                    faiss_path,
+                    self.embedding_generator.embeddings,
+                    index_type=FAISS_INDEX_TYPE,
+                    hnsw_m=FAISS_HNSW_M,
+                    ef_search=FAISS_HNSW_EF_SEARCH,
+                    compact_every=FAISS_COMPACT_EVERY,
+                    mmap=FAISS_MMAP,
+                    filter_brute_force_max=FAISS_FILTER_BRUTE_FORCE_MAX
+                )
             
             else:
                 raise ValueError(f"지원하지 않는 벡터 DB 타입: {VECTOR_DB_TYPE}")
@@ -80,36 +109,74 @@ class VectorStore:
                 logger.info(f"{len(documents)}개 문서 추가 완료 (ChromaDB)")
             
             elif VECTOR_DB_TYPE == "faiss":
-                faiss_path = os.path.join(VECTOR_DB_PATH, "faiss_index")
-                
-                if self.vector_store is None:
-                    self.vector_store = FAISS.from_documents(
-                        documents=documents,
-                        embedding=self.embedding_generator.embeddings
-                    )
-                else:
-                    # 기존 인덱스에 추가
-                    temp_store = FAISS.from_documents(
-                        documents=documents,
-                        embedding=self.embedding_generator.embeddings
-                    )
-                    self.vector_store.merge_from(temp_store)
-                
-                self.vector_store.save_local(faiss_path)
+                # WAL에 새 문서만 기록 (전체 인덱스는 주기적으로 스냅샷)
+                self.vector_store.add_documents(documents)
                 logger.info(f"{len(documents)}개 문서 추가 완료 (FAISS)")
         
         except Exception as e:
             logger.error(f"문서 추가 실패: {e}")
             raise
+        
+        finally:
+            # 일부만 추가되고 실패했을 수도 있으므로 항상 버전 증가
+            with self._version_lock:
+                self.version += 1
     
-    def search(self, query: str, k: int = 5) -> list[Document]:
-        """쿼리와 유사한 문서 검색"""
+    def delete_documents(self, filter: dict) -> int:
+        """
+        메타데이터 필터(app.filters 형식)에 맞는 문서 삭제 (예: {"source": "guide.md"} - 변경된 파일의 이전 청크)
+        
+        Returns:
+            삭제한 문서 수
+        """
+        try:
+            if self.vector_store is None:
+                return 0
+            if VECTOR_DB_TYPE == "chroma":
+                ids = self.vector_store.get(where=to_chroma_where(filter), include=[])["ids"]
+                if ids:
+                    self.vector_store.delete(ids=ids)
+                    self.vector_store.persist()
+                deleted = len(ids)
+            else:
+                # 문서 저장소에서 바로 삭제 (스냅샷의 벡터는 다음 스냅샷 때 제거)
+                deleted = self.vector_store.delete_by_filter(filter)
+            logger.info(f"{deleted}개 문서 삭제 완료 ({filter})")
+            return deleted
+        
+        except Exception as e:
+            logger.error(f"문서 삭제 실패: {e}")
+            raise
+        
+        finally:
+            with self._version_lock:
+                self.version += 1
+    
+    def close(self):
+        """종료 처리 (FAISS는 WAL을 스냅샷으로 정리)"""
+        if VECTOR_DB_TYPE == "faiss" and self.vector_store is not None:
+            self.vector_store.close()
+    
+    def _filter_kwargs(self, filter: Optional[dict]) -> dict:
+        """
+        메타데이터 필터를 저장소 검색 인자로 변환 (검색 후 거르지 않고 저장소 안에서 적용)
+        
+        ChromaDB는 where 절, FAISS는 메타데이터 역색인으로 구한 ID 안에서 검색
+        """
+        if not filter:
+            return {}
+        if VECTOR_DB_TYPE == "chroma":
+            return {"filter": to_chroma_where(filter)}
+        return {"filter": filter}
+    
+    def search(self, query: str, k: int = 5, filter: Optional[dict] = None) -> list[Document]:
+        """쿼리와 유사한 문서 검색 (filter: app.filters 형식의 메타데이터 필터)"""
         try:
             if self.vector_store is None:
                 logger.warning("벡터 저장소가 비어있습니다.")
                 return []
             
-            results = self.vector_store.similarity_search(query, k=k)
+            results = self.vector_store.similarity_search(query, k=k, **self._filter_kwargs(filter))
             logger.info(f"검색 결과: {len(results)}개 문서 발견")
             return results
         
@@ -117,18 +184,61 @@ class VectorStore:
             logger.error(f"검색 실패: {e}")
             return []
     
-    def search_with_score(self, query: str, k: int = 5) -> list[tuple[Document, float]]:
-        """쿼리와 유사한 문서 검색 (유사도 점수 포함)"""
+    def search_with_score(self, query: str, k: int = 5, filter: Optional[dict] = None) -> list[tuple[Document, float]]:
+        """쿼리와 유사한 문서 검색 (유사도 점수 포함, filter: app.filters 형식의 메타데이터 필터)"""
         try:
             if self.vector_store is None:
                 logger.warning("벡터 저장소가 비어있습니다.")
                 return []
             
-            results = self.vector_store.similarity_search_with_score(query, k=k)
+            results = self.vector_store.similarity_search_with_score(query, k=k, **self._filter_kwargs(filter))
             logger.info(f"검색 결과: {len(results)}개 문서 발견")
             return results
         
         except Exception as e:
             logger.error(f"검색 실패: {e}")
             return []
+    
+    def search_with_similarity(self, query: str, k: int = 5, filter: Optional[dict] = None) -> list[tuple[Document, float, float]]:
+        """쿼리와 유사한 문서 검색 -> (문서, 0~1 유사도, L2 거리)"""
+        return [
+            (doc, distance_to_similarity(distance), distance)
+            for doc, distance in self.search_with_score(query, k=k, filter=filter)
+        ]
+    
+    def search_mmr(
+        self,
+        query: str,
+        k: int = 5,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[dict] = None
+    ) -> list[Document]:
+        """MMR 검색 - 가까운 fetch_k개 후보 중 서로 겹치지 않는 k개 선택 (filter: app.filters 형식의 메타데이터 필터)"""
+        try:
+            if self.vector_store is None:
+                logger.warning("벡터 저장소가 비어있습니다.")
+                return []
+            
+            results = self.vector_store.max_marginal_relevance_search(
+                query, k=k, fetch_k=max(k, fetch_k), lambda_mult=lambda_mult, **self._filter_kwargs(filter)
+            )
+            logger.info(f"MMR 검색 결과: {len(results)}개 문서 발견")
+            return results
+        
+        except Exception as e:
+            logger.error(f"검색 실패: {e}")
+            return []
 
+def get_vector_store() -> VectorStore:
+    """
+    공유 벡터 저장소 반환
+    
+    문서 추가와 검색이 같은 인스턴스를 사용해야 추가한 문서가 재시작 없이 바로 검색됨
+    """
+    global _shared_store
+    if _shared_store is None:
+        with _shared_lock:
+            if _shared_store is None:
+                _shared_store = VectorStore()
+    return _shared_store
@@ -0,0 +1,148 @@
+"""
+RAG 동시 처리 벤치마크
+로컬 mock 서버(OpenAI 형식, 답변 생성에 지연 시간 추가)를 띄워
+이벤트 루프 안에서 동기 query를 호출하는 기존 방식과 비동기 aquery 방식의 동시 처리량을 비교
+
+실행 (rag.kroaddy.site 디렉토리에서):
+    python -m benchmarks.bench_concurrency --requests 100 --concurrency 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 18902
+EMBEDDING_DIM = 64
+
+mock_app = FastAPI()
+mock_latency = 0.2
+
+def _mock_vector(value) -> list:
+    """입력(텍스트 또는 토큰 ID 목록)별 고정 벡터"""
+    digest = hashlib.sha256(repr(value).encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 128) / 128 for i in range(EMBEDDING_DIM)]
+
+@mock_app.post("/v1/embeddings")
+async def mock_embeddings(payload: dict):
+    """OpenAI embeddings 형식의 고정 응답"""
+    inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+    return {
+        "object": "list",
+        "model": payload.get("model", "mock"),
+        "data": [{"object": "embedding", "index": i, "embedding": _mock_vector(value)} for i, value in enumerate(inputs)],
+        "usage": {"prompt_tokens": 1, "total_tokens": 1}
+    }
+
+@mock_app.post("/v1/chat/completions")
+async def mock_chat_completions(payload: dict):
+    """OpenAI chat completions 형식의 고정 응답 (LLM 생성 시간만큼 지연)"""
+    await asyncio.sleep(mock_latency)
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "경복궁입니다."}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    }
+
+def start_mock_server() -> uvicorn.Server:
+    """mock 서버를 백그라운드 스레드에서 실행"""
+    config = uvicorn.Config(mock_app, host=MOCK_HOST, port=MOCK_PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def run(label: str, call, total: int, concurrency: int):
+    """total개의 요청을 concurrency 만큼 동시에 실행하고 지연 시간 통계 출력"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<14} mean={statistics.mean(latencies):8.2f}ms "
+        f"p50={statistics.median(latencies):8.2f}ms p95={p95:8.2f}ms "
+        f"throughput={total / elapsed:8.1f} req/s"
+    )
+
+async def main(total: int, concurrency: int):
+    # 벤치마크용 임시 벡터 저장소 + mock OpenAI (app 모듈 import 전에 설정)
+    workdir = tempfile.mkdtemp(prefix="rag-bench-")
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    os.environ["OPENAI_BASE_URL"] = f"http://{MOCK_HOST}:{MOCK_PORT}/v1"
+    os.environ["OPENAI_API_BASE"] = os.environ["OPENAI_BASE_URL"]
+    os.environ["VECTOR_DB_TYPE"] = "faiss"
+    os.environ["VECTOR_DB_PATH"] = workdir
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embedding_cache.db")
+    # 워밍업과 본 측정의 질문이 겹치므로 질의 캐시는 끄고 측정
+    os.environ["RAG_RETRIEVAL_CACHE_SIZE"] = "0"
+    os.environ["RAG_ANSWER_CACHE_SIZE"] = "0"
+    
+    from functools import partial
+    from langchain.schema import Document
+    import app.embeddings
+    
+    # mock 서버에는 텍스트를 그대로 보냄 (tiktoken 인코딩 파일을 내려받지 않도록)
+    app.embeddings.OpenAIEmbeddings = partial(app.embeddings.OpenAIEmbeddings, check_embedding_ctx_length=False)
+    from app.rag_engine import RAGEngine
+    
+    engine = RAGEngine()
+    engine.vector_store.add_documents([
+        Document(page_content=f"서울 관광지 안내 {i}: 경복궁, 남산타워, 명동", metadata={"source": f"doc{i}"})
+        for i in range(200)
+    ])
+    
+    async def blocking_query(i: int):
+        # 기존 방식: async 엔드포인트 안에서 동기 체인 호출 -> 답변이 끝날 때까지 이벤트 루프 정지
+        engine.query(f"서울 관광지 추천 {i}")
+    
+    async def async_query(i: int):
+        await engine.aquery(f"서울 관광지 추천 {i}")
+    
+    async def async_search(i: int):
+        await engine.asearch_only(f"서울 관광지 {i}")
+    
+    # 워밍업
+    await run("warmup", async_query, 10, concurrency)
+    await run("sync query", blocking_query, total, concurrency)
+    await run("async query", async_query, total, concurrency)
+    await run("async search", async_search, total, concurrency)
+    
+    engine.vector_store.close()
+    engine.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG 동시 처리 벤치마크")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock LLM 응답 지연 (초)")
+    args = parser.parse_args()
+    
+    mock_latency = args.latency
+    server = start_mock_server()
+    try:
+        asyncio.run(main(args.requests, args.concurrency))
+    finally:
+        server.should_exit = True
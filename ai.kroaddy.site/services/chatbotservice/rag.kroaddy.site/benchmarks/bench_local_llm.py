@@ -0,0 +1,85 @@
+"""
+로컬 CPU LLM 벤치마크
+백엔드별(fp32, int8 동적 양자화, ONNX Runtime)로 RAG 프롬프트 답변 생성 속도를 측정하여 tokens/sec 비교
+
+- baseline: 기존 방식 (HuggingFacePipeline.from_model_id 기본 설정 - fp32, 기본 스레드, 워밍업 없음. 생성 옵션은 같게 적용)
+- fp32 / int8 / onnx: app.local_llm 설정 (LOCAL_LLM_THREADS 스레드, greedy, 생성 길이 제한, 워밍업 후 측정)
+
+실행 (rag.kroaddy.site 디렉토리에서, torch/transformers 필요, onnx는 optimum[onnxruntime] 필요):
+    python -m benchmarks.bench_local_llm --backends baseline,fp32,int8,onnx --prompts 8 --max-new-tokens 64
+"""
+import argparse
+import statistics
+import time
+
+from app.config import LOCAL_LLM_MODEL, LOCAL_LLM_TASK, LOCAL_LLM_THREADS
+from app.local_llm import BACKENDS, build_pipeline, generation_kwargs, warm_up
+
+_CONTEXT = (
+    "경복궁은 1395년에 지어진 조선 왕조의 법궁으로, 서울 종로구에 있습니다. "
+    "남산타워는 서울 중심의 남산 정상에 있는 전망대로 야경이 유명합니다. "
+    "명동은 쇼핑과 길거리 음식으로 유명한 서울의 대표 상권입니다. "
+)
+_QUESTIONS = [
+    "서울에서 역사적인 관광지는 어디인가요?",
+    "야경을 보기 좋은 곳을 추천해 주세요.",
+    "쇼핑하기 좋은 곳은 어디인가요?",
+    "경복궁은 언제 지어졌나요?",
+]
+
+def make_prompts(count: int) -> list:
+    """RAGEngine 프롬프트와 같은 형식의 테스트 프롬프트"""
+    return [
+        f"다음 컨텍스트를 사용하여 질문에 답변하세요.\n\n컨텍스트: {_CONTEXT * 3}\n\n질문: {_QUESTIONS[i % len(_QUESTIONS)]}\n\n답변:"
+        for i in range(count)
+    ]
+
+def load_baseline(model_id: str, task: str):
+    """기존 방식 파이프라인 (fp32, 기본 설정)"""
+    from langchain_community.llms import HuggingFacePipeline
+    
+    return HuggingFacePipeline.from_model_id(model_id=model_id, task=task).pipeline
+
+def run(label: str, pipe, prompts: list, task: str, max_new_tokens: int, load_seconds: float, warmup: bool):
+    """프롬프트를 하나씩 생성하고 생성 토큰 수 기준 tokens/sec 출력"""
+    warmup_seconds = warm_up(pipe, task) if warmup else 0.0
+    kwargs = generation_kwargs(task, max_new_tokens)
+    
+    latencies, tokens = [], 0
+    start = time.perf_counter()
+    for prompt in prompts:
+        request_start = time.perf_counter()
+        output = pipe(prompt, **kwargs)[0]["generated_text"]
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        tokens += len(pipe.tokenizer(output, add_special_tokens=False).input_ids)
+    elapsed = time.perf_counter() - start
+    
+    print(
+        f"{label:<9} load={load_seconds:6.1f}s warmup={warmup_seconds:5.2f}s "
+        f"first={latencies[0]:8.1f}ms mean={statistics.mean(latencies):8.1f}ms "
+        f"tokens={tokens:5d} tokens/sec={tokens / elapsed:7.1f}"
+    )
+
+def main(backends: list, count: int, max_new_tokens: int, threads: int):
+    prompts = make_prompts(count)
+    print(f"model={LOCAL_LLM_MODEL} task={LOCAL_LLM_TASK} threads={threads} prompts={count} max_new_tokens={max_new_tokens}")
+    
+    for backend in backends:
+        start = time.perf_counter()
+        if backend == "baseline":
+            pipe = load_baseline(LOCAL_LLM_MODEL, LOCAL_LLM_TASK)
+        else:
+            pipe = build_pipeline(LOCAL_LLM_MODEL, backend, LOCAL_LLM_TASK, threads)
+        load_seconds = time.perf_counter() - start
+        run(backend, pipe, prompts, LOCAL_LLM_TASK, max_new_tokens, load_seconds, warmup=backend != "baseline")
+        del pipe
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 CPU LLM 벤치마크")
+    parser.add_argument("--backends", default="baseline," + ",".join(BACKENDS), help="쉼표로 구분 (baseline, fp32, int8, onnx)")
+    parser.add_argument("--prompts", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=LOCAL_LLM_THREADS)
+    args = parser.parse_args()
+    
+    main([backend.strip() for backend in args.backends.split(",") if backend.strip()], args.prompts, args.max_new_tokens, args.threads)
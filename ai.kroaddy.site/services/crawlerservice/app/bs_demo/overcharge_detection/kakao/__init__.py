@@ -4,7 +4,7 @@
 """
 from .search_kakao import search_kakao_places, fetch_kakao_place_detail
 from .detail import fetch_place_detail
-from .crawler import crawl_place_with_menu, crawl_place_by_id, batch_crawl_places
+from .crawler import crawl_place_with_menu, crawl_place_by_id, batch_crawl_places, save_crawl_results
 
 __all__ = [
     "search_kakao_places",
@@ -13,5 +13,6 @@ __all__ = [
     "crawl_place_with_menu",
     "crawl_place_by_id",
     "batch_crawl_places",
+    "save_crawl_results",
 ]
 
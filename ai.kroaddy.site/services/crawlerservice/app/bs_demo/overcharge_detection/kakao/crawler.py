@@ -4,6 +4,9 @@
 장소 검색부터 메뉴 가격 추출까지 처리
 """
 from typing import List, Dict, Optional
+import os
+import json
+import time
 import logging
 from .search_kakao import search_kakao_places, fetch_kakao_place_detail
 
@@ -113,12 +116,53 @@ def crawl_place_by_id(kakao_place_id: str) -> Optional[Dict]:
         return None
 
 
-def batch_crawl_places(place_names: List[str]) -> List[Dict]:
+def save_crawl_results(results: List[Dict], output_path: str) -> int:
+    """
+    크롤링 결과를 JSONL 파일에 추가 저장 (가격 기준표 생성용 원본 데이터)
+    
+    메뉴가 있는 장소만 한 줄에 하나씩 기록
+    
+    Args:
+        results: crawl_place_with_menu 형식의 장소 리스트
+        output_path: JSONL 파일 경로
+    
+    Returns:
+        저장한 장소 수
+    """
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    crawled_at = int(time.time())
+    saved = 0
+    with open(output_path, "a", encoding="utf-8") as f:
+        for place in results:
+            if not place.get("menus"):
+                continue
+            record = {
+                "kakao_place_id": place.get("kakao_place_id"),
+                "name": place.get("name"),
+                "address": place.get("address"),
+                "category": place.get("category"),
+                "lat": place.get("lat"),
+                "lng": place.get("lng"),
+                "menus": place["menus"],
+                "crawled_at": crawled_at
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            saved += 1
+    
+    logger.info(f"크롤링 결과 저장: {saved}개 장소 -> {output_path}")
+    return saved
+
+
+def batch_crawl_places(place_names: List[str], output_path: Optional[str] = None) -> List[Dict]:
     """
     여러 장소를 일괄 크롤링
     
     Args:
         place_names: 장소 이름 리스트
+        output_path: 지정 시 결과를 JSONL로 추가 저장 (선택사항)
     
     Returns:
         모든 장소의 크롤링 결과 리스트
@@ -134,5 +178,9 @@ def batch_crawl_places(place_names: List[str]) -> List[Dict]:
             continue
     
     logger.info(f"일괄 크롤링 완료: {len(all_results)}개 장소")
+    
+    if output_path:
+        save_crawl_results(all_results, output_path)
+    
     return all_results
 
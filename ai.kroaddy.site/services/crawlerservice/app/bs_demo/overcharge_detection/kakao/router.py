@@ -2,6 +2,7 @@
 """
 카카오맵 크롤링 API 라우터
 """
+import os
 import logging
 from typing import List, Dict, Optional
 
@@ -9,9 +10,13 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from .search_kakao import search_kakao_places, fetch_kakao_place_detail
+from .crawler import save_crawl_results
 
 logger = logging.getLogger(__name__)
 
+# 설정 시 /crawl 결과를 JSONL로 누적 저장 (chatbotservice 가격 기준표 생성용)
+KAKAO_MENU_EXPORT_PATH = os.getenv("KAKAO_MENU_EXPORT_PATH", "")
+
 # 카카오 전용 prefix
 router = APIRouter(prefix="/kakao", tags=["카카오 지도 크롤링"])
 
@@ -75,6 +80,11 @@ async def kakao_crawl_by_name(request: PlaceSearchRequest):
 
         detail = fetch_kakao_place_detail(place_id)
         merged = {**target, **detail, "menus": detail.get("menus", [])}
+        if KAKAO_MENU_EXPORT_PATH:
+            try:
+                save_crawl_results([merged], KAKAO_MENU_EXPORT_PATH)
+            except OSError as e:
+                logger.warning(f"크롤링 결과 저장 실패: {e}")
         return {"success": True, "data": merged, "menu_count": len(merged.get("menus", []))}
     except Exception as e:
         logger.error(f"카카오 통합 크롤링 실패: {e}")